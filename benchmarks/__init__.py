@@ -0,0 +1,4 @@
+"""
+Offline benchmarks of rosahelikopter, run against a local stand-in for Githubs GraphQL API.
+Run with `python -m benchmarks --help` from the repository root.
+"""
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness; runs each scenario in a fresh process against a `FakeGithubServer`,
+reporting wall time, requests made, peak RSS and throughput as JSON.
+"""
+
+# Python standard library imports
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import pathlib
+import platform
+import statistics
+import subprocess
+import typing
+
+# Non-standard library python package imports
+import click
+
+# Imports of module(s) internal to this project/package
+from benchmarks.fake_github import (
+    FakeGithubServer,
+    make_dataset,
+)
+from benchmarks.scenarios import (
+    SCENARIOS,
+    STARTUP_SCENARIOS,
+    run_scenario,
+)
+from rosahelikopter.decoding import JSON_BACKEND
+
+
+# Median wall time a startup scenario may take before the benchmark fails, see `--startup-budget`
+STARTUP_BUDGET_SECONDS = 0.2
+
+
+def _git_revision() -> typing.Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, check=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare_results(results: dict, baseline: dict) -> None:
+    for scenario, scenario_results in results['results'].items():
+        baseline_results = baseline['results'].get(scenario)
+        if baseline_results is None:
+            continue
+        changes = ', '.join(
+            f"{metric} {100 * (value / baseline_results[metric] - 1):+.1f}%"
+            for metric, value in scenario_results.items()
+            if baseline_results.get(metric)
+        )
+        click.echo(f"{scenario}: {changes}", err=True)
+
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help'], max_content_width=120))
+@click.option(
+    '-s', '--scenario', 'scenarios',
+    type=click.Choice(SCENARIOS), multiple=True, default=SCENARIOS, show_default=True,
+    help='Scenario(s) to run, one per flag.',
+)
+@click.option('--orgs', 'num_orgs', type=click.IntRange(min=1), default=2, show_default=True)
+@click.option('--teams', 'num_teams', type=click.IntRange(min=1), default=10, show_default=True)
+@click.option('--repos', 'num_repos', type=click.IntRange(min=0), default=1000, show_default=True,
+              help='Repositories per org.')
+@click.option('--page-size', type=click.IntRange(min=1), default=100, show_default=True,
+              help='Maximum number of items per page served.')
+@click.option('--latency', type=float, default=0.02, show_default=True, help='Seconds to delay each response.')
+@click.option('-c', '--concurrency', type=click.IntRange(min=1), default=8, show_default=True)
+@click.option('-b', '--batch-size', type=click.IntRange(min=1), default=10, show_default=True)
+@click.option('--write-workers', type=click.IntRange(min=1), default=4, show_default=True)
+@click.option('-r', '--repeat', type=click.IntRange(min=1), default=3, show_default=True,
+              help='Number of runs of each scenario, each in a fresh process.')
+@click.option('-o', '--output', type=click.Path(dir_okay=False, writable=True),
+              help='File to write results to (as JSON), instead of stdout.')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False),
+              help='Results (as JSON) of an earlier run to compare with, printing relative changes.')
+@click.option('--startup-budget', type=float, default=STARTUP_BUDGET_SECONDS, show_default=True,
+              help='Seconds the startup scenarios may take (median), exiting with an error if any takes longer.')
+def benchmark(
+    scenarios: tuple[str, ...],
+    num_orgs: int,
+    num_teams: int,
+    num_repos: int,
+    page_size: int,
+    latency: float,
+    concurrency: int,
+    batch_size: int,
+    write_workers: int,
+    repeat: int,
+    output: typing.Optional[str],
+    baseline_path: typing.Optional[str],
+    startup_budget: float,
+) -> None:
+    """Run rosahelikopter's benchmark scenarios against a local stand-in for Githubs GraphQL API."""
+    dataset_parameters = dict(num_orgs=num_orgs, num_teams=num_teams, num_repos=num_repos)
+    results = dict(
+        created_at=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        git_revision=_git_revision(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        json_backend=JSON_BACKEND,
+        parameters=dict(
+            dataset_parameters,
+            page_size=page_size,
+            latency=latency,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            write_workers=write_workers,
+            repeat=repeat,
+        ),
+        results=dict(),
+    )
+
+    with FakeGithubServer(make_dataset(**dataset_parameters), page_size=page_size, latency=latency) as fake_github:
+        for scenario in scenarios:
+            runs, num_requests = list(), fake_github.num_requests
+            for _ in range(repeat):
+                # A fresh process for every run, for peak RSS to be that of the run alone
+                with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context('spawn'),
+                ) as executor:
+                    runs.append(
+                        executor.submit(
+                            run_scenario,
+                            scenario,
+                            fake_github.url,
+                            dataset_parameters,
+                            concurrency,
+                            batch_size,
+                            write_workers,
+                        ).result()
+                    )
+            wall_seconds = statistics.median(run['wall_seconds'] for run in runs)
+            results['results'][scenario] = dict(
+                wall_seconds=wall_seconds,
+                wall_seconds_min=min(run['wall_seconds'] for run in runs),
+                requests=(fake_github.num_requests - num_requests) / repeat,
+                peak_rss_mib=max(run['peak_rss_bytes'] for run in runs) / 1024 ** 2,
+                repository_edges=runs[0]['repository_edges'],
+                repository_edges_per_second=runs[0]['repository_edges'] / wall_seconds,
+            )
+            click.echo(f"{scenario}: {json.dumps(results['results'][scenario])}", err=True)
+
+    results_json = json.dumps(results, indent=2)
+    if output:
+        pathlib.Path(output).write_text(results_json + '\n')
+    else:
+        click.echo(results_json)
+
+    if baseline_path:
+        _compare_results(results, json.loads(pathlib.Path(baseline_path).read_text()))
+
+    over_budget = [
+        f"{scenario} ({results['results'][scenario]['wall_seconds']:.3f}s)"
+        for scenario in scenarios
+        if scenario in STARTUP_SCENARIOS and results['results'][scenario]['wall_seconds'] > startup_budget
+    ]
+    if over_budget:
+        raise click.ClickException(f"Over the startup budget of {startup_budget}s: {', '.join(over_budget)}")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Githubs GraphQL API, serving synthetic orgs, teams and repositories.
+Implements just the part of Githubs schema queried by rosahelikopter.
+"""
+
+# Python standard library imports
+import asyncio
+import random
+import threading
+import typing
+
+# Non-standard library python package imports
+from aiohttp import web
+import click
+import graphql
+
+
+FAKE_GITHUB_SCHEMA = graphql.build_schema("""
+    type Query {
+      organization(login: String!): Organization
+      rateLimit: RateLimit
+    }
+    type RateLimit { cost: Int limit: Int remaining: Int resetAt: String }
+    type Organization {
+      login: String
+      teams(first: Int, after: String, query: String): TeamConnection
+      team(slug: String!): Team
+    }
+    type TeamConnection { pageInfo: PageInfo totalCount: Int edges: [TeamEdge] nodes: [Team] }
+    type TeamEdge { node: Team }
+    type Team {
+      id: ID
+      slug: String
+      name: String
+      repositories(first: Int, after: String, query: String, orderBy: TeamRepositoryOrder): TeamRepositoryConnection
+    }
+    input TeamRepositoryOrder { field: TeamRepositoryOrderField! direction: OrderDirection! }
+    enum TeamRepositoryOrderField { CREATED_AT UPDATED_AT PUSHED_AT NAME PERMISSION STARGAZERS }
+    enum OrderDirection { ASC DESC }
+    type TeamRepositoryConnection { pageInfo: PageInfo totalCount: Int edges: [TeamRepositoryEdge] }
+    type TeamRepositoryEdge { permission: String node: Repository }
+    type PageInfo { endCursor: String hasNextPage: Boolean }
+    type Repository {
+      description: String
+      nameWithOwner: String
+      url: String
+      isArchived: Boolean
+      updatedAt: String
+      pushedAt: String
+    }
+""")
+
+# Githubs repository permissions, lowest first
+PERMISSIONS = ('READ', 'TRIAGE', 'WRITE', 'MAINTAIN', 'ADMIN')
+
+
+class NotFoundError(Exception):
+    """
+    Raised by resolvers for orgs and teams not in the dataset, answered as `NOT_FOUND` errors like Github does.
+    """
+
+
+def make_dataset(
+    num_orgs: int,
+    num_teams: int,
+    num_repos: int,
+    team_repo_ratio: float = 0.4,
+    seed: int = 0,
+) -> dict[str, dict[str, list[tuple[str, dict]]]]:
+    """
+    Synthetic orgs `org-<i>`, each with `num_repos` repositories and `num_teams` teams `team-<i>`,
+    every team having some permission to (about) `team_repo_ratio` of its org's repositories.
+    Returns `{org_name: {team_slug: [(permission, repository), ...]}}`.
+    """
+    rnd = random.Random(seed)
+    dataset = dict()
+    for org_index in range(num_orgs):
+        org_name = f"org-{org_index:04d}"
+        repositories = [
+            dict(
+                description=rnd.choice((None, '', f"Repository number {repo_index}")),
+                nameWithOwner=f"{org_name}/repo-{repo_index:06d}",
+                url=f"https://github.com/{org_name}/repo-{repo_index:06d}",
+                isArchived=rnd.random() < 0.1,
+                updatedAt=f"2021-{1 + repo_index % 12:02d}-{1 + repo_index % 28:02d}T00:00:00Z",
+                pushedAt=f"2021-{1 + repo_index % 12:02d}-{1 + repo_index % 28:02d}T00:00:00Z",
+            )
+            for repo_index in range(num_repos)
+        ]
+        dataset[org_name] = {
+            f"team-{team_index:04d}": [
+                (rnd.choice(PERMISSIONS), repository)
+                for repository in repositories
+                if rnd.random() < team_repo_ratio
+            ]
+            for team_index in range(num_teams)
+        }
+    return dataset
+
+
+def _paginate(
+    items: list,
+    first: typing.Optional[int],
+    after: typing.Optional[str],
+    page_size: int,
+) -> tuple[list, dict]:
+    # Cursors are plain offsets, pages are capped to `page_size` items like Github caps them to 100
+    start = int(after) if after else 0
+    page = items[start:start + min(first or page_size, page_size)]
+    end = start + len(page)
+    return page, dict(endCursor=str(end) if page else None, hasNextPage=end < len(items))
+
+
+class FakeGithubServer:
+    """
+    Serves `dataset` (see `make_dataset()`) over HTTP at `url`, from a thread of its own while used as
+    a context manager. Every response is delayed by `latency` seconds, and pages hold at most `page_size` items.
+    Teams are named as their slugs, unless named otherwise in `team_names` (`{org_name: {team_slug: name}}`).
+    Requests served are counted in `num_requests`.
+    """
+
+    def __init__(
+        self,
+        dataset: dict[str, dict[str, list[tuple[str, dict]]]],
+        page_size: int = 100,
+        latency: float = 0.0,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        team_names: typing.Optional[dict[str, dict[str, str]]] = None,
+    ) -> None:
+        self.dataset = dataset
+        self.page_size = page_size
+        self.latency = latency
+        self.team_names = team_names or dict()
+        self.host = host
+        self.port = port
+        self.num_requests = 0
+
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/graphql"
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/graphql', self._handle_graphql)
+        return app
+
+    def __enter__(self) -> 'FakeGithubServer':
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def start() -> None:
+            self._runner = web.AppRunner(self.make_app())
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, self.port)
+            await site.start()
+            # Find out which port was picked when asked for any (0)
+            self.port = self._runner.addresses[0][1]
+
+        def run() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _handle_graphql(self, request: web.Request) -> web.Response:
+        self.num_requests += 1
+        payload = await request.json()
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        result = await graphql.graphql(
+            FAKE_GITHUB_SCHEMA,
+            payload['query'],
+            root_value=dict(
+                organization=lambda info, login: self._organization(login),
+                rateLimit=dict(cost=1, limit=5000, remaining=4999, resetAt='2030-01-01T00:00:00Z'),
+            ),
+            variable_values=payload.get('variables'),
+        )
+        response_body = dict(data=result.data)
+        if result.errors:
+            response_body['errors'] = [
+                dict(
+                    error.formatted,
+                    **(dict(type='NOT_FOUND') if isinstance(error.original_error, NotFoundError) else dict()),
+                )
+                for error in result.errors
+            ]
+
+        response = web.json_response(response_body)
+        # Compressed if the client asks for it, like Github does
+        response.enable_compression()
+        return response
+
+    def _organization(self, login: str) -> dict:
+        if login not in self.dataset:
+            raise NotFoundError(f"Could not resolve to an Organization with the login of '{login}'.")
+
+        def teams(info, first=None, after=None, query=None) -> dict:
+            team_slugs = sorted(self.dataset[login])
+            if query:
+                team_slugs = [team_slug for team_slug in team_slugs if query.lower() in team_slug]
+            page, page_info = _paginate(team_slugs, first, after, self.page_size)
+            team_nodes = [self._team(login, team_slug) for team_slug in page]
+            return dict(
+                pageInfo=page_info,
+                totalCount=len(team_slugs),
+                edges=[dict(node=team) for team in team_nodes],
+                nodes=team_nodes,
+            )
+
+        def team(info, slug) -> dict:
+            if slug not in self.dataset[login]:
+                raise NotFoundError(f"Could not resolve to a Team with the slug of '{slug}'.")
+            return self._team(login, slug)
+
+        return dict(login=login, teams=teams, team=team)
+
+    def _team(self, login: str, team_slug: str) -> dict:
+        def repositories(info, first=None, after=None, query=None, orderBy=None) -> dict:
+            repository_edges = self.dataset[login][team_slug]
+            if orderBy is not None:
+                sort_key = {
+                    'PERMISSION': lambda edge: PERMISSIONS.index(edge[0]),
+                    'UPDATED_AT': lambda edge: edge[1]['updatedAt'],
+                    'PUSHED_AT': lambda edge: edge[1]['pushedAt'],
+                }.get(orderBy['field'], lambda edge: edge[1]['nameWithOwner'])
+                repository_edges = sorted(repository_edges, key=sort_key, reverse=orderBy['direction'] == 'DESC')
+            page, page_info = _paginate(repository_edges, first, after, self.page_size)
+            return dict(
+                pageInfo=page_info,
+                totalCount=len(repository_edges),
+                edges=[dict(permission=permission, node=repository) for permission, repository in page],
+            )
+
+        return dict(
+            id=f"T_{login}_{team_slug}",
+            slug=team_slug,
+            name=self.team_names.get(login, dict()).get(team_slug, team_slug),
+            repositories=repositories,
+        )
+
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('--port', type=int, default=8765, show_default=True)
+@click.option('--orgs', 'num_orgs', type=click.IntRange(min=1), default=2, show_default=True)
+@click.option('--teams', 'num_teams', type=click.IntRange(min=1), default=10, show_default=True)
+@click.option('--repos', 'num_repos', type=click.IntRange(min=0), default=1000, show_default=True)
+@click.option('--page-size', type=click.IntRange(min=1), default=100, show_default=True)
+@click.option('--latency', type=float, default=0.0, show_default=True, help='Seconds to delay each response.')
+def serve(
+    port: int,
+    num_orgs: int,
+    num_teams: int,
+    num_repos: int,
+    page_size: int,
+    latency: float,
+) -> None:
+    """Serve a synthetic dataset until interrupted, e.g. for running rosahelikopter with `--api-url` against it."""
+    fake_github = FakeGithubServer(
+        make_dataset(num_orgs, num_teams, num_repos),
+        page_size=page_size,
+        latency=latency,
+        port=port,
+    )
+    web.run_app(fake_github.make_app(), host=fake_github.host, port=port)
+
+
+if __name__ == '__main__':
+    serve()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark scenarios, each run once per call of `run_scenario()` in the calling process.
+"""
+
+# Python standard library imports
+import contextlib
+import importlib.util
+import os
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+# Imports of module(s) internal to this project/package
+from benchmarks.fake_github import make_dataset
+
+
+# Arguments of a fresh Python interpreter, timed from start to exit
+STARTUP_SCENARIOS = {
+    'startup-import': ('-c', 'import rosahelikopter.cli'),
+    'startup-help': ('-m', 'rosahelikopter', '--help'),
+}
+
+# Decoding and filtering of responses alone, with the fastest JSON backend installed or with the standard library's
+DECODE_SCENARIOS = (
+    'decode-pages',
+    'decode-pages-stdlib',
+)
+
+SCENARIOS = (
+    'fetch-per-team',
+    'fetch-org-crawl',
+    'write-files',
+    'render-markdown',
+    *DECODE_SCENARIOS,
+    *STARTUP_SCENARIOS,
+)
+
+# Fields of each repository asked for by rosahelikopter's queries
+_DECODED_FIELDS = (
+    'description',
+    'nameWithOwner',
+    'url',
+    'isArchived',
+    'updatedAt',
+)
+
+
+def _peak_rss_bytes(who: int = resource.RUSAGE_SELF) -> int:
+    peak_rss = resource.getrusage(who).ru_maxrss
+    # Reported in KiB on Linux, but in bytes on macOS
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def _run_main(api_url: str, dataset_parameters: dict, **main_kwargs: typing.Any) -> int:
+    # Imported here, so that importing is not part of what's measured by the parent process
+    # Imports of module(s) internal to this project/package
+    from rosahelikopter.main import main
+
+    dataset = make_dataset(**dataset_parameters)
+    organizations = sorted(dataset)
+    teams = sorted({team_slug for org_teams in dataset.values() for team_slug in org_teams})
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        main(
+            teams=teams,
+            organizations=organizations,
+            github_auth_tokens=('benchmark',),
+            api_url=api_url,
+            tee_output=False,
+            verbosity_level=-1,
+            max_retries=0,
+            **main_kwargs,
+        )
+    return sum(len(edges) for org_teams in dataset.values() for edges in org_teams.values())
+
+
+def _run_render_markdown(dataset_parameters: dict, write_workers: int) -> int:
+    # Imports of module(s) internal to this project/package
+    from rosahelikopter import (
+        Repository,
+        RepositoryIndex,
+    )
+    from rosahelikopter.markdown import (
+        generate_markdown_template,
+        write_markdown_files,
+    )
+
+    dataset = make_dataset(**dataset_parameters)
+    repository_index = RepositoryIndex()
+    num_repository_edges = 0
+    for org_name, org_teams in dataset.items():
+        for team_slug, edges in org_teams.items():
+            for _, repository in edges:
+                repository_index.add(org_name, team_slug, Repository.from_graphql(repository))
+                num_repository_edges += 1
+
+    organizations = sorted(dataset)
+    teams = sorted(repository_index.teams)
+    generate_markdown_template(
+        orgs=organizations,
+        teams=teams,
+        repositories=repository_index.organization_repositories(*organizations),
+        repository_teams=repository_index.repository_teams,
+    )
+    with tempfile.TemporaryDirectory() as output_dir:
+        os.chdir(output_dir)
+        write_markdown_files(
+            repoes_dataset=repository_index,
+            organizations=organizations,
+            teams=teams,
+            make_org_folders=True,
+            make_team_files=True,
+            num_workers=write_workers,
+        )
+    return num_repository_edges
+
+
+def _run_decode_pages(scenario: str, dataset_parameters: dict) -> dict[str, float]:
+    # Python standard library imports
+    import json
+
+    # Imports of module(s) internal to this project/package
+    from rosahelikopter import (
+        decoding,
+        filter_repositories,
+    )
+    from rosahelikopter.github import GITHUB_GRAPHQL_PAGE_SIZE
+
+    json_loads = json.loads if scenario == 'decode-pages-stdlib' else decoding.json_loads
+
+    # Every team's repositories as pages of responses, encoded up front for decoding to be measured alone
+    responses = list()
+    num_repository_edges = 0
+    for org_teams in make_dataset(**dataset_parameters).values():
+        for edges in org_teams.values():
+            num_repository_edges += len(edges)
+            for index in range(0, len(edges), GITHUB_GRAPHQL_PAGE_SIZE):
+                page_edges = [
+                    dict(permission=permission, node={field: repository[field] for field in _DECODED_FIELDS})
+                    for permission, repository in edges[index:index + GITHUB_GRAPHQL_PAGE_SIZE]
+                ]
+                responses.append(
+                    json.dumps(
+                        dict(
+                            data=dict(
+                                organization0=dict(
+                                    team0=dict(
+                                        repositories=dict(
+                                            pageInfo=dict(endCursor=str(index), hasNextPage=True),
+                                            totalCount=len(edges),
+                                            edges=page_edges,
+                                        ),
+                                    ),
+                                ),
+                            ),
+                        ),
+                    ).encode()
+                )
+
+    started_at = time.perf_counter()
+    for response in responses:
+        filter_repositories(json_loads(response)['data']['organization0']['team0']['repositories']['edges'])
+    return dict(
+        wall_seconds=time.perf_counter() - started_at,
+        peak_rss_bytes=_peak_rss_bytes(),
+        repository_edges=num_repository_edges,
+    )
+
+
+def _run_startup(scenario: str) -> dict[str, float]:
+    # Run from the directory containing the package, for the interpreter to import it from there
+    package_root = pathlib.Path(importlib.util.find_spec('rosahelikopter').origin).parent.parent
+    started_at = time.perf_counter()
+    subprocess.run(
+        [sys.executable, *STARTUP_SCENARIOS[scenario]],
+        cwd=package_root, stdout=subprocess.DEVNULL, check=True,
+    )
+    return dict(
+        wall_seconds=time.perf_counter() - started_at,
+        peak_rss_bytes=_peak_rss_bytes(resource.RUSAGE_CHILDREN),
+        repository_edges=0,
+    )
+
+
+def run_scenario(
+    scenario: str,
+    api_url: str,
+    dataset_parameters: dict,
+    concurrency: int,
+    batch_size: int,
+    write_workers: int,
+) -> dict[str, float]:
+    """
+    Run one scenario once, in the calling process.
+    Returns its wall time, peak RSS and the number of repository edges in the dataset.
+    """
+    if scenario in STARTUP_SCENARIOS:
+        return _run_startup(scenario)
+    if scenario in DECODE_SCENARIOS:
+        return _run_decode_pages(scenario, dataset_parameters)
+
+    started_at = time.perf_counter()
+    with tempfile.TemporaryDirectory() as working_dir:
+        os.chdir(working_dir)
+        if scenario == 'render-markdown':
+            num_repository_edges = _run_render_markdown(dataset_parameters, write_workers)
+        else:
+            num_repository_edges = _run_main(
+                api_url,
+                dataset_parameters,
+                concurrency=concurrency,
+                batch_size=batch_size,
+                strategy='org-crawl' if scenario == 'fetch-org-crawl' else 'per-team',
+                make_org_folders=scenario == 'write-files',
+                make_team_files=scenario == 'write-files',
+                write_workers=write_workers,
+            )
+    return dict(
+        wall_seconds=time.perf_counter() - started_at,
+        peak_rss_bytes=_peak_rss_bytes(),
+        repository_edges=num_repository_edges,
+    )
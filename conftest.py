@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+"""
+Root of the test session; pytest puts this directory on `sys.path`,
+so that tests can run against the stand-in for Githubs GraphQL API in `benchmarks.fake_github`.
+"""
@@ -1,4 +1,5 @@
 # Python standard library imports
+from collections import defaultdict
 import typing
 
 
@@ -11,12 +12,158 @@ _GITHUB_GRAPHQL_RESPONSE = dict[
 ]
 GIT_REPO = _GITHUB_GRAPHQL_RESPONSE
 
+# A team must have this permission to a repository for the repository to be part of the overview
+RELEVANT_PERMISSION = 'ADMIN'
 
-def repository_is_relevant_for_overview(
-        repo_data: GIT_REPO,
-        permission_string: str,
-) -> bool:
-    if repo_data['isArchived'] is not True or 'ADMIN' != permission_string:
+# Defaults shared by the commandline and the sub-modules doing the work, kept here for the commandline to
+# show them without importing those sub-modules (and their dependencies) before they're needed
+GITHUB_GRAPHQL_API_URL = 'https://api.github.com/graphql'
+# Number of teams (per org) from which crawling all the orgs' teams at once is assumed cheaper than fetching per team
+ORG_CRAWL_TEAM_THRESHOLD = 25
+# Number of repositories held in memory by the external sort of streaming runs before being spilled to disk
+STREAM_BUFFER_SIZE = 100_000
+
+
+class Repository(typing.NamedTuple):
+    """
+    Immutable record of the fields of a Github repository used by the overview.
+    Records are identified (i.e. compared and hashed) by `nameWithOwner` alone.
+    """
+    nameWithOwner: str
+    url: str
+    description: typing.Optional[str]
+    isArchived: bool
+
+    @classmethod
+    def from_graphql(cls, repo_data: GIT_REPO) -> 'Repository':
+        return cls(
+            nameWithOwner=repo_data['nameWithOwner'],
+            url=repo_data['url'],
+            description=repo_data['description'],
+            isArchived=repo_data['isArchived'],
+        )
+
+    def __hash__(self) -> int:
+        # Python caches the hash of a string, making this cheap after the first call
+        return hash(self.nameWithOwner)
+
+    def __eq__(self, other: typing.Any) -> bool:
+        if not isinstance(other, Repository):
+            return NotImplemented
+        return self.nameWithOwner == other.nameWithOwner
+
+    def __ne__(self, other: typing.Any) -> bool:
+        if not isinstance(other, Repository):
+            return NotImplemented
+        return self.nameWithOwner != other.nameWithOwner
+
+
+class RepositoryIndex:
+    """
+    Repositories found per org, per team and per org/team combination, grouped as they are added.
+    Each repository is stored once (by `nameWithOwner`), the groups only hold sets of `nameWithOwner`s.
+    `repository_teams` is the reverse of `organization_teams`: the (org_name, team_name) pairs of the teams
+    owning a repository by `nameWithOwner`, every one of them having `RELEVANT_PERMISSION` to it.
+    """
+
+    def __init__(self) -> None:
+        self.repositories: dict[str, Repository] = dict()
+        self.organizations: defaultdict[str, set[str]] = defaultdict(set)
+        self.teams: defaultdict[str, set[str]] = defaultdict(set)
+        self.organization_teams: defaultdict[tuple[str, str], set[str]] = defaultdict(set)
+        self.repository_teams: defaultdict[str, set[tuple[str, str]]] = defaultdict(set)
+
+    def add(
+        self,
+        org_name: str,
+        team_name: str,
+        repository: Repository,
+    ) -> None:
+        # The first record of a repository is kept, the same as when adding it to a set
+        repository = self.repositories.setdefault(repository.nameWithOwner, repository)
+        self.organizations[org_name].add(repository.nameWithOwner)
+        self.teams[team_name].add(repository.nameWithOwner)
+        self.organization_teams[(org_name, team_name)].add(repository.nameWithOwner)
+        self.repository_teams[repository.nameWithOwner].add((org_name, team_name))
+
+    def update(self, other: 'RepositoryIndex') -> None:
+        """
+        Add every repository of `other`, to the same org/team combinations as in `other`.
+        """
+        for (org_name, team_name), name_with_owners in other.organization_teams.items():
+            # Touched even if empty, for an org/team combination without repositories to be kept as such
+            self.organization_teams[(org_name, team_name)]
+            for name_with_owner in name_with_owners:
+                self.add(org_name, team_name, other.repositories[name_with_owner])
+
+    def __getstate__(self) -> tuple[list[Repository], dict[tuple[str, str], list[str]]]:
+        # Pickled (e.g. back from a worker process) without the groups which are derived from `organization_teams`
+        return (
+            list(self.repositories.values()),
+            {org_team: list(name_with_owners) for org_team, name_with_owners in self.organization_teams.items()},
+        )
+
+    def __setstate__(self, state: tuple[list[Repository], dict[tuple[str, str], list[str]]]) -> None:
+        repositories, organization_teams = state
+        self.__init__()
+        repositories = {repository.nameWithOwner: repository for repository in repositories}
+        for (org_name, team_name), name_with_owners in organization_teams.items():
+            self.organization_teams[(org_name, team_name)]
+            for name_with_owner in name_with_owners:
+                self.add(org_name, team_name, repositories[name_with_owner])
+
+    def organization_repositories(self, *org_names: str) -> list[Repository]:
+        return [
+            self.repositories[name_with_owner]
+            for name_with_owner in set().union(*(self.organizations[org_name] for org_name in org_names))
+        ]
+
+    def team_repositories(
+        self,
+        team_name: str,
+        org_name: typing.Optional[str] = None,
+    ) -> list[Repository]:
+        """
+        Returns the repositories of a team, in all orgs or only those in `org_name` if given.
+        """
+        if org_name is None:
+            name_with_owners = self.teams[team_name]
+        else:
+            name_with_owners = self.organization_teams[(org_name, team_name)]
+        return [
+            self.repositories[name_with_owner]
+            for name_with_owner in name_with_owners
+        ]
+
+
+def repository_is_relevant_for_overview(repository_edge: typing.Optional[dict]) -> bool:
+    """
+    Whether a repository edge (`{'permission': ..., 'node': {...}}`) as fetched from Githubs GraphQL API
+    is of an un-archived repository which the team has `RELEVANT_PERMISSION` to.
+    Checked on the edge as decoded, so that records are only made of repositories which are kept.
+    """
+    # Remove empty results from GraphQL json output (happens sometimes)
+    # This bug was fixed by giving the Github PAT the repo:security_events permission
+    #  in addition to org:read permission. But keeping check just to avoid further issues.
+    if repository_edge is None:
+        return False
+    if repository_edge['node']['isArchived'] is True or RELEVANT_PERMISSION != repository_edge['permission']:
         # We're not interested in parsing/displaying info of this repository.
-        False
+        return False
     return True
+
+
+def filter_repositories(
+    repository_edges: typing.Iterable[dict],
+) -> tuple[set[Repository], int]:
+    """
+    Single pass over fetched repository edges, keeping the (de-duplicated) repositories relevant for the overview.
+    Returns the relevant repositories and the number of edges discarded.
+    """
+    relevant_repositories, num_discarded_edges = set(), 0
+    for repo in repository_edges:
+        if repository_is_relevant_for_overview(repo):
+            relevant_repositories.add(Repository.from_graphql(repo['node']))
+            continue
+        num_discarded_edges += 1
+    return relevant_repositories, num_discarded_edges
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Required file when running `python rosahelikopter` -> it's the one that's actually executed with such invocations.
-Just used as a proxy to the `main()` function in `rosahelikopter/main.py`.
+Just used as a proxy to the `cli()` function in `rosahelikopter/cli.py`, which imports `rosahelikopter/main.py`
+(and everything fetching needs) only once the options are parsed and valid.
 """
 
 # Imports of module(s) internal to this project/package
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Sub-module for caching responses from Githubs GraphQL API on disk between runs.
+"""
+
+# Python standard library imports
+import hashlib
+import json
+import os
+import pathlib
+import time
+import typing
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter.files import write_atomically
+
+
+def default_cache_dir() -> pathlib.Path:
+    return pathlib.Path(os.environ.get('XDG_CACHE_HOME', pathlib.Path.home() / '.cache')) / 'rosahelikopter'
+
+
+def cache_scope(api_url: str, github_auth_tokens: typing.Iterable[str]) -> str:
+    """
+    Returns a fingerprint of the API and the tokens fetched with, for keying what is kept between runs by it;
+    another server or token (which may see other orgs, teams and repositories) never gets what was fetched for
+    this one. The tokens are only hashed, never stored.
+    """
+    return hashlib.sha256(json.dumps([api_url, sorted(github_auth_tokens)]).encode()).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    On-disk cache of fetched pages, one JSON file per (org_name, team_name, page_parameters),
+    `page_parameters` being the parameters (e.g. continuation token and order) with which the page was fetched.
+
+    Entries older than `ttl` seconds count as misses. When the cache grows past `max_size` bytes,
+    `evict()` removes the least recently used entries (by file modification time, touched on every hit).
+    With `refresh` set, every lookup is a miss but fetched pages are still stored.
+    """
+
+    def __init__(
+        self,
+        cache_dir: pathlib.Path,
+        ttl: float,
+        max_size: int,
+        refresh: bool = False,
+        namespace: str = '',
+        json_loads: typing.Callable[[bytes], typing.Any] = json.loads,
+    ) -> None:
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.refresh = refresh
+        # Keeps entries made with one query shape from being served to another
+        self.namespace = namespace
+        # Entries are decoded with this, e.g. `rosahelikopter.decoding.json_loads` for a faster backend
+        self.json_loads = json_loads
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, org_name: str, team_name: str, page_parameters: str) -> pathlib.Path:
+        key = json.dumps([self.namespace, org_name, team_name, page_parameters])
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(
+        self,
+        org_name: str,
+        team_name: str,
+        page_parameters: str,
+    ) -> typing.Optional[dict]:
+        """
+        Returns the cached entry as `{'fetched_at': <unix time>, 'page': <page as fetched>}`,
+        or `None` if there is no fresh entry for the given key.
+        """
+        entry_path = self._entry_path(org_name, team_name, page_parameters)
+        entry = None
+        if not self.refresh:
+            try:
+                entry = self.json_loads(entry_path.read_bytes())
+            except (OSError, ValueError):
+                # Missing or unreadable, either way a miss
+                pass
+
+        if entry is None or time.time() - entry['fetched_at'] > self.ttl:
+            self.misses += 1
+            return None
+
+        # Mark entry as recently used
+        os.utime(entry_path)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        org_name: str,
+        team_name: str,
+        page_parameters: str,
+        page: typing.Optional[dict],
+    ) -> None:
+        write_atomically(
+            self._entry_path(org_name, team_name, page_parameters),
+            json.dumps(dict(fetched_at=time.time(), page=page)),
+        )
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache is no larger than `max_size` bytes.
+        Returns the number of entries removed.
+        """
+        entries = list()
+        for entry_path in self.cache_dir.glob('*.json'):
+            try:
+                entry_stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+
+        cache_size = sum(size for _, size, _ in entries)
+        num_evicted = 0
+        for _, size, entry_path in sorted(entries):
+            if cache_size <= self.max_size:
+                break
+            entry_path.unlink(missing_ok=True)
+            cache_size -= size
+            num_evicted += 1
+        return num_evicted
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Sub-module for change reports; comparing the repositories found by this run with those of an earlier run
+(e.g. read from a snapshot), reporting repositories added and removed, ADMIN teams gained and lost,
+and descriptions changed, without rendering any overview.
+"""
+
+# Python standard library imports
+import typing
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    RELEVANT_PERMISSION,
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.profiling import profiler
+
+
+class RepositoryChanges(typing.NamedTuple):
+    """
+    Differences between the repositories of two runs, each list sorted by `nameWithOwner`.
+    """
+    added: list[Repository]
+    removed: list[Repository]
+    # (nameWithOwner, teams gained or lost)
+    teams_gained: list[tuple[str, list[str]]]
+    teams_lost: list[tuple[str, list[str]]]
+    # (repository before, repository now), split by whether the repository lost its description
+    became_undocumented: list[tuple[Repository, Repository]]
+    description_changed: list[tuple[Repository, Repository]]
+
+    def __bool__(self) -> bool:
+        return any(self)
+
+
+def _is_documented(description: typing.Optional[str]) -> bool:
+    return bool(description and description.strip())
+
+
+def diff_repository_indexes(previous: RepositoryIndex, current: RepositoryIndex) -> RepositoryChanges:
+    """
+    Compare the repositories of `current` with those of `previous`, keyed by `nameWithOwner`.
+    Runs in time linear in the number of repositories (and their teams), only the changes found are sorted.
+    """
+    with profiler.span('diff'):
+        previous_names, current_names = previous.repositories.keys(), current.repositories.keys()
+        previous_teams, current_teams = previous.repository_teams, current.repository_teams
+
+        teams_gained, teams_lost = list(), list()
+        became_undocumented, description_changed = list(), list()
+        for name_with_owner in previous_names & current_names:
+            gained = current_teams[name_with_owner] - previous_teams[name_with_owner]
+            if gained:
+                teams_gained.append((name_with_owner, sorted(team_name for _, team_name in gained)))
+            lost = previous_teams[name_with_owner] - current_teams[name_with_owner]
+            if lost:
+                teams_lost.append((name_with_owner, sorted(team_name for _, team_name in lost)))
+
+            before, now = previous.repositories[name_with_owner], current.repositories[name_with_owner]
+            if before.description == now.description or not (
+                _is_documented(before.description) or _is_documented(now.description)
+            ):
+                # Unchanged, or e.g. from `None` to '' which is no change to the reader
+                continue
+            if not _is_documented(now.description):
+                became_undocumented.append((before, now))
+            else:
+                description_changed.append((before, now))
+
+        return RepositoryChanges(
+            added=[current.repositories[name] for name in sorted(current_names - previous_names)],
+            removed=[previous.repositories[name] for name in sorted(previous_names - current_names)],
+            teams_gained=sorted(teams_gained),
+            teams_lost=sorted(teams_lost),
+            became_undocumented=sorted(became_undocumented, key=lambda change: change[1].nameWithOwner),
+            description_changed=sorted(description_changed, key=lambda change: change[1].nameWithOwner),
+        )
+
+
+def _format_description(description: typing.Optional[str]) -> str:
+    return repr(description) if _is_documented(description) else '(no description)'
+
+
+def generate_changes_report(changes: RepositoryChanges, previous_name: str) -> str:
+    """
+    Returns `changes` as a compact Markdown report, with a section for each kind of change found.
+    """
+    sections = [
+        (
+            'Added',
+            [
+                f"- [{repository.nameWithOwner}]({repository.url}): {_format_description(repository.description)}"
+                for repository in changes.added
+            ],
+        ),
+        ('Removed', [f"- {repository.nameWithOwner}" for repository in changes.removed]),
+        (
+            f"Gained {RELEVANT_PERMISSION} team(s)",
+            [f"- {name_with_owner}: {', '.join(teams)}" for name_with_owner, teams in changes.teams_gained],
+        ),
+        (
+            f"Lost {RELEVANT_PERMISSION} team(s)",
+            [f"- {name_with_owner}: {', '.join(teams)}" for name_with_owner, teams in changes.teams_lost],
+        ),
+        (
+            'Became undocumented',
+            [
+                f"- {now.nameWithOwner} (was {_format_description(before.description)})"
+                for before, now in changes.became_undocumented
+            ],
+        ),
+        (
+            'Description changed',
+            [
+                f"- {now.nameWithOwner}: {_format_description(before.description)}"
+                f" -> {_format_description(now.description)}"
+                for before, now in changes.description_changed
+            ],
+        ),
+    ]
+
+    lines = [f"# Changes since {previous_name}"]
+    for title, section_lines in sections:
+        if section_lines:
+            lines += ['', f"## {title} ({len(section_lines)})", *section_lines]
+    if not changes:
+        lines += ['', 'No changes.']
+    return '\n'.join(lines) + '\n'
@@ -6,12 +6,34 @@ Sub-module defining the program's interaction with the user via the commandline.
 # Python standard library imports
 import json
 import textwrap
+import typing
 
 # Non-standard library python package imports
 import click
 
 # Imports of module(s) internal to this project/package
-from rosahelikopter.main import main
+from rosahelikopter import (
+    GITHUB_GRAPHQL_API_URL,
+    ORG_CRAWL_TEAM_THRESHOLD,
+    STREAM_BUFFER_SIZE,
+)
+from rosahelikopter.cache import default_cache_dir
+from rosahelikopter.exports import EXPORT_WRITERS
+from rosahelikopter.profiling import profiler
+
+
+def _parse_serve_address(
+    ctx: click.Context,
+    param: click.Parameter,
+    value: typing.Optional[str],
+) -> typing.Optional[tuple[str, int]]:
+    if value is None:
+        return None
+    host, _, port = value.rpartition(':')
+    if not port.isdigit():
+        raise click.BadParameter(f"Expected <[HOST:]PORT>, e.g. `8080` or `0.0.0.0:8080`, not {value!r}.")
+    # Only reachable from this machine unless another host is given
+    return host or '127.0.0.1', int(port)
 
 
 DEFAULT_TEAM_NAMES=(
@@ -22,6 +44,7 @@ DEFAULT_TEAM_NAMES=(
 
 
 @click.command(
+    'overview',
     options_metavar='<options>',
     context_settings=dict(
         help_option_names=['-h', '--help'],
@@ -30,10 +53,16 @@ DEFAULT_TEAM_NAMES=(
     help=textwrap.dedent(
         f"""List all (un-archived) repositories in <GITHUB ORGS> for which the <GITHUB TEAMS> are ADMINs of.
         Output is a Markdown file with one repository per row in a table.
-        The table has the columns: `Name (as GH URL)` and `Description (GH Repo description)`.
+        The table has the columns: `Name (as GH URL)`, `Description (GH Repo description)`
+        and `Owners (the <GITHUB TEAMS> which are ADMINs of it)`.
 
         <GITHUB TEAMS> is one or more Github team names (strings).
-        <GITHUB TEAMS> defaults to the Github team names {DEFAULT_TEAM_NAMES} if unspecified."""
+        <GITHUB TEAMS> defaults to the Github team names {DEFAULT_TEAM_NAMES} if unspecified.
+
+        A first <GITHUB TEAMS> named as a command (`overview` or `lookup`) must follow `--`,
+        e.g. `rosahelikopter -- lookup`, as `rosahelikopter lookup` runs the `lookup` command.
+
+        See `lookup --help` for looking up which teams own a repository, as saved by an earlier run."""
     )
 )
 @click.option(
@@ -73,11 +102,208 @@ DEFAULT_TEAM_NAMES=(
     help='Flag to send output of program to stdout even if other flag for writing to files have been set.',
 )
 @click.option(
-    '-a', '--github-auth-token',
-    type=str, envvar='GITHUB_USER_TOKEN', required=True,
+    '--write-workers', 'write_workers',
+    type=click.IntRange(min=1), default=4, metavar='<N>', show_default=True,
+    help=textwrap.dedent(
+        """Number of threads rendering and writing files at the same time,
+        when writing output to files with `--separate-output-per-team` and/or `--separate-output-per-org`."""
+    ),
+)
+@click.option(
+    '--export', 'exports',
+    type=(click.Choice(sorted(EXPORT_WRITERS)), click.Path(dir_okay=False, writable=True)),
+    multiple=True, metavar='<FORMAT> <FILE>',
+    help=textwrap.dedent(
+        """Also write the repositories found, by org and team, to <FILE> as `jsonl` (JSON Lines), `csv` or `sqlite`
+        (a database with the tables `repos`, `teams` and `team_repo_permissions`). One format per `--export` flag."""
+    ),
+)
+@click.option(
+    '--from-sqlite', 'from_sqlite',
+    type=click.Path(exists=True, dir_okay=False), metavar='<FILE>',
+    help=textwrap.dedent(
+        """Read the repositories from a database written by `--export sqlite <FILE>` instead of fetching them
+        from Github, e.g. to render Markdown for other <GITHUB TEAMS> or <GITHUB ORGS> without any API calls."""
+    ),
+)
+@click.option(
+    '--save-snapshot', 'save_snapshot_path',
+    type=click.Path(dir_okay=False, writable=True), metavar='<FILE>',
+    help='Also save the repositories found, by org and team, to <FILE> (compressed), for `--from-snapshot`.',
+)
+@click.option(
+    '--from-snapshot', 'from_snapshot',
+    type=click.Path(exists=True, dir_okay=False), metavar='<FILE>',
+    help=textwrap.dedent(
+        """Read the repositories from a snapshot saved by `--save-snapshot` instead of fetching them from Github,
+        e.g. to re-render Markdown (for other <GITHUB TEAMS> or <GITHUB ORGS>) in milliseconds."""
+    ),
+)
+@click.option(
+    '--diff-against', 'diff_against',
+    type=click.Path(exists=True, dir_okay=False), metavar='<FILE>',
+    help=textwrap.dedent(
+        """Instead of the overview, write a report of what changed since a snapshot saved by `--save-snapshot`
+        to stdout: repositories added and removed, ADMIN teams gained and lost, and descriptions changed.
+        May be the same file as `--save-snapshot`, which is only overwritten after being compared with."""
+    ),
+)
+@click.option(
+    '-a', '--github-auth-token', 'github_auth_tokens',
+    type=str, envvar='GITHUB_USER_TOKEN', multiple=True,
     help=textwrap.dedent(
         """User token (PAT) with which to authenticate against Githubs GraphQL API.
-        Defaults to environment variable "GITHUB_USER_TOKEN" if present."""
+        Multiple tokens (PATs or Github App installation tokens), one per `-a` flag, are used as a pool;
+        each request is sent with the token with the most rate limit points remaining.
+        Defaults to environment variable "GITHUB_USER_TOKEN" (whitespace separated tokens) if present.
+        Required unless reading repositories with `--from-sqlite` or `--from-snapshot`."""
+    ),
+)
+@click.option(
+    '--api-url', 'api_url',
+    type=str, envvar='GITHUB_GRAPHQL_URL', default=GITHUB_GRAPHQL_API_URL, metavar='<URL>', show_default=True,
+    help=textwrap.dedent(
+        """URL of the GraphQL API to query, e.g. of a Github Enterprise Server or a local stand-in for benchmarking.
+        Defaults to environment variable "GITHUB_GRAPHQL_URL" if present."""
+    ),
+)
+@click.option(
+    '-c', '--concurrency', 'concurrency',
+    type=click.IntRange(min=1), default=8, metavar='<N>', show_default=True,
+    help=textwrap.dedent(
+        """Maximum number of requests against Githubs GraphQL API in flight at the same time.
+        All org/team combinations are fetched concurrently, `--concurrency 1` fetches them one request at a time."""
+    ),
+)
+@click.option(
+    '--workers', 'workers',
+    type=click.IntRange(min=1), default=1, metavar='<N>', show_default=True,
+    help=textwrap.dedent(
+        """Number of processes fetching at the same time, each fetching (and filtering) a share of the orgs
+        (or of an org's teams, with fewer orgs than processes) with up to `--concurrency` requests in flight.
+        For enterprises with many orgs, where decoding responses in one process is the bottleneck."""
+    ),
+)
+@click.option(
+    '--max-retries', 'max_retries',
+    type=click.IntRange(min=0), default=5, metavar='<N>', show_default=True,
+    help=textwrap.dedent(
+        """Number of times a failing request against Githubs GraphQL API is retried (with exponential backoff)
+        before giving up."""
+    ),
+)
+@click.option(
+    '-b', '--batch-size', 'batch_size',
+    type=click.IntRange(min=1), default=10, metavar='<N>', show_default=True,
+    help=textwrap.dedent(
+        """Maximum number of org/team combinations packed into each request against Githubs GraphQL API.
+        Capped to stay below Githubs limit on the number of nodes per query."""
+    ),
+)
+@click.option(
+    '--fetch-all-pages', 'fetch_all_pages',
+    is_flag=True, default=False,
+    help=textwrap.dedent(
+        """Flag to fetch every page of each team's repositories. By default repositories are fetched ordered by
+        the team's permission to them (ADMIN first), stopping after the first page holding non-ADMIN ones
+        (once ADMIN ones have been found).
+        For when Github (e.g. an older Github Enterprise Server) can't be relied upon to order them so."""
+    ),
+)
+@click.option(
+    '--cache/--no-cache', 'use_cache',
+    is_flag=True, default=True, show_default=True,
+    help='Flag to (not) cache responses from Githubs GraphQL API on disk, re-using them in later runs.',
+)
+@click.option(
+    '--cache-dir', 'cache_dir',
+    type=click.Path(file_okay=False), default=str(default_cache_dir()), metavar='<DIR>', show_default=True,
+    help='Directory in which to cache responses from Githubs GraphQL API, kept apart per API URL and token(s).',
+)
+@click.option(
+    '--cache-ttl', 'cache_ttl',
+    type=click.IntRange(min=0), default=3600, metavar='<SECONDS>', show_default=True,
+    help='Number of seconds a cached response is re-used for before being fetched again.',
+)
+@click.option(
+    '--cache-max-size', 'cache_max_size',
+    type=click.IntRange(min=0), default=100, metavar='<MB>', show_default=True,
+    help='Size in megabytes the cache is kept below, by removing least recently used responses after each run.',
+)
+@click.option(
+    '--refresh', 'refresh_cache',
+    is_flag=True, default=False,
+    help=textwrap.dedent(
+        """Flag to ignore cached responses, fetching (and caching) everything anew.
+        With `--watch`, for the first refresh only."""
+    ),
+)
+@click.option(
+    '-i', '--incremental', 'incremental',
+    is_flag=True, default=False,
+    help=textwrap.dedent(
+        """Flag to only fetch repositories updated since the last (incremental) run, merging them into
+        the repositories found by the last run (kept in `<cache dir>/sync-state`, per API URL and token(s)).
+        Combine with `--refresh` to fetch everything anew."""
+    ),
+)
+@click.option(
+    '--strategy', 'strategy',
+    type=click.Choice(['per-team', 'org-crawl', 'auto']), default='auto', show_default=True,
+    help=textwrap.dedent(
+        f"""How to find the repositories of <GITHUB TEAMS>.
+        `per-team` fetches each team's repositories separately, `org-crawl` crawls all teams of each org once
+        and answers <GITHUB TEAMS> from those.
+        `auto` uses `org-crawl` for {ORG_CRAWL_TEAM_THRESHOLD} or more teams (unless `--incremental`),
+        else `per-team`."""
+    ),
+)
+@click.option(
+    '--stream', 'stream',
+    is_flag=True, default=False,
+    help=textwrap.dedent(
+        """Flag to filter repositories page by page as they are fetched, sorting them externally (spilling to
+        temporary files) instead of holding every response in memory. For huge orgs/many teams.
+        Only for output to stdout with the `per-team` strategy, and not with `--incremental`."""
+    ),
+)
+@click.option(
+    '--stream-buffer-size', 'stream_buffer_size',
+    type=click.IntRange(min=1), default=STREAM_BUFFER_SIZE, show_default=True, metavar='<N>',
+    help='Maximum number of repositories held in memory by `--stream` before spilling them to disk.',
+)
+@click.option(
+    '--watch', 'watch_interval',
+    type=click.IntRange(min=1), metavar='<SECONDS>',
+    help=textwrap.dedent(
+        """Keep running, refreshing the repositories every <SECONDS> (fetching only repositories updated since
+        the last refresh, as with `--incremental`) and rewriting only files whose content changed.
+        Nothing is written to stdout."""
+    ),
+)
+@click.option(
+    '--serve', 'serve_address',
+    type=str, callback=_parse_serve_address, metavar='<[HOST:]PORT>',
+    help=textwrap.dedent(
+        """With `--watch`, serve the latest overviews as Markdown over HTTP at <HOST> (default 127.0.0.1):
+        `/` for all orgs, `/orgs/<org>` and `/orgs/<org>/teams/<team>`, and the refresh status at `/status`."""
+    ),
+)
+@click.option(
+    '--profile', 'profile',
+    is_flag=True, default=False,
+    help=textwrap.dedent(
+        """Flag to time each phase of the run (query building, HTTP round-trips, JSON decoding, filtering,
+        rendering etc.), printing a summary of the timings and of counters (pages, edges, bytes, retries) to stderr.
+        With `--watch`, the summary is of the last refresh only."""
+    ),
+)
+@click.option(
+    '--profile-output', 'profile_output',
+    type=click.Path(dir_okay=False, writable=True), metavar='<FILE>',
+    help=textwrap.dedent(
+        """File to write the timings of `--profile` to, as a Chrome trace (JSON)
+        viewable in chrome://tracing or https://ui.perfetto.dev. Implies `--profile`."""
     ),
 )
 @click.option(
@@ -103,7 +329,7 @@ DEFAULT_TEAM_NAMES=(
     ),
 )
 # @click.pass_context
-def cli(
+def overview(
     # 'ctx' is required for click CliRunner integration tests
     #   when checking exit_code, and for when to exit program early.
     # ctx,
@@ -112,10 +338,69 @@ def cli(
     make_org_folders: bool,
     make_team_files: bool,
     tee_output: bool,
-    github_auth_token: str,
+    write_workers: int,
+    exports: tuple[tuple[str, str], ...],
+    from_sqlite: typing.Optional[str],
+    save_snapshot_path: typing.Optional[str],
+    from_snapshot: typing.Optional[str],
+    diff_against: typing.Optional[str],
+    github_auth_tokens: tuple[str, ...],
+    api_url: str,
+    concurrency: int,
+    workers: int,
+    max_retries: int,
+    batch_size: int,
+    fetch_all_pages: bool,
+    use_cache: bool,
+    cache_dir: str,
+    cache_ttl: int,
+    cache_max_size: int,
+    refresh_cache: bool,
+    incremental: bool,
+    strategy: str,
+    stream: bool,
+    stream_buffer_size: int,
+    watch_interval: typing.Optional[int],
+    serve_address: typing.Optional[tuple[str, int]],
+    profile: bool,
+    profile_output: typing.Optional[str],
     verbosity: int,
     silence: int,
 ) -> dict:
+    if not github_auth_tokens and from_sqlite is None and from_snapshot is None:
+        raise click.MissingParameter(param_type='option', param_hint="'-a' / '--github-auth-token'")
+    if from_sqlite and from_snapshot:
+        raise click.BadOptionUsage('from_snapshot', '`--from-snapshot` can not be used with `--from-sqlite`.')
+    if stream and (exports or from_sqlite or save_snapshot_path or from_snapshot or diff_against):
+        raise click.BadOptionUsage(
+            'stream',
+            (
+                '`--stream` can not be used with `--export`, `--from-sqlite`, `--save-snapshot`, `--from-snapshot`'
+                ' or `--diff-against`.'
+            ),
+        )
+    if workers > 1 and stream:
+        raise click.BadOptionUsage('workers', '`--workers` can not be used with `--stream`.')
+    if diff_against and watch_interval is not None:
+        raise click.BadOptionUsage('diff_against', '`--diff-against` can not be used with `--watch`.')
+    if serve_address is not None and watch_interval is None:
+        raise click.BadOptionUsage('serve_address', '`--serve` can only be used with `--watch`.')
+    if watch_interval is not None and (stream or from_sqlite or from_snapshot or strategy == 'org-crawl'):
+        raise click.BadOptionUsage(
+            'watch_interval',
+            (
+                '`--watch` can not be used with `--stream`, `--from-sqlite`, `--from-snapshot`'
+                ' or the `org-crawl` strategy.'
+            ),
+        )
+    if incremental and strategy == 'org-crawl':
+        raise click.BadOptionUsage('strategy', 'The `org-crawl` strategy can not be used with `--incremental`.')
+    if stream and (incremental or strategy == 'org-crawl' or make_org_folders or make_team_files):
+        raise click.BadOptionUsage(
+            'stream',
+            '`--stream` can not be used with `--incremental`, the `org-crawl` strategy or `-O`/`-T`.',
+        )
+
     # Remove duplicates
     organizations = list(set(organizations))
     teams = list(set(teams))
@@ -132,7 +417,7 @@ def cli(
 
     if local_vars['verbosity_level'] >= 2:
         # Remove for security reasons:
-        local_vars['github_auth_token'] = '<REDACTED>'
+        local_vars['github_auth_tokens'] = ['<REDACTED>'] * len(github_auth_tokens)
 
         # Remove so that json.dumps doesn't have a fit
         #  Use dict.pop() instead of del dict[key] here in case ctx is not in use
@@ -145,9 +430,86 @@ def cli(
         # continues to work as expected
         if 'ctx' in locals().keys(): local_vars['ctx'] = ctx
 
-        local_vars['github_auth_token'] = github_auth_token
+        local_vars['github_auth_tokens'] = github_auth_tokens
+
+    # Imported only now, for `--help` and invalid options to be answered without importing what does the work
+    # Imports of module(s) internal to this project/package
+    from rosahelikopter.main import main
+
+    if profile or profile_output:
+        profiler.enable()
+    try:
+        main(**local_vars)
+    finally:
+        if profiler.enabled:
+            click.echo(f"\n{profiler.summary()}", err=True)
+            if profile_output:
+                profiler.write_chrome_trace(profile_output)
+
+
+@click.command(
+    'lookup',
+    options_metavar='<options>',
+    context_settings=dict(
+        help_option_names=['-h', '--help'],
+        max_content_width=120,
+    ),
+    help=textwrap.dedent(
+        """List the teams owning (i.e. being ADMINs of) each of <REPOSITORIES>, given as `<org>/<repo>`,
+        as saved by an earlier run with `--export sqlite <FILE>` or `--save-snapshot <FILE>`.
+        Nothing is fetched from Github. Exits with 1 if any of <REPOSITORIES> is not found."""
+    ),
+)
+@click.option(
+    '--from-sqlite', 'from_sqlite',
+    type=click.Path(exists=True, dir_okay=False), metavar='<FILE>',
+    help='SQLite database written by `--export sqlite <FILE>`, looked up by index (fastest).',
+)
+@click.option(
+    '--from-snapshot', 'from_snapshot',
+    type=click.Path(exists=True, dir_okay=False), metavar='<FILE>',
+    help='Snapshot saved by `--save-snapshot <FILE>`, read through once.',
+)
+@click.argument('name_with_owners', nargs=-1, required=True, metavar='<REPOSITORIES>')
+def lookup(
+    name_with_owners: tuple[str, ...],
+    from_sqlite: typing.Optional[str],
+    from_snapshot: typing.Optional[str],
+) -> None:
+    if (from_sqlite is None) == (from_snapshot is None):
+        raise click.UsageError('Exactly one of `--from-sqlite` or `--from-snapshot` is required.')
+
+    # Imported only now, as for `overview`
+    # Imports of module(s) internal to this project/package
+    from rosahelikopter.main import lookup_repository_owners
+
+    lookup_repository_owners(name_with_owners, from_sqlite=from_sqlite, from_snapshot=from_snapshot)
+
+
+class _DefaultCommandGroup(click.Group):
+    """
+    Group of commands which runs `default_command_name` unless the first argument names another command,
+    so that e.g. `rosahelikopter aura nais` is short for `rosahelikopter overview aura nais`.
+    A first argument named as a command is taken as the command; arguments named so must follow `--`,
+    e.g. `rosahelikopter -- lookup` for `rosahelikopter overview lookup`.
+    """
+
+    def __init__(self, *args: typing.Any, default_command_name: str, **kwargs: typing.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.default_command_name = default_command_name
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or args[0] not in self.commands:
+            args = [self.default_command_name, *args]
+        return super().parse_args(ctx, args)
+
+
+cli = _DefaultCommandGroup(
+    name='rosahelikopter',
+    commands=dict(overview=overview, lookup=lookup),
+    default_command_name='overview',
+)
 
-    main(**local_vars)
 
 if __name__ == '__main__':
     cli()
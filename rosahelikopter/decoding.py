@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Sub-module for decoding JSON fetched from Githubs GraphQL API (and cached pages of it) as fast as available;
+with `orjson` if it is installed, else with the standard library's `json`.
+"""
+
+# Python standard library imports
+import json
+import typing
+
+
+try:
+    # Non-standard library python package imports
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Name of the backend `json_loads()` decodes with, e.g. for telling runs apart when comparing them
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def json_loads(data: typing.Union[bytes, str]) -> typing.Any:
+    """
+    Decode `data`, raising a `ValueError` if it is not valid JSON (as `json.loads()` does).
+    Bytes are decoded as they are, without first being copied into a string.
+    """
+    if orjson is not None:
+        # `orjson.JSONDecodeError` is a `ValueError`
+        return orjson.loads(data)
+    return json.loads(data)
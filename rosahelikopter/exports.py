@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Sub-module for machine-readable output; writing the repositories found (by org/team) as JSON Lines, CSV
+or a SQLite database, next to the Markdown output and from the same fetch.
+The SQLite database can be queried ad hoc, and read back to render Markdown from without fetching anything.
+"""
+
+# Python standard library imports
+import contextlib
+import csv
+import json
+import pathlib
+import sqlite3
+import typing
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    RELEVANT_PERMISSION,
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.files import (
+    open_atomically,
+    replacing,
+)
+from rosahelikopter.profiling import profiler
+
+
+# Columns of the JSON Lines and CSV exports, one row per org/team/repository combination
+EXPORT_FIELDS = (
+    'organization',
+    'team',
+    'permission',
+    'nameWithOwner',
+    'url',
+    'description',
+    'isArchived',
+)
+
+SQLITE_SCHEMA = '''
+    CREATE TABLE repos (
+        id INTEGER PRIMARY KEY,
+        name_with_owner TEXT NOT NULL UNIQUE,
+        url TEXT NOT NULL,
+        description TEXT,
+        is_archived INTEGER NOT NULL
+    );
+    -- Teams by `name` as given on the commandline, which may be a team's name or its slug
+    CREATE TABLE teams (
+        id INTEGER PRIMARY KEY,
+        organization TEXT NOT NULL,
+        name TEXT NOT NULL,
+        UNIQUE (organization, name)
+    );
+    CREATE TABLE team_repo_permissions (
+        team_id INTEGER NOT NULL REFERENCES teams (id),
+        repo_id INTEGER NOT NULL REFERENCES repos (id),
+        permission TEXT NOT NULL,
+        PRIMARY KEY (team_id, repo_id)
+    );
+    -- For looking up the teams of a repository, the primary key covers the other way around
+    CREATE INDEX team_repo_permissions_repo_id ON team_repo_permissions (repo_id);
+'''
+
+# Values bound per statement, below the lowest limit of SQLite builds (`SQLITE_MAX_VARIABLE_NUMBER` before 3.32)
+SQLITE_MAX_VARIABLES = 999
+
+
+def _chunks(values: list[str], chunk_size: int) -> typing.Iterator[list[str]]:
+    for index in range(0, len(values), max(1, chunk_size)):
+        yield values[index:index + max(1, chunk_size)]
+
+
+def _export_rows(repoes_dataset: RepositoryIndex) -> typing.Iterator[dict]:
+    # Sorted, for exports of the same repositories to be identical
+    for org_name, team_name in sorted(repoes_dataset.organization_teams):
+        for repository in sorted(
+            repoes_dataset.team_repositories(team_name, org_name=org_name),
+            key=lambda r: r.nameWithOwner,
+        ):
+            yield dict(
+                organization=org_name,
+                team=team_name,
+                # Only repositories the team has this permission to are kept
+                permission=RELEVANT_PERMISSION,
+                **repository._asdict(),
+            )
+
+
+def write_jsonl(path: pathlib.Path, repoes_dataset: RepositoryIndex) -> None:
+    with profiler.span('export jsonl'), open_atomically(path) as output:
+        output.writelines(
+            json.dumps(row, ensure_ascii=False) + '\n'
+            for row in _export_rows(repoes_dataset)
+        )
+
+
+def write_csv(path: pathlib.Path, repoes_dataset: RepositoryIndex) -> None:
+    with profiler.span('export csv'), open_atomically(path, newline='') as output:
+        writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(_export_rows(repoes_dataset))
+
+
+def write_sqlite(path: pathlib.Path, repoes_dataset: RepositoryIndex) -> None:
+    """
+    Write the repositories to a new SQLite database at `path` (replacing any database there),
+    with the tables `repos`, `teams` and `team_repo_permissions` of `SQLITE_SCHEMA`.
+    """
+    with profiler.span('export sqlite'), replacing(path) as written_path, contextlib.closing(
+        sqlite3.connect(written_path)
+    ) as connection:
+        with connection:
+            connection.executescript(SQLITE_SCHEMA)
+            repo_ids = dict()
+            for repo_id, name_with_owner in enumerate(sorted(repoes_dataset.repositories), start=1):
+                repository = repoes_dataset.repositories[name_with_owner]
+                repo_ids[name_with_owner] = repo_id
+                connection.execute(
+                    'INSERT INTO repos VALUES (?, ?, ?, ?, ?)',
+                    (repo_id, *repository),
+                )
+            for team_id, (org_name, team_name) in enumerate(sorted(repoes_dataset.organization_teams), start=1):
+                connection.execute('INSERT INTO teams VALUES (?, ?, ?)', (team_id, org_name, team_name))
+                connection.executemany(
+                    'INSERT INTO team_repo_permissions VALUES (?, ?, ?)',
+                    (
+                        (team_id, repo_ids[name_with_owner], RELEVANT_PERMISSION)
+                        for name_with_owner in sorted(repoes_dataset.organization_teams[(org_name, team_name)])
+                    ),
+                )
+
+
+def read_sqlite(
+    path: pathlib.Path,
+    organizations: typing.Iterable[str],
+    teams: typing.Iterable[str],
+) -> RepositoryIndex:
+    """
+    Read the repositories of `teams` in `organizations` back from a database written by `write_sqlite`.
+    Teams are queried a chunk at a time, to stay below SQLite's limit on the number of values bound per statement.
+    """
+    organizations, teams = list(organizations), list(teams)
+    repoes_dataset = RepositoryIndex()
+    # Opened read-only, a missing database is an error rather than a new empty one
+    with profiler.span('read sqlite'), contextlib.closing(
+        sqlite3.connect(f"{pathlib.Path(path).absolute().as_uri()}?mode=ro", uri=True)
+    ) as connection:
+        for teams_chunk in _chunks(teams, SQLITE_MAX_VARIABLES - len(organizations) - 1):
+            rows = connection.execute(
+                f'''
+                SELECT teams.organization, teams.name, repos.name_with_owner, repos.url, repos.description,
+                    repos.is_archived
+                FROM team_repo_permissions
+                JOIN teams ON teams.id = team_repo_permissions.team_id
+                JOIN repos ON repos.id = team_repo_permissions.repo_id
+                WHERE teams.organization IN ({', '.join('?' * len(organizations))})
+                AND teams.name IN ({', '.join('?' * len(teams_chunk))})
+                AND team_repo_permissions.permission = ?
+                ORDER BY teams.organization, teams.name, repos.name_with_owner
+                ''',
+                (*organizations, *teams_chunk, RELEVANT_PERMISSION),
+            )
+            for org_name, team_name, name_with_owner, url, description, is_archived in rows:
+                repoes_dataset.add(
+                    org_name,
+                    team_name,
+                    Repository(name_with_owner, url, description, bool(is_archived)),
+                )
+    return repoes_dataset
+
+
+def read_sqlite_repository_owners(
+    path: pathlib.Path,
+    name_with_owners: typing.Iterable[str],
+) -> dict[str, list[tuple[str, str, str]]]:
+    """
+    Look up the (org_name, team_name, permission) of the teams owning each of `name_with_owners`
+    in a database written by `write_sqlite`. Repositories not in the database are left out.
+    """
+    name_with_owners = list(dict.fromkeys(name_with_owners))
+    repository_owners = dict()
+    # Answered by the indexes on `repos.name_with_owner` and `team_repo_permissions.repo_id`, not by scanning.
+    #   A chunk of repositories at a time, to stay below SQLite's limit on the number of values bound per statement
+    with profiler.span('read sqlite'), contextlib.closing(
+        sqlite3.connect(f"{pathlib.Path(path).absolute().as_uri()}?mode=ro", uri=True)
+    ) as connection:
+        for name_with_owners_chunk in _chunks(name_with_owners, SQLITE_MAX_VARIABLES):
+            rows = connection.execute(
+                f'''
+                SELECT repos.name_with_owner, teams.organization, teams.name, team_repo_permissions.permission
+                FROM repos
+                JOIN team_repo_permissions ON team_repo_permissions.repo_id = repos.id
+                JOIN teams ON teams.id = team_repo_permissions.team_id
+                WHERE repos.name_with_owner IN ({', '.join('?' * len(name_with_owners_chunk))})
+                ORDER BY repos.name_with_owner, teams.organization, teams.name
+                ''',
+                name_with_owners_chunk,
+            )
+            for name_with_owner, org_name, team_name, permission in rows:
+                repository_owners.setdefault(name_with_owner, list()).append((org_name, team_name, permission))
+    return repository_owners
+
+
+EXPORT_WRITERS: dict[str, typing.Callable[[pathlib.Path, RepositoryIndex], None]] = dict(
+    jsonl=write_jsonl,
+    csv=write_csv,
+    sqlite=write_sqlite,
+)
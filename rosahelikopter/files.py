@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Sub-module for writing files atomically; everything is written to a temporary file next to the file first,
+which then replaces it, so that readers (and interrupted runs) never see half a file.
+"""
+
+# Python standard library imports
+import contextlib
+import os
+import pathlib
+import threading
+import typing
+
+
+def temporary_path(path: pathlib.Path) -> pathlib.Path:
+    # Next to `path`, so that replacing it is atomic, and unique to the writing process and thread
+    path = pathlib.Path(path)
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+@contextlib.contextmanager
+def replacing(path: pathlib.Path) -> typing.Iterator[pathlib.Path]:
+    """
+    Yields a temporary path to write to in place of `path`, which replaces `path` once the block completes.
+    The temporary file is removed if the block fails.
+    """
+    written_path = temporary_path(path)
+    written_path.unlink(missing_ok=True)
+    try:
+        yield written_path
+        os.replace(written_path, path)
+    finally:
+        written_path.unlink(missing_ok=True)
+
+
+@contextlib.contextmanager
+def open_atomically(
+    path: pathlib.Path,
+    mode: str = 'w',
+    opener: typing.Callable[..., typing.IO] = open,
+    **open_kwargs: typing.Any,
+) -> typing.Iterator[typing.IO]:
+    """
+    Opens a file to be streamed to in place of `path` with `opener(temporary path, mode, **open_kwargs)`
+    (e.g. `gzip.open`), replacing `path` once the block completes.
+    """
+    with replacing(path) as written_path, opener(written_path, mode, **open_kwargs) as output:
+        yield output
+
+
+def write_atomically(path: pathlib.Path, content: str) -> None:
+    with open_atomically(path) as output:
+        output.write(content)
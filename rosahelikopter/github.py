@@ -3,95 +3,1155 @@
 # vim: shiftwidth=4 softtabstop=4 tabstop=4 expandtab
 
 # Python standard library imports
+import asyncio
+import contextlib
+import datetime
+import email.utils
+import functools
+import hashlib
+import itertools
 import json
-import sys
+import random
+import textwrap
+import time
 import typing
 
 # Non-standard library python package imports
-import click
+import aiohttp
 import gql
-from gql.transport import Transport
+from gql.client import AsyncClientSession
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.async_transport import AsyncTransport
+from gql.transport.exceptions import (
+    TransportClosed,
+    TransportProtocolError,
+    TransportQueryError,
+    TransportServerError,
+)
+import graphql
 
 # Imports of module(s) internal to this project/package
-from rosahelikopter.string_templates import GRAPHQL_GITHUB_REPOS_QUERY_STRING
+from rosahelikopter import (
+    GITHUB_GRAPHQL_API_URL,
+    RELEVANT_PERMISSION,
+)
+from rosahelikopter.cache import ResponseCache
+from rosahelikopter.decoding import json_loads
+from rosahelikopter.incremental import (
+    INCREMENTAL_REPOSITORIES_ORDER_FIELD,
+    SyncState,
+    merge_repository_edges,
+    newest_updated_at,
+    reached_repositories_updated_before,
+)
+from rosahelikopter.profiling import profiler
+from rosahelikopter.string_templates import (
+    GRAPHQL_GITHUB_BATCHED_ORGANIZATION_QUERY_STRING,
+    GRAPHQL_GITHUB_BATCHED_REPOS_QUERY_STRING,
+    GRAPHQL_GITHUB_BATCHED_TEAM_BY_SLUG_QUERY_STRING,
+    GRAPHQL_GITHUB_ORGANIZATION_TEAM_SLUGS_QUERY_STRING,
+    GRAPHQL_GITHUB_ORGANIZATION_TEAMS_QUERY_STRING,
+    GRAPHQL_GITHUB_TEAM_REPOSITORIES_CONNECTION_STRING,
+)
+from rosahelikopter.team_index import (
+    TeamIndexCache,
+    make_team_index,
+)
 
 
-def graphql_fetch_access_permission_for_repoes_for_team_in_org(
-    org_name: str,
-    team_name: str,
-    gql_transport: Transport,
-) -> typing.Generator[dict, None, None]:
-    client = gql.Client(transport=gql_transport)
-    continue_pagination_token = ''
-    while True:
-        # Build graphql query string
-        query_string = _graphql_get_repository_access_permissions_for_team_in_org(
-            org_name=org_name,
-            team_name=team_name,
-            repositories_continuation_token=continue_pagination_token,
+# Max repos github lets ut fetch per query
+GITHUB_GRAPHQL_PAGE_SIZE = 100
+# Github refuses queries which could return more nodes than this in total, see:
+#   https://docs.github.com/en/graphql/overview/resource-limitations#node-limit
+GITHUB_GRAPHQL_MAX_NODES_PER_QUERY = 500_000
+
+# Namespace for cached pages, so that changes to the fetched fields invalidate pages cached before the change
+RESPONSE_CACHE_NAMESPACE = hashlib.sha256(GRAPHQL_GITHUB_TEAM_REPOSITORIES_CONNECTION_STRING.encode()).hexdigest()
+
+# A pagination chain's next step: (org_name, team_name, continuation_token)
+_PAGINATION_UNIT = tuple[str, str, str]
+# A fetched page of a pagination chain:
+#   (org_name, team_name, repository edges, continuation token or `None` if done, total count of repositories)
+_REPOSITORY_PAGE = tuple[str, str, list[dict], typing.Optional[str], int]
+# Called with (org_name, team_name, repository edges) for every page fetched, see `rosahelikopter.pipeline`
+_PAGE_CONSUMER = typing.Callable[[str, str, list[dict]], typing.Awaitable[None]]
+
+
+class GithubHTTPError(TransportServerError):
+    """
+    Response with an HTTP error status and no GraphQL result, e.g. for bad credentials or secondary rate limits,
+    keeping its status, (lower-cased) headers and body to tell whether and when to retry the request.
+    """
+
+    def __init__(
+        self,
+        status: int,
+        headers: typing.Mapping[str, str],
+        body: str,
+    ) -> None:
+        super().__init__(f"{status}: {body}")
+        self.status = status
+        self.headers = {name.lower(): value for name, value in headers.items()}
+        self.body = body
+
+    @property
+    def is_rate_limited(self) -> bool:
+        # Github answers both primary and secondary rate limits with 403 (or 429), telling them apart by the body
+        return self.status == 429 or (
+            self.status == 403 and (
+                self.headers.get('x-ratelimit-remaining') == '0' or
+                'rate limit' in self.body.lower() or
+                'abuse' in self.body.lower()
+            )
         )
 
-        # Execute query
-        query = gql.gql(query_string)
-        graphql_response = client.execute(query)
-
-        # click.echo(json.dumps(graphql_response, indent=2), err=True)
-        # Handle errors
-        if graphql_response.get('errors', False):
-            click.echo(f"Failed GraphQL query with params:", err=True)
-            click.echo(
-                (
-                    f"\torg_name='{org_name}', team_name='{team_name}'"
-                    f", continuation_token='{continue_pagination_token}'"
-                ),
-                err=True
+    def retry_after(self) -> typing.Optional[float]:
+        """
+        Returns number of seconds Github asks to wait before retrying, if it does.
+        """
+        retry_after = self.headers.get('retry-after')
+        if retry_after is not None:
+            if retry_after.strip().isdigit():
+                return float(retry_after)
+            try:
+                return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+        reset_at = self.headers.get('x-ratelimit-reset')
+        if self.headers.get('x-ratelimit-remaining') == '0' and reset_at is not None and reset_at.isdigit():
+            return max(0.0, int(reset_at) - time.time())
+        return None
+
+
+class GithubGraphQLTransport(AIOHTTPTransport):
+    """
+    Transport against Githubs GraphQL API for one (long-lived) session per run;
+    keeping up to `max_connections` connections alive between requests, and asking for compressed responses.
+    """
+
+    def __init__(
+        self,
+        github_auth_token: str,
+        max_connections: int = 1,
+        keepalive_timeout: float = 60.0,
+        trace_configs: typing.Iterable[aiohttp.TraceConfig] = tuple(),
+        url: str = GITHUB_GRAPHQL_API_URL,
+        **kwargs: typing.Any,
+    ) -> None:
+        super().__init__(
+            url=url,
+            headers={
+                'Authorization': f"bearer {github_auth_token}",
+                'Accept-Encoding': 'gzip, deflate',
+            },
+            client_session_args=dict(trace_configs=list(trace_configs)),
+            **kwargs,
+        )
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+
+    async def connect(self) -> None:
+        # Connector made here, as it must belong to the running event loop
+        self.client_session_args['connector'] = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        await super().connect()
+
+    async def execute(
+        self,
+        document: graphql.DocumentNode,
+        variable_values: typing.Optional[dict] = None,
+        operation_name: typing.Optional[str] = None,
+        extra_args: typing.Optional[dict] = None,
+        upload_files: bool = False,
+    ) -> graphql.ExecutionResult:
+        """
+        As `AIOHTTPTransport.execute()`, but reading the response and decoding it as separate steps (and spans),
+        and raising `GithubHTTPError` for responses with an HTTP error status and no GraphQL result.
+        """
+        if upload_files:
+            return await super().execute(document, variable_values, operation_name, extra_args, upload_files)
+        if self.session is None:
+            raise TransportClosed('Transport is not connected')
+
+        payload = dict(query=graphql.print_ast(document))
+        if operation_name:
+            payload['operationName'] = operation_name
+        if variable_values:
+            payload['variables'] = variable_values
+
+        with profiler.span('http round-trip'):
+            async with self.session.post(self.url, ssl=self.ssl, json=payload, **(extra_args or dict())) as response:
+                response_body = await response.read()
+        profiler.count('requests')
+        profiler.count('response bytes', len(response_body))
+
+        with profiler.span('json decode'):
+            try:
+                result = json_loads(response_body)
+            except ValueError:
+                result = None
+
+        if not isinstance(result, dict) or ('errors' not in result and 'data' not in result):
+            if response.status >= 400:
+                raise GithubHTTPError(response.status, response.headers, response_body.decode(errors='replace'))
+            raise TransportProtocolError(
+                'Server did not return a GraphQL result: No "data" or "error" keys in answer: '
+                f"{response_body.decode(errors='replace')}"
             )
-            click.echo(json.dumps(graphql_response, indent=2), err=True)
+        return graphql.ExecutionResult(errors=result.get('errors'), data=result.get('data'))
+
+
+class TokenBudget:
+    """
+    Rate limit status of one token (a PAT or a Github App installation token) as of its last response,
+    along with the points spent and requests made with it. A `token` of `None` stands for the transport's own.
+    """
+
+    def __init__(self, token: typing.Optional[str] = None) -> None:
+        self.token = token
+        self.points_spent = 0
+        self.num_requests = 0
+        self.num_requests_in_flight = 0
+
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.last_cost = 1
+
+    @property
+    def name(self) -> str:
+        # Enough of the token to tell tokens apart in output, without giving any of them away
+        return f"...{self.token[-4:]}" if self.token else 'token'
+
+    @contextlib.contextmanager
+    def request_in_flight(self) -> typing.Iterator[None]:
+        self.num_requests_in_flight += 1
         try:
-            graphql_response = graphql_response['organization']['teams']['edges'][0]['node']['repositories']
-        except IndexError:
-            # Due to no results for given team/org combination
-            yield tuple()
-            break
+            yield
+        finally:
+            self.num_requests_in_flight -= 1
+
+    def update(self, rate_limit: typing.Optional[dict]) -> None:
+        self.num_requests += 1
+        if not rate_limit:
+            return
+        self.points_spent += rate_limit['cost']
+        self.last_cost = max(1, rate_limit['cost'])
+        self.limit = rate_limit['limit']
+        self.remaining = rate_limit['remaining']
+        self.reset_at = datetime.datetime.strptime(
+            rate_limit['resetAt'],
+            '%Y-%m-%dT%H:%M:%SZ',
+        ).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+    def headroom(self) -> float:
+        if self.remaining is None or self.reset_at <= time.time():
+            # Nothing known about the rate limit yet, or it has since been reset
+            return float('inf')
+        # Requests in flight will (most likely) cost as much as the last one did
+        return self.remaining - self.num_requests_in_flight * self.last_cost
+
+    def delay(
+        self,
+        concurrency: int,
+        pacing_threshold: float,
+    ) -> float:
+        if self.headroom() == float('inf'):
+            return 0.0
+
+        seconds_until_reset = max(0.0, self.reset_at - time.time())
+        if self.remaining < self.last_cost * concurrency:
+            # Not enough points left for the requests (possibly) in flight, parked until reset
+            return seconds_until_reset
+        if self.remaining < self.limit * pacing_threshold:
+            return seconds_until_reset / (self.remaining / self.last_cost)
+        return 0.0
+
+
+class RequestScheduler:
+    """
+    Executes queries against Githubs GraphQL API, with at most `concurrency` requests in flight.
+
+    The rate limit status (`rateLimit { cost limit remaining resetAt }`) of each response is tracked,
+    and once less than `pacing_threshold` of the rate limit remains, the remaining points are spread evenly
+    over the time left until the rate limit resets; waiting for the reset when (almost) nothing remains.
+    With several `github_auth_tokens`, each request is sent with the token with the most points remaining,
+    tokens with (almost) nothing remaining are left until reset, and waiting only happens when all of them are.
+    Failed requests (server errors, secondary rate limits, timeouts etc.) are retried up to `max_retries` times
+    with jittered exponential backoff, or after as long as Github asks with `Retry-After`/`x-ratelimit-reset`,
+    so that a pagination chain continues from its last good cursor.
+    Requests failing for reasons retrying won't change (e.g. bad credentials) are not retried.
+    Responses where only `NOT_FOUND` errors were returned (e.g. for an org the token can't see) are answered
+    with what was found, the missing parts being `null`, and their error messages are kept in `not_found`.
+
+    Totals of points spent, seconds waited and retries made are kept in `points_spent`, `seconds_waited`
+    and `num_retries`, and per token in `token_budgets`.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+        pacing_threshold: float = 0.1,
+        github_auth_tokens: typing.Iterable[str] = tuple(),
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pacing_threshold = pacing_threshold
+
+        self.seconds_waited = 0.0
+        self.num_retries = 0
+        # Error messages of orgs/teams not found, each once
+        self.not_found: dict[str, None] = dict()
+
+        # Without tokens of its own, requests are sent with the token of the transport
+        self.token_budgets = [TokenBudget(token) for token in github_auth_tokens] or [TokenBudget()]
+        # Made on first use, as it must belong to the running event loop
+        self._semaphore = None
+
+    @property
+    def points_spent(self) -> int:
+        return sum(token_budget.points_spent for token_budget in self.token_budgets)
+
+    async def execute(
+        self,
+        gql_session: AsyncClientSession,
+        query_string: str,
+        variable_values: typing.Optional[dict] = None,
+    ) -> dict:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        query = graphql_parse_query(query_string)
+        for attempt in itertools.count():
+            token_budget = await self._token_budget()
+            execute_kwargs = dict(variable_values=variable_values)
+            if token_budget.token is not None:
+                execute_kwargs['extra_args'] = dict(headers={'Authorization': f"bearer {token_budget.token}"})
+            try:
+                with token_budget.request_in_flight():
+                    async with self._semaphore:
+                        graphql_response = await gql_session.execute(query, **execute_kwargs)
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                TransportProtocolError,
+                TransportQueryError,
+                TransportServerError,
+            ) as error:
+                if not graphql_errors_are_not_found(error):
+                    retry_delay = self._retry_delay(attempt, error, token_budget)
+                    if retry_delay is None or attempt >= self.max_retries:
+                        raise
+                    self.num_retries += 1
+                    profiler.count('retries')
+                    await self._wait(retry_delay)
+                    continue
+                # Orgs/teams not found are `null` in what was returned, as having no teams/repositories
+                self.not_found.update(dict.fromkeys(query_error.get('message') for query_error in error.errors))
+                graphql_response = error.data
+
+            token_budget.update(graphql_response.get('rateLimit'))
+            return graphql_response
+
+    async def _token_budget(self) -> TokenBudget:
+        """
+        Returns the token with the most points remaining (the fewest requests in flight, when that's unknown),
+        after waiting out its pacing delay (if any).
+        """
+        token_budget = min(
+            self.token_budgets,
+            key=lambda token_budget: (
+                token_budget.delay(self.concurrency, self.pacing_threshold),
+                -token_budget.headroom(),
+                token_budget.num_requests_in_flight,
+            ),
+        )
+        await self._wait(token_budget.delay(self.concurrency, self.pacing_threshold))
+        return token_budget
+
+    def _retry_delay(
+        self,
+        attempt: int,
+        error: Exception,
+        token_budget: TokenBudget,
+    ) -> typing.Optional[float]:
+        """
+        Returns number of seconds to wait before retrying a request failing with `error`,
+        or `None` if the request should not be retried.
+        """
+        backoff_delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if isinstance(error, TransportQueryError):
+            if not any(
+                query_error.get('type') == 'RATE_LIMITED'
+                for query_error in error.errors or list()
+            ):
+                # Errors in the query itself won't go away by retrying
+                return None
+            if token_budget.reset_at is not None:
+                if len(self.token_budgets) > 1:
+                    # Park the token until reset, the retry goes to the token with the most points remaining
+                    token_budget.remaining = 0
+                    return backoff_delay
+                return max(backoff_delay, token_budget.reset_at - time.time())
+        if isinstance(error, GithubHTTPError):
+            if not error.is_rate_limited and 400 <= error.status < 500 and error.status != 408:
+                # E.g. bad credentials (401) or missing permissions (403) won't go away by retrying
+                return None
+            retry_after = error.retry_after()
+            if error.headers.get('x-ratelimit-remaining') == '0' and retry_after is not None:
+                token_budget.remaining, token_budget.reset_at = 0, time.time() + retry_after
+                if len(self.token_budgets) > 1:
+                    # Park the token until reset, the retry goes to the token with the most points remaining
+                    return backoff_delay
+            if retry_after is not None:
+                return max(backoff_delay, retry_after)
+            if error.is_rate_limited:
+                # Github asks for (at least) a minute's wait before retrying after hitting secondary rate limits
+                return 60.0 + backoff_delay
+        return backoff_delay
+
+    async def _wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        self.seconds_waited += seconds
+        await asyncio.sleep(seconds)
+
+
+def graphql_errors_are_not_found(error: Exception) -> bool:
+    """
+    Whether `error` is a response holding only `NOT_FOUND` errors, as Github answers e.g. for an unknown org
+    (or one the token can't see) or team, along with the rest of the response.
+    """
+    return (
+        isinstance(error, TransportQueryError) and
+        isinstance(error.data, dict) and
+        bool(error.errors) and
+        all(
+            isinstance(query_error, dict) and query_error.get('type') == 'NOT_FOUND'
+            for query_error in error.errors
+        )
+    )
+
+
+async def graphql_fetch_access_permission_for_repoes_for_teams_in_orgs(
+    org_team_pairs: typing.Iterable[tuple[str, str]],
+    gql_transport: AsyncTransport,
+    request_scheduler: RequestScheduler,
+    batch_size: int = 1,
+    response_cache: typing.Optional[ResponseCache] = None,
+    sync_state: typing.Optional[SyncState] = None,
+    relevant_permission_only: bool = False,
+    page_consumer: typing.Optional[_PAGE_CONSUMER] = None,
+    team_index_cache: typing.Optional[TeamIndexCache] = None,
+) -> dict[tuple[str, str], list[dict]]:
+    """
+    Run the pagination chains of all given (org, team) pairs at the same time over one session,
+    with requests executed (and retried) by `request_scheduler`.
+    Team names are first resolved to exact team slugs (see `graphql_resolve_team_slugs()`),
+    teams not found having no repositories; each chain then fetches its team's repositories by slug.
+    Up to `batch_size` chains are packed into each request (using aliases), and chains still having pages left
+    after a round of requests are packed together again in the next round.
+    Pages found in `response_cache` are not fetched again, and fetched pages are stored in it.
+
+    With `relevant_permission_only`, repositories are fetched ordered by the team's permission to them and each
+    chain stops after the first page holding repositories the team doesn't have `RELEVANT_PERMISSION` to
+    (unless the page shows Github not ordering them so, see `reached_repositories_without_permission()`).
+    Ignored together with `sync_state`, which needs every repository to tell whether the merged result is complete.
+
+    With `sync_state`, repositories are fetched newest first and each chain stops when reaching repositories
+    not updated since the last run, merging the fetched ones into the last run's repositories.
+    Chains whose merged repositories don't add up to Githubs total count (e.g. due to removed repositories)
+    are fetched in full.
+
+    With `page_consumer`, every page fetched is handed to `await page_consumer(org_name, team_name, edges)`
+    (once per team name of the team) as soon as its request completes instead of being kept,
+    see `rosahelikopter.pipeline`.
+    Not supported together with `sync_state`, which needs every repository to merge and save them.
+
+    Returns the repository edges of each pair (empty with `page_consumer`).
+    """
+    if sync_state is not None and page_consumer is not None:
+        raise ValueError('Fetching incrementally (`sync_state`) needs every repository, not a `page_consumer`.')
+    batch_size = max(1, min(batch_size, graphql_max_batch_size()))
+    org_team_pairs = list(org_team_pairs)
+
+    async with gql.Client(transport=gql_transport) as gql_session:
+        team_slugs = await graphql_resolve_team_slugs(
+            org_team_pairs,
+            gql_session=gql_session,
+            request_scheduler=request_scheduler,
+            team_index_cache=team_index_cache,
+        )
+        # One chain per (org, team slug), as several team names (e.g. a team's name and slug) may be of one team
+        org_slug_pairs = sorted({
+            (org_name, team_slug)
+            for (org_name, _), team_slug in team_slugs.items()
+            if team_slug is not None
+        })
+
+        def by_team_name(edges_by_team_slug: dict[tuple[str, str], list[dict]]) -> dict[tuple[str, str], list[dict]]:
+            return {
+                (org_name, team_name): list(edges_by_team_slug.get((org_name, team_slug), ()))
+                for (org_name, team_name), team_slug in team_slugs.items()
+            }
+
+        team_names_per_slug = dict()
+        for (org_name, team_name), team_slug in team_slugs.items():
+            team_names_per_slug.setdefault((org_name, team_slug), list()).append(team_name)
+
+        async def consume_page_by_team_name(org_name: str, team_slug: str, edges: list[dict]) -> None:
+            for team_name in team_names_per_slug[(org_name, team_slug)]:
+                await page_consumer(org_name, team_name, edges)
+
+        fetch_pagination_chains = functools.partial(
+            _graphql_fetch_pagination_chains,
+            gql_session=gql_session,
+            request_scheduler=request_scheduler,
+            batch_size=batch_size,
+            response_cache=response_cache,
+            page_consumer=consume_page_by_team_name if page_consumer is not None else None,
+        )
+        if sync_state is None and relevant_permission_only:
+            repository_edges, _ = await fetch_pagination_chains(
+                _graphql_first_pagination_units(org_slug_pairs),
+                repositories_order_field='PERMISSION',
+                stop_pagination=_stop_at_repositories_without_permission(RELEVANT_PERMISSION),
+            )
+            return by_team_name(repository_edges)
+        if sync_state is None:
+            repository_edges, _ = await fetch_pagination_chains(_graphql_first_pagination_units(org_slug_pairs))
+            return by_team_name(repository_edges)
+
+        last_synced_edges = {
+            (org_name, team_name): sync_state.load(org_name, team_name)
+            for org_name, team_name in org_team_pairs
+        }
+        last_updated_at = {
+            (org_name, team_slugs[(org_name, team_name)]): newest_updated_at(edges)
+            for (org_name, team_name), edges in last_synced_edges.items()
+            if edges
+        }
+        repository_edges, total_counts = await fetch_pagination_chains(
+            _graphql_first_pagination_units(org_slug_pairs),
+            repositories_order_field=INCREMENTAL_REPOSITORIES_ORDER_FIELD,
+            stop_pagination=lambda org_slug_pair, edges: (
+                org_slug_pair in last_updated_at and
+                reached_repositories_updated_before(edges, last_updated_at[org_slug_pair])
+            ),
+        )
+        repository_edges = by_team_name(repository_edges)
+        out_of_sync_pairs = set()
+        for (org_name, team_name), edges in last_synced_edges.items():
+            if team_slugs[(org_name, team_name)] is None:
+                # No such team (any longer), nor any repositories of it
+                continue
+            if edges is not None:
+                repository_edges[(org_name, team_name)] = merge_repository_edges(
+                    edges,
+                    repository_edges[(org_name, team_name)],
+                )
+            total_count = total_counts.get((org_name, team_slugs[(org_name, team_name)]), 0)
+            if len(repository_edges[(org_name, team_name)]) != total_count:
+                out_of_sync_pairs.add((org_name, team_name))
+
+        out_of_sync_slug_pairs = sorted({
+            (org_name, team_slugs[(org_name, team_name)])
+            for org_name, team_name in out_of_sync_pairs
+        })
+        if out_of_sync_slug_pairs:
+            refetched_repository_edges, _ = await fetch_pagination_chains(
+                _graphql_first_pagination_units(out_of_sync_slug_pairs),
+                repositories_order_field=INCREMENTAL_REPOSITORIES_ORDER_FIELD,
+            )
+            for org_team_pair, edges in by_team_name(refetched_repository_edges).items():
+                if org_team_pair in out_of_sync_pairs:
+                    repository_edges[org_team_pair] = edges
+
+    for (org_name, team_name), edges in repository_edges.items():
+        sync_state.save(org_name, team_name, edges)
+    return repository_edges
+
+
+async def graphql_fetch_access_permission_for_repoes_for_teams_in_orgs_by_org_crawl(
+    org_team_pairs: typing.Iterable[tuple[str, str]],
+    gql_transport: AsyncTransport,
+    request_scheduler: RequestScheduler,
+    batch_size: int = 1,
+    response_cache: typing.Optional[ResponseCache] = None,
+    relevant_permission_only: bool = False,
+) -> dict[tuple[str, str], list[dict]]:
+    """
+    Alternative to `graphql_fetch_access_permission_for_repoes_for_teams_in_orgs()` for when many teams are wanted;
+    crawls all teams of each org once (along with the first page of each team's repositories),
+    indexing them by slug and by name.
+    The wanted teams are then looked up in the index, and only their remaining pages are fetched (by team slug).
+    """
+    batch_size = max(1, min(batch_size, graphql_max_batch_size()))
+    org_team_pairs = list(org_team_pairs)
+    repositories_order_field = 'PERMISSION' if relevant_permission_only else None
+
+    stop_pagination = None
+    if relevant_permission_only:
+        stop_pagination = _stop_at_repositories_without_permission(RELEVANT_PERMISSION)
+
+    async with gql.Client(transport=gql_transport) as gql_session:
+        organization_names = sorted({org_name for org_name, _ in org_team_pairs})
+        team_indexes = dict(
+            zip(
+                organization_names,
+                await asyncio.gather(
+                    *(
+                        _graphql_fetch_organization_team_index(
+                            org_name=org_name,
+                            gql_session=gql_session,
+                            request_scheduler=request_scheduler,
+                            response_cache=response_cache,
+                            repositories_order_field=repositories_order_field,
+                        )
+                        for org_name in organization_names
+                    )
+                ),
+            )
+        )
+
+        # Answer wanted teams from the index, noting which of them need more pages.
+        #   Several team names (e.g. a team's name and slug) may be of one team, whose pages are fetched once
+        repository_edges, team_names_per_slug, pagination_units = dict(), dict(), list()
+        for org_name, team_name in org_team_pairs:
+            team = team_indexes[org_name].get(team_name.lower())
+            _, _, edges, continuation_token, _ = _graphql_repository_page(
+                org_name,
+                team_name,
+                team['repositories'] if team is not None else None,
+            )
+            repository_edges[(org_name, team_name)] = list(edges)
+            if continuation_token and (
+                stop_pagination is None or not stop_pagination((org_name, team['slug']), edges)
+            ):
+                if (org_name, team['slug']) not in team_names_per_slug:
+                    pagination_units.append((org_name, team['slug'], continuation_token))
+                team_names_per_slug.setdefault((org_name, team['slug']), list()).append(team_name)
+
+        remaining_repository_edges, _ = await _graphql_fetch_pagination_chains(
+            pagination_units,
+            gql_session=gql_session,
+            request_scheduler=request_scheduler,
+            batch_size=batch_size,
+            response_cache=response_cache,
+            repositories_order_field=repositories_order_field,
+            stop_pagination=stop_pagination,
+        )
+
+    for (org_name, team_slug), edges in remaining_repository_edges.items():
+        for team_name in team_names_per_slug[(org_name, team_slug)]:
+            repository_edges[(org_name, team_name)] += edges
+    return repository_edges
 
-        # if org_name == 'navikt' and team_name == 'pig-sikkerhet':
-        #     click.echo(json.dumps(graphql_response, indent=2), err=True)
-        # Return
-        yield from graphql_response['edges']
 
-        if graphql_response['pageInfo']['hasNextPage'] is False:
-            # No more results to yield, finish while-loop and session
+async def graphql_resolve_team_slugs(
+    org_team_pairs: typing.Iterable[tuple[str, str]],
+    gql_session: AsyncClientSession,
+    request_scheduler: RequestScheduler,
+    team_index_cache: typing.Optional[TeamIndexCache] = None,
+) -> dict[tuple[str, str], typing.Optional[str]]:
+    """
+    Resolve the team names of the given (org, team) pairs to exact team slugs, matching (case-insensitively)
+    either a team's slug or its name, by paging through the teams of each org once.
+    Each org's teams are taken from `team_index_cache` when there, and fetched anew (once) when a team name
+    is missing from them, e.g. for a team made since they were cached.
+    Returns the slug of each pair, `None` for teams not found.
+    """
+    org_team_pairs = list(org_team_pairs)
+    team_names_per_org = dict()
+    for org_name, team_name in org_team_pairs:
+        team_names_per_org.setdefault(org_name, set()).add(team_name.lower())
+
+    async def resolve_organization_teams(org_name: str) -> dict[str, dict]:
+        teams = team_index_cache.load(org_name) if team_index_cache is not None else None
+        if teams is not None:
+            team_index = make_team_index(teams)
+            if team_names_per_org[org_name] <= team_index.keys():
+                return team_index
+        teams = await _graphql_fetch_organization_teams(org_name, gql_session, request_scheduler)
+        if team_index_cache is not None:
+            team_index_cache.save(org_name, teams)
+        return make_team_index(teams)
+
+    with profiler.span('resolve teams'):
+        organization_names = sorted(team_names_per_org)
+        team_indexes = dict(
+            zip(
+                organization_names,
+                await asyncio.gather(*(resolve_organization_teams(org_name) for org_name in organization_names)),
+            )
+        )
+    return {
+        (org_name, team_name): (
+            team_indexes[org_name][team_name.lower()]['slug']
+            if team_name.lower() in team_indexes[org_name] else
+            None
+        )
+        for org_name, team_name in org_team_pairs
+    }
+
+
+async def _graphql_fetch_organization_teams(
+    org_name: str,
+    gql_session: AsyncClientSession,
+    request_scheduler: RequestScheduler,
+) -> list[dict]:
+    """
+    Page through all teams of an org, without their repositories.
+    """
+    teams, continuation_token = list(), ''
+    while True:
+        with profiler.span('query build'):
+            query_string, variable_values = _graphql_get_organization_team_slugs(
+                org_name,
+                teams_continuation_token=continuation_token,
+            )
+        graphql_response = await request_scheduler.execute(gql_session, query_string, variable_values)
+        if graphql_response['organization'] is None:
+            # No such org (that the token can see)
+            return teams
+
+        teams_page = graphql_response['organization']['teams']
+        profiler.count('teams pages')
+        teams += teams_page['nodes']
+        if teams_page['pageInfo']['hasNextPage'] is False:
+            return teams
+        continuation_token = teams_page['pageInfo']['endCursor']
+
+
+async def _graphql_fetch_organization_team_index(
+    org_name: str,
+    gql_session: AsyncClientSession,
+    request_scheduler: RequestScheduler,
+    response_cache: typing.Optional[ResponseCache] = None,
+    repositories_order_field: typing.Optional[str] = None,
+) -> dict[str, dict]:
+    """
+    Page through all teams of an org, along with the first page of each team's repositories.
+    Returns the teams indexed by both (lower-cased) slug and name, see `make_team_index()`.
+    """
+    teams = list()
+    continuation_token = ''
+    while True:
+        with profiler.span('query build'):
+            query_string, variable_values = _graphql_get_organization_teams(
+                org_name,
+                teams_continuation_token=continuation_token,
+                repositories_order_field=repositories_order_field,
+            )
+        # Teams pages are cached under the org, with an empty team name
+        page_parameters = json.dumps([query_string, variable_values])
+        cached_entry = None
+        if response_cache is not None:
+            cached_entry = response_cache.get(org_name, '', page_parameters)
+        if cached_entry is not None:
+            teams_page = cached_entry['page']
+        else:
+            graphql_response = await request_scheduler.execute(gql_session, query_string, variable_values)
+            if graphql_response['organization'] is None:
+                # No such org (that the token can see)
+                return make_team_index(teams)
+            teams_page = graphql_response['organization']['teams']
+            if response_cache is not None:
+                response_cache.put(org_name, '', page_parameters, teams_page)
+
+        profiler.count('teams pages')
+        teams += teams_page['nodes']
+        if teams_page['pageInfo']['hasNextPage'] is False:
             break
+        continuation_token = teams_page['pageInfo']['endCursor']
+
+    return make_team_index(teams)
+
+
+async def _graphql_fetch_pagination_chains(
+    pagination_units: list[_PAGINATION_UNIT],
+    gql_session: AsyncClientSession,
+    request_scheduler: RequestScheduler,
+    batch_size: int,
+    response_cache: typing.Optional[ResponseCache] = None,
+    repositories_order_field: typing.Optional[str] = None,
+    stop_pagination: typing.Optional[typing.Callable[[tuple[str, str], list[dict]], bool]] = None,
+    page_consumer: typing.Optional[_PAGE_CONSUMER] = None,
+) -> tuple[dict[tuple[str, str], list[dict]], dict[tuple[str, str], int]]:
+    """
+    Fetch all remaining pages of the given pagination chains in rounds, see
+    `graphql_fetch_access_permission_for_repoes_for_teams_in_orgs()`.
+    A chain stops early when `stop_pagination((org_name, team_slug), edges of latest page)` is true.
+    With `page_consumer`, pages are handed to it as each request completes instead of being kept.
+    Returns the repository edges and Githubs total count of repositories of each (org_name, team_name) pair.
+    """
+    repository_edges = {(org_name, team_name): list() for org_name, team_name, _ in pagination_units}
+    total_counts = {(org_name, team_name): 0 for org_name, team_name, _ in pagination_units}
+
+    pending_units = list(pagination_units)
+    while pending_units:
+        fetched_pages = list()
+        if response_cache is not None:
+            units_to_fetch = list()
+            for org_name, team_name, continuation_token in pending_units:
+                cached_entry = response_cache.get(
+                    org_name,
+                    team_name,
+                    _graphql_page_parameters(continuation_token, repositories_order_field),
+                )
+                if cached_entry is None:
+                    units_to_fetch.append((org_name, team_name, continuation_token))
+                else:
+                    fetched_pages.append(_graphql_repository_page(org_name, team_name, cached_entry['page']))
+            profiler.count('pages from cache', len(fetched_pages))
+            pending_units = units_to_fetch
+
+        page_requests = [
+            _graphql_fetch_repository_pages(
+                pagination_units=pending_units[index:index + batch_size],
+                gql_session=gql_session,
+                request_scheduler=request_scheduler,
+                response_cache=response_cache,
+                repositories_order_field=repositories_order_field,
+            )
+            for index in range(0, len(pending_units), batch_size)
+        ]
+        pending_units = list()
+
+        async def handle_fetched_pages(pages: list[_REPOSITORY_PAGE]) -> None:
+            profiler.count('pages', len(pages))
+            for org_name, team_name, edges, continuation_token, total_count in pages:
+                profiler.count('edges', len(edges))
+                if page_consumer is None:
+                    repository_edges[(org_name, team_name)] += edges
+                else:
+                    await page_consumer(org_name, team_name, edges)
+                total_counts[(org_name, team_name)] = total_count
+                if stop_pagination is not None and stop_pagination((org_name, team_name), edges):
+                    # Remaining pages hold no repositories of interest
+                    continue
+                if continuation_token:
+                    pending_units.append((org_name, team_name, continuation_token))
+
+        await handle_fetched_pages(fetched_pages)
+        if page_consumer is None:
+            await handle_fetched_pages(list(itertools.chain.from_iterable(await asyncio.gather(*page_requests))))
+        else:
+            # Hand on pages as each request completes, only pages of requests in flight are held in memory
+            for page_request in asyncio.as_completed(page_requests):
+                await handle_fetched_pages(await page_request)
+
+    return repository_edges, total_counts
+
+
+async def _graphql_fetch_repository_pages(
+    pagination_units: list[_PAGINATION_UNIT],
+    gql_session: AsyncClientSession,
+    request_scheduler: RequestScheduler,
+    response_cache: typing.Optional[ResponseCache] = None,
+    repositories_order_field: typing.Optional[str] = None,
+) -> list[_REPOSITORY_PAGE]:
+    """
+    Fetch the next page of every given pagination chain in one request.
+    """
+    with profiler.span('query build'):
+        query_string, variable_values, aliases = _graphql_get_repository_access_permissions_for_teams_in_orgs(
+            pagination_units,
+            repositories_order_field=repositories_order_field,
+        )
+    graphql_response = await request_scheduler.execute(gql_session, query_string, variable_values)
+
+    continuation_tokens = {
+        (org_name, team_name): continuation_token
+        for org_name, team_name, continuation_token in pagination_units
+    }
+    fetched_pages = list()
+    for (org_name, team_name), repositories in _graphql_spread_batched_response(graphql_response, aliases):
+        if response_cache is not None:
+            response_cache.put(
+                org_name,
+                team_name,
+                _graphql_page_parameters(continuation_tokens[(org_name, team_name)], repositories_order_field),
+                repositories,
+            )
+        fetched_pages.append(_graphql_repository_page(org_name, team_name, repositories))
+
+    return fetched_pages
 
-        # Continue next loop with same async http session yielding remaining results
-        continue_pagination_token = graphql_response['pageInfo']['endCursor']
 
-    return
+def _graphql_first_pagination_units(org_team_pairs: typing.Iterable[tuple[str, str]]) -> list[_PAGINATION_UNIT]:
+    return [(org_name, team_name, '') for org_name, team_name in org_team_pairs]
 
 
-def _graphql_get_repository_access_permissions_for_team_in_org(
+def _graphql_page_parameters(
+    continuation_token: str,
+    repositories_order_field: typing.Optional[str],
+) -> str:
+    # Identifies a page of a team's repositories, e.g. as key in the response cache.
+    #   Marked as of a team looked up by slug, unlike pages cached when teams were searched for by name
+    page_parameters = _graphql_repositories_query_parameters(continuation_token, repositories_order_field)
+    return f"slug; {page_parameters}"
+
+
+def _graphql_repository_page(
     org_name: str,
     team_name: str,
+    repositories: typing.Optional[dict],
+) -> _REPOSITORY_PAGE:
+    if repositories is None:
+        # Due to no results for given team/org combination
+        return org_name, team_name, list(), None, 0
+
+    continuation_token = None
+    if repositories['pageInfo']['hasNextPage'] is True:
+        continuation_token = repositories['pageInfo']['endCursor']
+    return org_name, team_name, repositories['edges'], continuation_token, repositories['totalCount']
+
+
+@functools.lru_cache(maxsize=256)
+def graphql_parse_query(query_string: str) -> graphql.DocumentNode:
+    # Query documents only differ by the shape of the query (values are passed as variables), so parse each once
+    return gql.gql(query_string)
+
+
+def graphql_query_node_count(
+    num_team_queries: int,
+    page_size: int = GITHUB_GRAPHQL_PAGE_SIZE,
+) -> int:
+    # Each team query asks for (the first) 1 team, and `page_size` repositories of that team
+    return num_team_queries * (1 + 1 * page_size)
+
+
+def graphql_max_batch_size(page_size: int = GITHUB_GRAPHQL_PAGE_SIZE) -> int:
+    return GITHUB_GRAPHQL_MAX_NODES_PER_QUERY // graphql_query_node_count(1, page_size)
+
+
+def reached_repositories_without_permission(
+    repository_edges: typing.Iterable[dict],
+    permission: str,
+    reached_permission_before: bool = False,
+) -> bool:
+    """
+    Whether a page of repositories ordered by permission (descending) holds repositories without `permission`,
+    so that the pages after it hold none with it.
+    A page with repositories with `permission` after ones without it is not ordered as relied upon,
+    and is never stopped at. Nor is a page without any repositories with `permission`, unless earlier pages
+    (`reached_permission_before`) held some; Github may not be ordering them at all.
+    """
+    reached_permission, reached_other_permission = reached_permission_before, False
+    for edge in repository_edges:
+        if edge is None:
+            continue
+        if edge['permission'] != permission:
+            reached_other_permission = True
+        elif reached_other_permission:
+            # Not ordered by permission after all, keep paging
+            return False
+        else:
+            reached_permission = True
+    return reached_permission and reached_other_permission
+
+
+def _stop_at_repositories_without_permission(
+    permission: str,
+) -> typing.Callable[[tuple[str, str], list[dict]], bool]:
+    # `stop_pagination` for chains of repositories ordered by permission,
+    #  see `reached_repositories_without_permission()`
+    chains_reaching_permission = set()
+
+    def stop_pagination(org_slug_pair: tuple[str, str], edges: list[dict]) -> bool:
+        reached = reached_repositories_without_permission(
+            edges,
+            permission,
+            reached_permission_before=org_slug_pair in chains_reaching_permission,
+        )
+        if any(edge is not None and edge['permission'] == permission for edge in edges):
+            chains_reaching_permission.add(org_slug_pair)
+        return reached
+
+    return stop_pagination
+
+
+class ResponseSizeTracker:
+    """
+    Counts the responses, and their (decoded) size in bytes, received by aiohttp sessions
+    made with `client_session_args=dict(trace_configs=[tracker.trace_config])`.
+    """
+
+    def __init__(self) -> None:
+        self.num_responses = 0
+        self.response_bytes = 0
+
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_response_chunk_received.append(self._on_response_chunk_received)
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    async def _on_response_chunk_received(self, session, trace_config_ctx, params) -> None:
+        self.response_bytes += len(params.chunk)
+
+    async def _on_request_end(self, session, trace_config_ctx, params) -> None:
+        self.num_responses += 1
+
+
+def _graphql_get_repository_access_permissions_for_teams_in_orgs(
+    pagination_units: typing.Iterable[_PAGINATION_UNIT],
     *,
-    repositories_continuation_token=None
-):
-    # Build query parameters which might change depending on pagination
+    repositories_order_field: typing.Optional[str] = None,
+) -> tuple[str, dict[str, typing.Optional[str]], dict[tuple[str, str], tuple[str, str]]]:
+    """
+    Pack the next page of several org/team pagination chains into one query, by aliasing each org
+    and each team (looked up by its exact slug) within it.
+    Repositories are ordered (descending) by `repositories_order_field` if given.
+    Returns the query string, its variable values and a mapping of (org alias, team alias) -> (org_name, team_slug).
+    """
+    units_per_org = dict()
+    for org_name, team_name, continuation_token in pagination_units:
+        units_per_org.setdefault(org_name, list()).append((team_name, continuation_token))
+
+    aliases, variable_values, variable_definitions = dict(), dict(), list()
+    organization_queries = list()
+    for org_index, (org_name, team_units) in enumerate(units_per_org.items()):
+        organization_alias = f"org{org_index}"
+        variable_values[organization_alias] = org_name
+        variable_definitions.append(f"${organization_alias}: String!")
+        team_queries = list()
+        for team_index, (team_name, continuation_token) in enumerate(team_units):
+            team_alias = f"team{team_index}"
+            team_variable, after_variable = f"team{org_index}_{team_index}", f"after{org_index}_{team_index}"
+            aliases[(organization_alias, team_alias)] = (org_name, team_name)
+            variable_values[team_variable] = team_name
+            variable_values[after_variable] = continuation_token or None
+            variable_definitions += [f"${team_variable}: String!", f"${after_variable}: String"]
+            team_queries.append(
+                GRAPHQL_GITHUB_BATCHED_TEAM_BY_SLUG_QUERY_STRING.format(
+                    team_alias=team_alias,
+                    team_variable=team_variable,
+                    repositories_connection=_graphql_repositories_connection(
+                        after_variable,
+                        repositories_order_field,
+                        indentation=2,
+                    ),
+                )
+            )
+        organization_queries.append(
+            GRAPHQL_GITHUB_BATCHED_ORGANIZATION_QUERY_STRING.format(
+                organization_alias=organization_alias,
+                organization_variable=organization_alias,
+                team_queries=textwrap.indent('\n'.join(team_queries), '  '),
+            )
+        )
+
+    return (
+        GRAPHQL_GITHUB_BATCHED_REPOS_QUERY_STRING.format(
+            variable_definitions=', '.join(variable_definitions),
+            organization_queries=textwrap.indent('\n'.join(organization_queries), '  '),
+        ),
+        variable_values,
+        aliases,
+    )
+
+
+def _graphql_spread_batched_response(
+    graphql_response: dict,
+    aliases: dict[tuple[str, str], tuple[str, str]],
+) -> typing.Generator[tuple[tuple[str, str], typing.Optional[dict]], None, None]:
+    """
+    Spread the response of a query made by `_graphql_get_repository_access_permissions_for_teams_in_orgs()`
+    back out per org/team, yielding `None` as repositories for org/team combinations without results.
+    """
+    for (organization_alias, team_alias), org_team_pair in aliases.items():
+        # Either may be `null` when not found
+        organization = graphql_response[organization_alias]
+        team = organization[team_alias] if organization is not None else None
+        yield org_team_pair, team['repositories'] if team is not None else None
+
+
+def _graphql_get_organization_teams(
+    org_name: str,
+    *,
+    teams_continuation_token: str = '',
+    repositories_order_field: typing.Optional[str] = None,
+) -> tuple[str, dict[str, typing.Optional[str]]]:
+    # Returns the query string and its variable values
+    return (
+        GRAPHQL_GITHUB_ORGANIZATION_TEAMS_QUERY_STRING.format(
+            teams_query_string=f"first: {GITHUB_GRAPHQL_PAGE_SIZE}, after: $after",
+            repositories_connection=_graphql_repositories_connection(None, repositories_order_field, indentation=8),
+        ),
+        dict(org_name=org_name, after=teams_continuation_token or None),
+    )
+
+
+def _graphql_get_organization_team_slugs(
+    org_name: str,
+    *,
+    teams_continuation_token: str = '',
+) -> tuple[str, dict[str, typing.Optional[str]]]:
+    # Returns the query string and its variable values
+    return (
+        GRAPHQL_GITHUB_ORGANIZATION_TEAM_SLUGS_QUERY_STRING.format(
+            teams_query_string=f"first: {GITHUB_GRAPHQL_PAGE_SIZE}, after: $after",
+        ),
+        dict(org_name=org_name, after=teams_continuation_token or None),
+    )
+
+
+def _graphql_repositories_connection(
+    after_variable: typing.Optional[str],
+    repositories_order_field: typing.Optional[str],
+    *,
+    indentation: int,
+) -> str:
+    return textwrap.indent(
+        GRAPHQL_GITHUB_TEAM_REPOSITORIES_CONNECTION_STRING.format(
+            repo_query_string=_graphql_repositories_connection_arguments(
+                after_variable,
+                repositories_order_field,
+            ),
+        ),
+        ' ' * indentation,
+    )
+
+
+def _graphql_repositories_connection_arguments(
+    after_variable: typing.Optional[str] = None,
+    repositories_order_field: typing.Optional[str] = None,
+) -> str:
+    # Arguments of the `repositories` connection, taking the continuation token from `$<after_variable>` if given
+    connection_arguments = f"first: {GITHUB_GRAPHQL_PAGE_SIZE}"
+    if after_variable:
+        connection_arguments += f", after: ${after_variable}"
+    if repositories_order_field:
+        connection_arguments += f", orderBy: {{field: {repositories_order_field}, direction: DESC}}"
+    return connection_arguments
+
+
+def _graphql_repositories_query_parameters(
+    repositories_continuation_token=None,
+    repositories_order_field: typing.Optional[str] = None,
+) -> str:
+    # Query parameters which change depending on pagination, identifying a page e.g. as key in the response cache
     query_parameters = dict(
-        first=100,  # Max repos github lets ut fetch per query
+        first=GITHUB_GRAPHQL_PAGE_SIZE,
         after=f"\"{repositories_continuation_token}\""
     )
     if not repositories_continuation_token or repositories_continuation_token is True:
         del query_parameters['after']
+    if repositories_order_field:
+        query_parameters['orderBy'] = f"{{field: {repositories_order_field}, direction: DESC}}"
 
-    # Build multi-line grapqhl query string _with_ given query params
-    return GRAPHQL_GITHUB_REPOS_QUERY_STRING.format(
-        org_name=org_name,
-        team_name=team_name,
-        repo_query_string=', '.join(
-            [
-                f"{key}: {value}"
-                for key, value
-                in query_parameters.items()
-            ]
-        )
+    return ', '.join(
+        [
+            f"{key}: {value}"
+            for key, value
+            in query_parameters.items()
+        ]
     )
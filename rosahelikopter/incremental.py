@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Sub-module for incremental runs; remembering each team's repositories between runs,
+so that only repositories updated since the last run need to be fetched.
+"""
+
+# Python standard library imports
+import json
+import pathlib
+import time
+import typing
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter.files import write_atomically
+
+
+# Order of repositories when fetching incrementally, newest first, so that pagination can stop
+#   when reaching repositories not updated since the last run.
+INCREMENTAL_REPOSITORIES_ORDER_FIELD = 'UPDATED_AT'
+
+
+class SyncState:
+    """
+    The repository edges of each org/team combination as of the last run, one JSON file per combination.
+    With `refresh` set, nothing is loaded (i.e. everything is fetched anew) but the state is still saved.
+    """
+
+    def __init__(
+        self,
+        state_dir: pathlib.Path,
+        refresh: bool = False,
+    ) -> None:
+        self.state_dir = pathlib.Path(state_dir)
+        self.refresh = refresh
+
+    def _state_path(self, org_name: str, team_name: str) -> pathlib.Path:
+        return self.state_dir / org_name / f"{team_name}.json"
+
+    def load(
+        self,
+        org_name: str,
+        team_name: str,
+    ) -> typing.Optional[list[dict]]:
+        if self.refresh:
+            return None
+        try:
+            return json.loads(self._state_path(org_name, team_name).read_text())['edges']
+        except (OSError, ValueError, KeyError):
+            # Never synced (or unreadable state), either way everything must be fetched
+            return None
+
+    def save(
+        self,
+        org_name: str,
+        team_name: str,
+        repository_edges: list[dict],
+    ) -> None:
+        state_path = self._state_path(org_name, team_name)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(state_path, json.dumps(dict(synced_at=time.time(), edges=repository_edges)))
+
+
+def newest_updated_at(repository_edges: typing.Iterable[dict]) -> typing.Optional[str]:
+    # Github's timestamps are ISO 8601 in UTC, which sort the same as strings as they do as timestamps
+    return max(
+        (
+            edge['node']['updatedAt']
+            for edge in repository_edges
+            if edge is not None
+        ),
+        default=None,
+    )
+
+
+def reached_repositories_updated_before(
+    repository_edges: typing.Iterable[dict],
+    updated_at: str,
+) -> bool:
+    return any(
+        edge['node']['updatedAt'] < updated_at
+        for edge in repository_edges
+        if edge is not None
+    )
+
+
+def merge_repository_edges(
+    last_synced_edges: typing.Iterable[dict],
+    updated_edges: typing.Iterable[dict],
+) -> list[dict]:
+    """
+    Merge repository edges fetched since the last run into the edges of the last run,
+    the fetched ones replacing the last run's edge for the same repository.
+    """
+    merged_edges = {
+        edge['node']['nameWithOwner']: edge
+        for edge in last_synced_edges
+        if edge is not None
+    }
+    merged_edges.update(
+        (edge['node']['nameWithOwner'], edge)
+        for edge in updated_edges
+        if edge is not None
+    )
+    return list(merged_edges.values())
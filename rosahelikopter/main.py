@@ -4,81 +4,332 @@ Module containing "main()" logic for rosahelikopter.
 """
 
 # Python standard library imports
-from collections import defaultdict
-import json
-import os
+import concurrent.futures
+import functools
+import itertools
+import multiprocessing
+import pathlib
+import sqlite3
+import sys
 import typing
 
 # Non-standard library python package imports
 # 3rd-party python package imports
 import click
-import gql
-from gql.transport.requests import RequestsHTTPTransport
 
 # Imports of module(s) internal to this project/package
 from rosahelikopter import (
-    GIT_REPO,
-    repository_is_relevant_for_overview,
+    GITHUB_GRAPHQL_API_URL,
+    ORG_CRAWL_TEAM_THRESHOLD,
+    RELEVANT_PERMISSION,
+    STREAM_BUFFER_SIZE,
+    Repository,
+    RepositoryIndex,
+    filter_repositories,
 )
-from rosahelikopter.github import graphql_fetch_access_permission_for_repoes_for_team_in_org
+from rosahelikopter.cache import (
+    ResponseCache,
+    cache_scope,
+    default_cache_dir,
+)
+from rosahelikopter.changes import (
+    diff_repository_indexes,
+    generate_changes_report,
+)
+from rosahelikopter.exports import (
+    EXPORT_WRITERS,
+    read_sqlite,
+    read_sqlite_repository_owners,
+)
+from rosahelikopter.incremental import SyncState
 from rosahelikopter.markdown import (
-    generate_markdown_template,
     write_markdown_files,
+    write_markdown_template,
+)
+from rosahelikopter.profiling import profiler
+from rosahelikopter.snapshot import (
+    load_snapshot,
+    save_snapshot,
 )
+from rosahelikopter.team_index import TeamIndexCache
+from rosahelikopter.watch import watch_repositories
 
 
-def serialize_sets(obj):
-    if isinstance(obj, set):
-        return list(obj)
-    return obj
+if typing.TYPE_CHECKING:
+    # Imports of module(s) internal to this project/package
+    from rosahelikopter.github import ResponseSizeTracker
 
 
-class hashable_dict(dict):
-    def __hash__(self):
-        return hash(tuple(sorted(self.items())))
+def _echo_download_summary(
+    response_size_tracker: 'ResponseSizeTracker',
+    num_fetched_edges: int,
+    num_discarded_edges: int,
+) -> None:
+    click.echo(
+        (
+            f"\nDownloaded {response_size_tracker.response_bytes / 1024:.1f} KiB"
+            f" in {response_size_tracker.num_responses} response(s)"
+            f", discarded {num_discarded_edges} of {num_fetched_edges} repository edges fetched"
+        ),
+        err=True,
+    )
 
 
-def fetch_and_filter_repositories(
-    org_name: str,
-    team_name: str,
-    graphql_client: gql.Client,
-) -> typing.Generator[GIT_REPO, None, None]:
-    return (
-        repo['node']
-        for repo
-        in graphql_fetch_access_permission_for_repoes_for_team_in_org(
-            org_name=org_name,
-            team_name=team_name,
-            gql_transport=graphql_client,
-        )
-        if (
-            # Remove empty results from GraphQL json output (happens sometimes)
-            # This bug was fixed by giving the Github PAT the repo:security_events permission
-            #  in addition to org:read permission. But keeping check just to avoid further issues.
-            repo is not None and
-            repository_is_relevant_for_overview(repo['node'], repo['permission'])
+def _write_markdown_to_stdout(
+    repositories: typing.Iterable,
+    organizations: typing.Iterable[str],
+    teams: typing.Iterable[str],
+    repositories_sorted: bool = False,
+    repository_teams: typing.Optional[typing.Mapping[str, typing.Iterable[tuple[str, str]]]] = None,
+) -> None:
+    stdout = click.get_text_stream('stdout')
+    with profiler.span('render'):
+        write_markdown_template(
+            stdout,
+            repositories=repositories,
+            orgs=organizations,
+            teams=teams,
+            repositories_sorted=repositories_sorted,
+            repository_teams=repository_teams,
         )
-    )
+        # Trailing newline, as when echoing the whole document
+        stdout.write('\n')
+        stdout.flush()
 
 
+def _resolve_strategy(
+    strategy: str,
+    num_teams: int,
+    incremental: bool,
+    stream: bool,
+) -> str:
+    if strategy != 'auto':
+        return strategy
+    # Incremental and streaming runs rely on the per-team strategy
+    return 'org-crawl' if num_teams >= ORG_CRAWL_TEAM_THRESHOLD and not incremental and not stream else 'per-team'
 
-def main(
+
+def fetch_repository_index(
     teams: typing.Iterable[str],
     organizations: typing.Iterable[str],
-    github_auth_token: str,
-    make_org_folders: bool,
-    make_team_files: bool,
-    tee_output: bool,
+    github_auth_tokens: typing.Sequence[str],
     verbosity_level: int,
-    **kwargs: dict[typing.Any, typing.Any],
-) -> None:
-    github_api_client = RequestsHTTPTransport(
-        verify=True,
-        url='https://api.github.com/graphql',
-        headers=dict(Authorization=f"bearer {github_auth_token}"),
+    concurrency: int = 1,
+    max_retries: int = 0,
+    batch_size: int = 1,
+    use_cache: bool = False,
+    cache_dir: typing.Optional[str] = None,
+    cache_ttl: int = 0,
+    cache_max_size: int = 0,
+    refresh_cache: bool = False,
+    incremental: bool = False,
+    strategy: str = 'per-team',
+    api_url: str = GITHUB_GRAPHQL_API_URL,
+    stream: bool = False,
+    stream_buffer_size: int = STREAM_BUFFER_SIZE,
+    fetch_all_pages: bool = False,
+) -> typing.Optional[RepositoryIndex]:
+    """
+    Fetch the repositories of `teams` in `organizations` from Githubs GraphQL API.
+    When streaming, the repositories are written straight to stdout instead, and nothing is returned.
+    Each team's repositories are fetched ordered by permission, stopping after the first page of non-ADMIN ones,
+    unless `fetch_all_pages`.
+    """
+    # Imported here, so that runs not fetching anything (and `--help`) don't pay for importing asyncio, aiohttp and gql
+    # Python standard library imports
+    import asyncio
+
+    # Non-standard library python package imports
+    import aiohttp
+    from gql.transport.exceptions import (
+        TransportError,
+        TransportQueryError,
+    )
+
+    # Imports of module(s) internal to this project/package
+    from rosahelikopter.decoding import json_loads
+    from rosahelikopter.github import (
+        RESPONSE_CACHE_NAMESPACE,
+        GithubGraphQLTransport,
+        RequestScheduler,
+        ResponseSizeTracker,
+        graphql_fetch_access_permission_for_repoes_for_teams_in_orgs,
+        graphql_fetch_access_permission_for_repoes_for_teams_in_orgs_by_org_crawl,
+    )
+    from rosahelikopter.pipeline import (
+        ExternalSorter,
+        stream_relevant_repositories,
+    )
+
+    response_size_tracker = ResponseSizeTracker()
+    # One session for the whole run, with a connection kept alive for each request in flight
+    github_api_client = GithubGraphQLTransport(
+        # Each request is sent with one of the tokens, see `RequestScheduler`
+        github_auth_token=github_auth_tokens[0],
+        url=api_url,
+        max_connections=concurrency,
+        trace_configs=[response_size_tracker.trace_config],
+        ssl=True,
     )
 
-    global_results = defaultdict(set)
+    cache_dir = pathlib.Path(cache_dir) if cache_dir else default_cache_dir()
+    # Pages, teams and sync states are kept per API and tokens, see `cache_scope()`
+    scope = cache_scope(api_url, github_auth_tokens)
+    response_cache = None
+    if use_cache:
+        response_cache = ResponseCache(
+            cache_dir=cache_dir,
+            ttl=cache_ttl,
+            max_size=cache_max_size * 1024 ** 2,
+            refresh=refresh_cache,
+            namespace=f"{RESPONSE_CACHE_NAMESPACE}:{scope}",
+            json_loads=json_loads,
+        )
+    team_index_cache = None
+    if use_cache or incremental:
+        # Incremental runs keep their teams between runs too, teams are only refetched when one is missing
+        team_index_cache = TeamIndexCache(
+            cache_dir=cache_dir / 'team-index' / scope,
+            ttl=cache_ttl,
+            refresh=refresh_cache,
+        )
+    sync_state = None
+    if incremental:
+        sync_state = SyncState(state_dir=cache_dir / 'sync-state' / scope, refresh=refresh_cache)
+
+    strategy = _resolve_strategy(strategy, len(teams), incremental=incremental, stream=stream)
+    if verbosity_level >= 1:
+        click.echo(
+            (
+                f"Fetching {len(organizations) * len(teams)} org/team combinations ({strategy})"
+                f", {concurrency} request(s) at a time with up to {batch_size} combination(s) per request..."
+            ),
+            err=True,
+        )
+    request_scheduler = RequestScheduler(
+        concurrency=concurrency,
+        max_retries=max_retries,
+        github_auth_tokens=github_auth_tokens,
+    )
+    # All pagination chains run concurrently, results are then traversed in the same (sorted) order as before
+    org_team_pairs = itertools.product(sorted(organizations), sorted(teams))
+    repository_sorter = None
+    if stream:
+        # Pages are filtered as they arrive and sorted externally, instead of all being held until fetched
+        repository_sorter = ExternalSorter(max_records_in_memory=stream_buffer_size)
+        fetch_repository_edges = stream_relevant_repositories(
+            functools.partial(
+                graphql_fetch_access_permission_for_repoes_for_teams_in_orgs,
+                org_team_pairs=org_team_pairs,
+                gql_transport=github_api_client,
+                request_scheduler=request_scheduler,
+                batch_size=batch_size,
+                response_cache=response_cache,
+                relevant_permission_only=not fetch_all_pages,
+                team_index_cache=team_index_cache,
+            ),
+            repository_sorter,
+        )
+    elif strategy == 'org-crawl':
+        fetch_repository_edges = graphql_fetch_access_permission_for_repoes_for_teams_in_orgs_by_org_crawl(
+            org_team_pairs=org_team_pairs,
+            gql_transport=github_api_client,
+            request_scheduler=request_scheduler,
+            batch_size=batch_size,
+            response_cache=response_cache,
+            relevant_permission_only=not fetch_all_pages,
+        )
+    else:
+        fetch_repository_edges = graphql_fetch_access_permission_for_repoes_for_teams_in_orgs(
+            org_team_pairs=org_team_pairs,
+            gql_transport=github_api_client,
+            request_scheduler=request_scheduler,
+            batch_size=batch_size,
+            response_cache=response_cache,
+            sync_state=sync_state,
+            relevant_permission_only=not fetch_all_pages,
+            team_index_cache=team_index_cache,
+        )
+    try:
+        with profiler.span('fetch'):
+            repository_edges_per_org_team = asyncio.run(fetch_repository_edges)
+    except (
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+        TransportError,
+        TransportQueryError,
+    ) as error:
+        raise click.ClickException(
+            f"Failed fetching from Githubs GraphQL API (after {request_scheduler.num_retries} retries): {error}"
+        )
+    if verbosity_level >= 0:
+        for not_found_message in request_scheduler.not_found:
+            click.echo(f"Warning: {not_found_message} Taken as having no teams/repositories.", err=True)
+
+    if verbosity_level >= 1:
+        click.echo(
+            (
+                f"Spent {request_scheduler.points_spent} rate limit point(s)"
+                f", waited {request_scheduler.seconds_waited:.1f}s on rate limits and backoff"
+                f", retried {request_scheduler.num_retries} request(s)"
+            ),
+            err=True,
+        )
+        if len(request_scheduler.token_budgets) > 1:
+            for token_budget in request_scheduler.token_budgets:
+                click.echo(
+                    (
+                        f"\tToken {token_budget.name}: {token_budget.num_requests} request(s)"
+                        f", spent {token_budget.points_spent} point(s)"
+                        f", {token_budget.remaining if token_budget.remaining is not None else '?'}"
+                        f" of {token_budget.limit if token_budget.limit is not None else '?'} remaining"
+                    ),
+                    err=True,
+                )
+    if response_cache is not None:
+        num_evicted_responses = response_cache.evict()
+        if verbosity_level >= 2:
+            click.echo(
+                (
+                    f"Response cache: {response_cache.hits} hit(s), {response_cache.misses} miss(es)"
+                    f", {num_evicted_responses} evicted"
+                ),
+                err=True,
+            )
+
+    if repository_sorter is not None:
+        with repository_sorter:
+            num_fetched_edges, num_discarded_edges = repository_edges_per_org_team
+            if verbosity_level >= 1:
+                _echo_download_summary(response_size_tracker, num_fetched_edges, num_discarded_edges)
+            if verbosity_level >= 2:
+                click.echo(f"Spilled {repository_sorter.num_runs_spilled} sorted run(s) to disk", err=True)
+
+            # Only the owners of the repository being written are held, the table looks them up as it's written
+            repository_teams = dict()
+
+            def repositories_with_owners() -> typing.Iterator[Repository]:
+                for repository, owners in repository_sorter.sorted_unique_with_owners():
+                    repository_teams.clear()
+                    repository_teams[repository.nameWithOwner] = owners
+                    yield repository
+
+            repositories = repositories_with_owners()
+            first_repository = next(repositories, None)
+            if first_repository is None:
+                click.echo(f"No repositories found for teams {teams} in any of orgs {organizations}!", err=True)
+                sys.exit(1)
+            _write_markdown_to_stdout(
+                itertools.chain((first_repository,), repositories),
+                organizations=organizations,
+                teams=teams,
+                repositories_sorted=True,
+                repository_teams=repository_teams,
+            )
+        return None
+
+    global_results = RepositoryIndex()
+    num_fetched_edges, num_discarded_edges = 0, 0
     for org_name in sorted(organizations):
         if verbosity_level >= 1:
             click.echo(f"\nNow traversing {org_name}!", err=True)
@@ -87,58 +338,345 @@ def main(
             if verbosity_level >= 1:
                 click.echo(f"\tLooking for repoes {team_name} is ADMIN for in {org_name}...", err=True)
 
-            repoes_fetched = set(
-                (
-                    hashable_dict(repo)
-                    for repo
-                    in fetch_and_filter_repositories(
-                        org_name=org_name,
-                        team_name=team_name,
-                        graphql_client=github_api_client,
-                    )
+            with profiler.span('filter'):
+                repoes_fetched, num_discarded_team_edges = filter_repositories(
+                    repository_edges_per_org_team[(org_name, team_name)],
                 )
-            )
+            num_fetched_edges += len(repository_edges_per_org_team[(org_name, team_name)])
+            num_discarded_edges += num_discarded_team_edges
             if verbosity_level >= 2:
                 click.echo(f"\t\t{len(repoes_fetched)} found for {team_name} in {org_name}!", err=True)
 
-            global_results[org_name] |= repoes_fetched
-            global_results[team_name] |= repoes_fetched
+            with profiler.span('dedup'):
+                for repository in repoes_fetched:
+                    global_results.add(org_name, team_name, repository)
+
+        if verbosity_level >= 1:
+            click.echo(f"{len(global_results.organizations[org_name])} repositories found in {org_name}!", err=True)
+
+    if verbosity_level >= 1:
+        _echo_download_summary(response_size_tracker, num_fetched_edges, num_discarded_edges)
+    return global_results
+
+
+def _shard_org_teams(
+    organizations: typing.Iterable[str],
+    teams: typing.Iterable[str],
+    num_shards: int,
+    split_teams: bool = True,
+) -> list[tuple[list[str], list[str]]]:
+    """
+    Split the org/team combinations into at most `num_shards` shards of (orgs, teams).
+    Orgs are dealt out over the shards, or with fewer orgs than shards (and `split_teams`),
+    each org's teams are split into chunks with a shard per org and chunk instead.
+    """
+    organizations, teams = sorted(organizations), sorted(teams)
+    if len(organizations) >= num_shards or not split_teams:
+        return [
+            (organizations[shard_index::num_shards], teams)
+            for shard_index in range(min(num_shards, len(organizations)))
+        ]
+    num_team_chunks = min(len(teams), num_shards // len(organizations))
+    return [
+        ([org_name], teams[chunk_index::num_team_chunks])
+        for org_name in organizations
+        for chunk_index in range(num_team_chunks)
+    ]
+
+
+def fetch_repository_index_in_workers(
+    teams: typing.Iterable[str],
+    organizations: typing.Iterable[str],
+    verbosity_level: int,
+    workers: int,
+    strategy: str = 'per-team',
+    incremental: bool = False,
+    **fetch_kwargs: typing.Any,
+) -> RepositoryIndex:
+    """
+    Fetch the repositories of `teams` in `organizations` with `fetch_repository_index()` in up to `workers`
+    processes, each fetching (and filtering) a shard of the org/team combinations on its own.
+    The repositories found by each are merged into one `RepositoryIndex`, and with `profiler` enabled
+    what each worker recorded is merged into it.
+    """
+    # Resolved once for all shards, a shard with a chunk of the teams would resolve it differently
+    strategy = _resolve_strategy(strategy, len(teams), incremental=incremental, stream=False)
+    # Crawling an org's teams is done once per org, so orgs are never split across shards then
+    shards = _shard_org_teams(organizations, teams, num_shards=workers, split_teams=strategy == 'per-team')
+    if verbosity_level >= 1:
+        click.echo(f"Fetching in {len(shards)} worker process(es), one per shard of orgs/teams...", err=True)
+
+    global_results = RepositoryIndex()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=len(shards),
+        # Spawned rather than forked, the parent may be running threads (e.g. serving overviews with `--watch`)
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as executor:
+        shard_results = [
+            executor.submit(
+                _fetch_repository_index_in_worker,
+                profile=profiler.enabled,
+                teams=shard_teams,
+                organizations=shard_organizations,
+                verbosity_level=verbosity_level,
+                strategy=strategy,
+                incremental=incremental,
+                **fetch_kwargs,
+            )
+            for shard_organizations, shard_teams in shards
+        ]
+        with profiler.span('merge'):
+            for shard_result in shard_results:
+                shard_repoes_dataset, shard_profile = shard_result.result()
+                global_results.update(shard_repoes_dataset)
+                if shard_profile is not None:
+                    profiler.merge(shard_profile)
+    return global_results
+
+
+def _fetch_repository_index_in_worker(
+    profile: bool,
+    **fetch_kwargs: typing.Any,
+) -> tuple[RepositoryIndex, typing.Optional[tuple[list, dict, float]]]:
+    # A spawned worker has a `profiler` of its own, not enabled by `--profile` in the parent
+    if profile:
+        profiler.enable()
+    repoes_dataset = fetch_repository_index(**fetch_kwargs)
+    return repoes_dataset, profiler.export() if profile else None
 
+
+def _write_output_files(
+    global_results: RepositoryIndex,
+    organizations: typing.Iterable[str],
+    teams: typing.Iterable[str],
+    make_org_folders: bool,
+    make_team_files: bool,
+    write_workers: int,
+    exports: typing.Iterable[tuple[str, str]],
+    save_snapshot_path: typing.Optional[str],
+    verbosity_level: int,
+) -> None:
+    if save_snapshot_path is not None:
+        save_snapshot(save_snapshot_path, global_results)
         if verbosity_level >= 1:
-            click.echo(f"{len(global_results[org_name])} repositories found in {org_name}!", err=True)
+            click.echo(f"Saved snapshot of repositories to {save_snapshot_path}", err=True)
+    for export_format, export_path in exports:
+        EXPORT_WRITERS[export_format](pathlib.Path(export_path), global_results)
+        if verbosity_level >= 1:
+            click.echo(f"Exported repositories as {export_format} to {export_path}", err=True)
 
-    # click.echo(json.dumps(global_results, indent=2, default=serialize_sets), err=True)
     if make_org_folders or make_team_files:
         # Save to files if requested!
-        write_markdown_files(
+        markdown_files_summary = write_markdown_files(
             repoes_dataset=global_results,
             make_org_folders=make_org_folders,
             make_team_files=make_team_files,
             organizations=organizations,
             teams=teams,
+            num_workers=write_workers,
         )
-        if tee_output is False:
-            # Job done! No output to stdout
+        if verbosity_level >= 1:
+            click.echo(
+                (
+                    f"Files: {markdown_files_summary.written} written, {markdown_files_summary.unchanged} unchanged"
+                    f", {markdown_files_summary.removed} removed"
+                ),
+                err=True,
+            )
+
+
+def main(
+    teams: typing.Iterable[str],
+    organizations: typing.Iterable[str],
+    github_auth_tokens: typing.Sequence[str],
+    make_org_folders: bool,
+    make_team_files: bool,
+    tee_output: bool,
+    verbosity_level: int,
+    concurrency: int = 1,
+    max_retries: int = 0,
+    batch_size: int = 1,
+    use_cache: bool = False,
+    cache_dir: typing.Optional[str] = None,
+    cache_ttl: int = 0,
+    cache_max_size: int = 0,
+    refresh_cache: bool = False,
+    incremental: bool = False,
+    strategy: str = 'per-team',
+    write_workers: int = 1,
+    api_url: str = GITHUB_GRAPHQL_API_URL,
+    stream: bool = False,
+    stream_buffer_size: int = STREAM_BUFFER_SIZE,
+    exports: typing.Iterable[tuple[str, str]] = (),
+    from_sqlite: typing.Optional[str] = None,
+    save_snapshot_path: typing.Optional[str] = None,
+    from_snapshot: typing.Optional[str] = None,
+    watch_interval: typing.Optional[float] = None,
+    serve_address: typing.Optional[tuple[str, int]] = None,
+    workers: int = 1,
+    diff_against: typing.Optional[str] = None,
+    fetch_all_pages: bool = False,
+    **kwargs: dict[typing.Any, typing.Any],
+) -> None:
+    fetch = functools.partial(
+        fetch_repository_index,
+        teams=teams,
+        organizations=organizations,
+        github_auth_tokens=github_auth_tokens,
+        verbosity_level=verbosity_level,
+        concurrency=concurrency,
+        max_retries=max_retries,
+        batch_size=batch_size,
+        use_cache=use_cache,
+        cache_dir=cache_dir,
+        cache_ttl=cache_ttl,
+        cache_max_size=cache_max_size,
+        refresh_cache=refresh_cache,
+        incremental=incremental,
+        strategy=strategy,
+        api_url=api_url,
+        stream=stream,
+        stream_buffer_size=stream_buffer_size,
+        fetch_all_pages=fetch_all_pages,
+    )
+    if workers > 1:
+        fetch = functools.partial(fetch_repository_index_in_workers, workers=workers, **fetch.keywords)
+    write_output_files = functools.partial(
+        _write_output_files,
+        organizations=organizations,
+        teams=teams,
+        make_org_folders=make_org_folders,
+        make_team_files=make_team_files,
+        write_workers=write_workers,
+        exports=exports,
+        save_snapshot_path=save_snapshot_path,
+        verbosity_level=verbosity_level,
+    )
+
+    if watch_interval is not None:
+        refresh_counter = itertools.count()
+
+        def refresh() -> RepositoryIndex:
+            # Only repositories updated since the last refresh are fetched, and only changed files rewritten.
+            #  `--refresh` fetches everything anew for the first refresh only
+            global_results = fetch(
+                incremental=True,
+                use_cache=False,
+                refresh_cache=next(refresh_counter) == 0 and refresh_cache,
+            )
+            write_output_files(global_results)
+            return global_results
+
+        watch_repositories(
+            refresh,
+            organizations=organizations,
+            teams=teams,
+            interval=watch_interval,
+            serve_address=serve_address,
+            verbosity_level=verbosity_level,
+        )
+        return
+
+    if from_snapshot is not None:
+        # Everything was fetched by an earlier run
+        try:
+            global_results = load_snapshot(from_snapshot, organizations=organizations, teams=teams)
+        except (OSError, ValueError) as error:
+            raise click.ClickException(f"Failed reading snapshot {from_snapshot}: {error}")
+    elif from_sqlite is not None:
+        # Everything was fetched by an earlier run
+        try:
+            global_results = read_sqlite(from_sqlite, organizations=organizations, teams=teams)
+        except sqlite3.Error as error:
+            raise click.ClickException(f"Failed reading repositories from {from_sqlite}: {error}")
+    else:
+        global_results = fetch()
+        if global_results is None:
+            # Streamed straight to stdout, nothing more to do
             return
 
-    # click.echo(f"{len(org_results)}", err=True)
+    previous_results = None
+    if diff_against is not None:
+        # Read before writing any output, the snapshot to compare with may be about to be overwritten
+        try:
+            previous_results = load_snapshot(diff_against, organizations=organizations, teams=teams)
+        except (OSError, ValueError) as error:
+            raise click.ClickException(f"Failed reading snapshot {diff_against}: {error}")
+
+    write_output_files(global_results)
+    if previous_results is not None:
+        # Only the changes are written to stdout, no overview is rendered
+        click.echo(
+            generate_changes_report(diff_repository_indexes(previous_results, global_results), diff_against),
+            nl=False,
+        )
+        return
+    if (make_org_folders or make_team_files) and tee_output is False:
+        # Job done! No output to stdout
+        return
+
     if all(
-        len(global_results[org_name]) == 0
+        len(global_results.organizations[org_name]) == 0
         for org_name in organizations
     ):
         click.echo(f"No repositories found for teams {teams} in any of orgs {organizations}!", err=True)
-        click.exit(1)
+        sys.exit(1)
 
-    output_results = list()
-    for org_name in organizations:
-        output_results += global_results[org_name]
-    # click.echo(json.dumps(output_results, indent=2, default=serialize_sets), err=True)
+    output_results = global_results.organization_repositories(*organizations)
 
     # Tabulate and write output
-    # assert(len(list(output_results)) > 0)
-    markdown_output = generate_markdown_template(
-        repositories=output_results,
-        orgs=organizations,
+    _write_markdown_to_stdout(
+        output_results,
+        organizations=organizations,
         teams=teams,
+        repository_teams=global_results.repository_teams,
     )
-    click.echo(markdown_output)
+
+
+def lookup_repository_owners(
+    name_with_owners: typing.Iterable[str],
+    from_sqlite: typing.Optional[str] = None,
+    from_snapshot: typing.Optional[str] = None,
+) -> None:
+    """
+    Write the teams owning each of `name_with_owners` (and their permission) to stdout, one repository per line,
+    as saved by an earlier run in the SQLite database `from_sqlite` or the snapshot `from_snapshot`.
+    """
+    name_with_owners = list(name_with_owners)
+    if from_sqlite is not None:
+        try:
+            repository_owners = read_sqlite_repository_owners(from_sqlite, name_with_owners)
+        except sqlite3.Error as error:
+            raise click.ClickException(f"Failed reading repositories from {from_sqlite}: {error}")
+    else:
+        try:
+            # Only the team lines of the repositories' orgs are kept while reading
+            repoes_dataset = load_snapshot(
+                from_snapshot,
+                organizations={name_with_owner.partition('/')[0] for name_with_owner in name_with_owners},
+            )
+        except (OSError, ValueError) as error:
+            raise click.ClickException(f"Failed reading snapshot {from_snapshot}: {error}")
+        repository_owners = {
+            name_with_owner: [
+                (org_name, team_name, RELEVANT_PERMISSION)
+                for org_name, team_name in sorted(repoes_dataset.repository_teams[name_with_owner])
+            ]
+            for name_with_owner in name_with_owners
+            if name_with_owner in repoes_dataset.repository_teams
+        }
+
+    num_not_found = 0
+    for name_with_owner in name_with_owners:
+        if name_with_owner not in repository_owners:
+            click.echo(f"{name_with_owner}: not found, no team of the saved run owns it", err=True)
+            num_not_found += 1
+            continue
+        click.echo(
+            f"{name_with_owner}: " + ', '.join(
+                f"@{org_name}/{team_name} ({permission})"
+                for org_name, team_name, permission in repository_owners[name_with_owner]
+            )
+        )
+    if num_not_found:
+        sys.exit(1)
@@ -5,36 +5,91 @@ Module containing markdown-specific logic; writing files and making their conten
 
 # Python standard library imports
 import collections
+import concurrent.futures
+import hashlib
+import io
 import json
 import pathlib
 import textwrap
 import typing
 
 # Imports of module(s) internal to this project/package
-from rosahelikopter import GIT_REPO
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.files import (
+    temporary_path,
+    write_atomically,
+)
+from rosahelikopter.profiling import profiler
 
 
-def make_markdown_table(
-    repositories: typing.Iterable[GIT_REPO]
-) -> str:
+# Buffer size for Markdown files being written, rows are small so buffer a good few of them between writes
+MARKDOWN_FILE_BUFFER_SIZE = 64 * 1024
+
+
+# (org_name, team_name) pairs of the teams owning each repository by `nameWithOwner`
+_REPOSITORY_TEAMS = typing.Mapping[str, typing.Iterable[tuple[str, str]]]
+
+
+def write_markdown_table(
+    output: typing.TextIO,
+    repositories: typing.Iterable[Repository],
+    repositories_sorted: bool = False,
+    repository_teams: typing.Optional[_REPOSITORY_TEAMS] = None,
+) -> None:
+    """
+    Write the table of `repositories`, with a column of the teams owning each if `repository_teams` is given.
+    """
     # Table columns and horizontal justification
-    table_markdown_string = textwrap.dedent('''\
-        | Reponavn | Beskrivelse |
-        | :------: | :---------- |''')
+    if repository_teams is None:
+        output.write(textwrap.dedent('''\
+            | Reponavn | Beskrivelse |
+            | :------: | :---------- |'''))
+    else:
+        output.write(textwrap.dedent('''\
+            | Reponavn | Beskrivelse | Eiere |
+            | :------: | :---------- | :---- |'''))
 
-    # Table 'body'/contents
-    for repo in sorted(repositories, key=lambda r: r['nameWithOwner']):
-        desc, name = repo['description'], repo['nameWithOwner']
-        table_markdown_string += f"\n| [{name}]({repo['url']}) | {desc if desc else '**Mangler beskrivelse!**'} |"
+    # Table 'body'/contents, written row by row
+    if not repositories_sorted:
+        repositories = sorted(repositories, key=lambda r: r.nameWithOwner)
+    for repo in repositories:
+        desc, name = repo.description, repo.nameWithOwner
+        output.write(f"\n| [{name}]({repo.url}) | {desc if desc else '**Mangler beskrivelse!**'} |")
+        if repository_teams is not None:
+            # Looked up in the reverse index, instead of searching every team's repositories
+            owners = sorted(set(repository_teams.get(name, ())))
+            output.write(f" {', '.join(f'@{org_name}/{team_name}' for org_name, team_name in owners)} |")
 
-    return table_markdown_string + '\n'
+    output.write('\n')
 
 
-def generate_markdown_template(
+def make_markdown_table(
+    repositories: typing.Iterable[Repository],
+    repository_teams: typing.Optional[_REPOSITORY_TEAMS] = None,
+) -> str:
+    table_markdown = io.StringIO()
+    write_markdown_table(table_markdown, repositories, repository_teams=repository_teams)
+    return table_markdown.getvalue()
+
+
+def write_markdown_template(
+    output: typing.TextIO,
     orgs: typing.Iterable[str],
     teams: typing.Iterable[str],
-    repositories: typing.Iterable[GIT_REPO],
-) -> str:
+    repositories: typing.Iterable[Repository],
+    repositories_sorted: bool = False,
+    repository_teams: typing.Optional[_REPOSITORY_TEAMS] = None,
+) -> None:
+    """
+    Write the Markdown document straight to `output` (a file or stdout), piece by piece,
+    instead of putting the whole document together in memory first.
+    Pass `repositories_sorted` when `repositories` already come sorted by `nameWithOwner`
+    (and may be a one-shot iterator).
+    With `repository_teams`, the table lists the teams owning each repository.
+    """
     # List of orgs used in intro template below
     orgs_string = ', '.join(
         (
@@ -43,85 +98,249 @@ def generate_markdown_template(
         )
     )
 
-    # List of teams used in intro template below
+    # Write document intro
+    output.write(textwrap.dedent(f"""\
+    # Helikopteroversikt
+    Dette er en oversikt over Github repoer som ligger innunder organisasjonen(e); {orgs_string}
+
+    Tabelloversikten lister repoer som:
+      1. ikke er arkivert,
+      2. og som har følgende Github team(s) i organisasjonen(e) over listet som `ADMIN` i repoet\[1\]:
+    """))
+
+    # List of teams
     indent = ' ' * 5
-    teams_list = '\n'.join(
+    output.write('\n'.join(
         (
             f"{indent}- @{team}"
             for team in sorted(teams)
         )
+    ))
+    output.write('\n\n')
+
+    # Write table
+    output.write('## Repositories\n')
+    write_markdown_table(
+        output,
+        repositories,
+        repositories_sorted=repositories_sorted,
+        repository_teams=repository_teams,
     )
 
-    # Make document intro
-    doc_body = textwrap.dedent(f"""\
-    # Helikopteroversikt
-    Dette er en oversikt over Github repoer som ligger innunder organisasjonen(e); {orgs_string}
+    # Write footer
+    output.write(textwrap.dedent('''\
 
-    Tabelloversikten lister repoer som:
-      1. ikke er arkivert,
-      2. og som har følgende Github team(s) i organisasjonen(e) over listet som `ADMIN` i repoet\[1\]:
-    """)
-    doc_body += f"{teams_list}\n\n"
+        \\[1\\]: \\<Github repo url> -> `Settings` fane -> `Access Management`.
+    '''))
+
+
+def generate_markdown_template(
+    orgs: typing.Iterable[str],
+    teams: typing.Iterable[str],
+    repositories: typing.Iterable[Repository],
+    repository_teams: typing.Optional[_REPOSITORY_TEAMS] = None,
+) -> str:
+    doc_body = io.StringIO()
+    write_markdown_template(
+        doc_body,
+        orgs=orgs,
+        teams=teams,
+        repositories=repositories,
+        repository_teams=repository_teams,
+    )
+    return doc_body.getvalue()
 
-    # Add table
-    doc_body += '## Repositories\n'
-    doc_body += make_markdown_table(repositories)
 
-    # Add footer
-    doc_body += textwrap.dedent('''\
+# Digests of the files written by the last run, relative to the directory they were written in
+MARKDOWN_FILES_MANIFEST_NAME = '.rosahelikopter-manifest.json'
+
+
+class MarkdownFilesSummary(typing.NamedTuple):
+    written: int
+    unchanged: int
+    removed: int
+
+
+class _DigestingWriter:
+    """
+    Writes text on to `output`, keeping a digest of everything written.
+    """
+
+    def __init__(self, output: typing.TextIO) -> None:
+        self.output = output
+        self.digest = hashlib.sha256()
+
+    def write(self, text: str) -> int:
+        self.digest.update(text.encode())
+        return self.output.write(text)
+
+
+def write_markdown_file(
+    output_file: pathlib.Path,
+    last_digest: typing.Optional[str],
+    orgs: typing.Iterable[str],
+    teams: typing.Iterable[str],
+    repositories: typing.Iterable[Repository],
+    repository_teams: typing.Optional[_REPOSITORY_TEAMS] = None,
+) -> tuple[str, bool]:
+    """
+    Render the file straight into a temporary file next to it, digesting the content on the way,
+    and only replace the file with it if its content differs from when `last_digest` was made.
+    Returns the digest of the content and whether the file was written.
+    """
+    # Not `rosahelikopter.files.replacing()`, the file is only replaced when changed
+    rendered_path = temporary_path(output_file)
+    try:
+        with profiler.span('render'), rendered_path.open('w', buffering=MARKDOWN_FILE_BUFFER_SIZE) as output:
+            digesting_output = _DigestingWriter(output)
+            write_markdown_template(
+                digesting_output,
+                orgs=orgs,
+                teams=teams,
+                repositories=repositories,
+                repository_teams=repository_teams,
+            )
+        digest = digesting_output.digest.hexdigest()
+        if digest == last_digest and output_file.is_file():
+            return digest, False
+
+        with profiler.span('write file'):
+            rendered_path.replace(output_file)
+    finally:
+        # Left behind when unchanged, or when rendering failed
+        rendered_path.unlink(missing_ok=True)
+    profiler.count('files written')
+    return digest, True
 
-        \\[1\\]: \\<Github repo url> -> `Settings` fane -> `Access Management`.
-    ''')
-    return doc_body
+
+def _load_markdown_files_manifest(manifest_path: pathlib.Path) -> dict[str, str]:
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        # No (readable) manifest, every file is written
+        return dict()
+    if not isinstance(manifest, dict):
+        return dict()
+    return {
+        relative_path: digest
+        for relative_path, digest in manifest.items()
+        if isinstance(relative_path, str) and isinstance(digest, str)
+    }
+
+
+def _is_within(path: pathlib.Path, directory: pathlib.Path) -> bool:
+    try:
+        path.resolve().relative_to(directory.resolve())
+    except ValueError:
+        return False
+    return True
 
 
 def write_markdown_files(
-    repoes_dataset: dict[str, list[GIT_REPO]],
+    repoes_dataset: RepositoryIndex,
     organizations: typing.Iterable[str],
     teams: typing.Iterable[str],
     make_org_folders: bool,
     make_team_files: bool,
-) -> None:
+    num_workers: int = 1,
+) -> MarkdownFilesSummary:
+    """
+    Write the files specified by the flags, skipping files whose content did not change since the last run
+    and removing files written by an earlier run which are no longer part of the output.
+    The manifest is shared by runs of different orgs/teams/flags in the same directory, and only files this run
+    could have written (e.g. `<team>.md` of its `teams`) are ever removed, so runs never remove each other's files.
+    """
+    base_output_dir = pathlib.Path.cwd()
+    manifest_path = base_output_dir / MARKDOWN_FILES_MANIFEST_NAME
+    last_manifest = _load_markdown_files_manifest(manifest_path)
+
+    # Work out every file to write (and with which content) up front, then render and write them with
+    #   `num_workers` threads. Keyed by path, as without org folders every org would write the same team files.
+    markdown_files, owned_paths = dict(), set()
     for org_name in organizations:
+        file_output_dir = base_output_dir / org_name if make_org_folders else base_output_dir
+        # Every file this run could write, whether or not there's anything to write to it
+        owned_paths.update(
+            (file_output_dir / file_name).relative_to(base_output_dir).as_posix()
+            for file_name in ([f"{team}.md" for team in teams] if make_team_files else ['overview.md'])
+        )
+
+        if len(repoes_dataset.organizations[org_name]) == 0:
+            # Nothing to write for this org
+            continue
+
         # First set-up folder if flag is set
-        file_output_dir = pathlib.Path.cwd()
-        if make_org_folders and len(repoes_dataset[org_name]) > 0:
-            file_output_dir = file_output_dir / org_name
+        if make_org_folders:
             file_output_dir.mkdir(exist_ok=True)
 
-        # Then, write to file specified with CLI options/flags
+        # Then, add files specified with CLI options/flags
         if make_team_files:
             for team in teams:
-                # Filter out repoes depending on `make_org_folders` flag and sort them
-                file_specific_team_repoes = [
-                    repo for repo in repoes_dataset[team]
-                    if make_org_folders is False or (
-                        make_org_folders and repo['nameWithOwner'].startswith(f"{org_name}/")
-                    )
-                ]
+                # Filter out repoes depending on `make_org_folders` flag
+                file_specific_team_repoes = repoes_dataset.team_repositories(
+                    team,
+                    org_name=org_name if make_org_folders else None,
+                )
                 if len(file_specific_team_repoes) == 0:
                     continue
 
                 # Write to team-named file, but use the `file_output_dir` variable
                 # to respect the logic of `make_org_folders`:
-                output_file = file_output_dir / f"{team}.md"
-                output_file.write_text(
-                    generate_markdown_template(
-                        teams=(team, ),
-                        orgs=(org_name, ) if make_org_folders is True else organizations,
-                        repositories=file_specific_team_repoes,
-                    )
-                )
-        else:
-            if len(repoes_dataset[org_name]) == 0:
-                file_output_dir.rmdir()
-                continue
-            output_file = file_output_dir / "overview.md"
-            output_file.write_text(
-                generate_markdown_template(
-                    teams=teams,
+                markdown_files[file_output_dir / f"{team}.md"] = dict(
+                    teams=(team, ),
                     orgs=(org_name, ) if make_org_folders is True else organizations,
-                    repositories=repoes_dataset[org_name],
+                    repositories=file_specific_team_repoes,
                 )
+        else:
+            markdown_files[file_output_dir / "overview.md"] = dict(
+                teams=teams,
+                orgs=(org_name, ) if make_org_folders is True else organizations,
+                repositories=repoes_dataset.organization_repositories(org_name),
             )
-    return
+
+    manifest, num_written = dict(), 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = {
+            executor.submit(
+                write_markdown_file,
+                output_file,
+                last_digest=last_manifest.get(output_file.relative_to(base_output_dir).as_posix()),
+                repository_teams=repoes_dataset.repository_teams,
+                **markdown_file,
+            ): output_file.relative_to(base_output_dir).as_posix()
+            for output_file, markdown_file in markdown_files.items()
+        }
+        # Raises the first error, if any
+        for future in concurrent.futures.as_completed(futures):
+            manifest[futures[future]], written = future.result()
+            num_written += written
+
+    # Remove files of earlier runs which are no longer part of the output, e.g. for teams without repositories
+    num_removed = 0
+    for relative_path in (last_manifest.keys() & owned_paths) - manifest.keys():
+        stale_file = base_output_dir / relative_path
+        if not _is_within(stale_file, base_output_dir):
+            # E.g. a team named `../<something>`, never removed
+            continue
+        try:
+            stale_file.unlink()
+        except FileNotFoundError:
+            continue
+        num_removed += 1
+        if stale_file.parent != base_output_dir and not any(stale_file.parent.iterdir()):
+            # Org folder left empty
+            stale_file.parent.rmdir()
+
+    # Files of other runs are kept in the manifest as they were
+    merged_manifest = {
+        relative_path: digest
+        for relative_path, digest in last_manifest.items()
+        if relative_path not in owned_paths
+    }
+    merged_manifest.update(manifest)
+    write_atomically(manifest_path, json.dumps(merged_manifest, indent=2, sort_keys=True) + '\n')
+    return MarkdownFilesSummary(
+        written=num_written,
+        unchanged=len(manifest) - num_written,
+        removed=num_removed,
+    )
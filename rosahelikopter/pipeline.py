@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Sub-module for streaming runs; fetched repository edges flow through filter -> sink stages connected by
+bounded queues, into an external sort which keeps memory bounded however many repositories there are.
+"""
+
+# Python standard library imports
+import asyncio
+import heapq
+import itertools
+import json
+import tempfile
+import typing
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    STREAM_BUFFER_SIZE,
+    Repository,
+    filter_repositories,
+)
+from rosahelikopter.profiling import profiler
+
+
+# Number of pages (and repositories) in flight between stages, fetching waits for the stages when exceeded
+STREAM_QUEUE_SIZE = 64
+
+# A repository along with the (org_name, team_name) pairs of the teams owning it
+_OWNED_REPOSITORY = tuple[Repository, list[tuple[str, str]]]
+
+
+class ExternalSorter:
+    """
+    Sorts repositories by `nameWithOwner`, dropping duplicates, while holding at most `max_records_in_memory`
+    of them in memory; spilling sorted runs to temporary files and merging them at the end.
+    The owners a repository is added with are kept, merged over its duplicates.
+    """
+
+    def __init__(
+        self,
+        max_records_in_memory: int = STREAM_BUFFER_SIZE,
+        temporary_dir: typing.Optional[str] = None,
+    ) -> None:
+        self.max_records_in_memory = max_records_in_memory
+        self.temporary_dir = temporary_dir
+        self.num_runs_spilled = 0
+
+        self._records: list[_OWNED_REPOSITORY] = list()
+        self._run_files: list[typing.IO] = list()
+
+    def __enter__(self) -> 'ExternalSorter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, repository: Repository, owner: typing.Optional[tuple[str, str]] = None) -> None:
+        self._records.append((repository, [owner] if owner is not None else []))
+        if len(self._records) >= self.max_records_in_memory:
+            self._spill()
+
+    def _spill(self) -> None:
+        with profiler.span('spill'):
+            run_file = tempfile.TemporaryFile('w+', dir=self.temporary_dir)
+            run_file.writelines(
+                json.dumps(owned_repository) + '\n'
+                for owned_repository in self._unique(sorted(self._records, key=lambda r: r[0].nameWithOwner))
+            )
+            run_file.seek(0)
+        self._run_files.append(run_file)
+        self._records = list()
+        self.num_runs_spilled += 1
+
+    @staticmethod
+    def _read_run(run_file: typing.IO) -> typing.Iterator[_OWNED_REPOSITORY]:
+        for line in run_file:
+            repository, owners = json.loads(line)
+            yield Repository(*repository), [tuple(owner) for owner in owners]
+
+    @staticmethod
+    def _unique(owned_repositories: typing.Iterable[_OWNED_REPOSITORY]) -> typing.Iterator[_OWNED_REPOSITORY]:
+        # Duplicates are next to each other once sorted, keep the first of them along with the owners of all of them
+        for _, duplicates in itertools.groupby(owned_repositories, key=lambda r: r[0].nameWithOwner):
+            repository, owners = next(duplicates)
+            owners = set(owners)
+            for _, duplicate_owners in duplicates:
+                owners.update(duplicate_owners)
+            yield repository, sorted(owners)
+
+    def sorted_unique(self) -> typing.Iterator[Repository]:
+        """
+        Returns an iterator over all repositories added, sorted by `nameWithOwner` and without duplicates.
+        """
+        return (repository for repository, _ in self.sorted_unique_with_owners())
+
+    def sorted_unique_with_owners(self) -> typing.Iterator[_OWNED_REPOSITORY]:
+        """
+        As `sorted_unique()`, along with the (sorted) owners each repository was added with.
+        """
+        return self._unique(
+            heapq.merge(
+                sorted(self._records, key=lambda r: r[0].nameWithOwner),
+                *(self._read_run(run_file) for run_file in self._run_files),
+                key=lambda r: r[0].nameWithOwner,
+            )
+        )
+
+    def close(self) -> None:
+        for run_file in self._run_files:
+            run_file.close()
+        self._run_files = list()
+        self._records = list()
+
+
+async def stream_relevant_repositories(
+    fetch_repository_pages: typing.Callable[[typing.Callable], typing.Awaitable],
+    repository_sorter: ExternalSorter,
+    queue_size: int = STREAM_QUEUE_SIZE,
+) -> tuple[int, int]:
+    """
+    Run `fetch_repository_pages(page_consumer=...)` with the pages it hands to `page_consumer` flowing through
+    a filter stage (keeping repositories relevant for the overview) and into `repository_sorter`,
+    each repository added with the org/team of the page it was on as owner.
+    Fetching waits for the stages whenever `queue_size` pages (or repositories) are waiting between them.
+    Returns the number of repository edges fetched and discarded.
+    """
+    pages = asyncio.Queue(maxsize=queue_size)
+    repositories = asyncio.Queue(maxsize=queue_size)
+    num_fetched_edges, num_discarded_edges = 0, 0
+
+    async def consume_page(org_name: str, team_name: str, edges: list[dict]) -> None:
+        await pages.put((org_name, team_name, edges))
+
+    async def fetch_stage() -> None:
+        try:
+            await fetch_repository_pages(page_consumer=consume_page)
+        finally:
+            # Tell the next stage that nothing more is coming
+            await pages.put(None)
+
+    async def filter_stage() -> None:
+        nonlocal num_fetched_edges, num_discarded_edges
+        while True:
+            page = await pages.get()
+            if page is None:
+                break
+            org_name, team_name, edges = page
+            with profiler.span('filter'):
+                relevant_repositories, num_discarded_page_edges = filter_repositories(edges)
+            num_fetched_edges += len(edges)
+            num_discarded_edges += num_discarded_page_edges
+            for repository in relevant_repositories:
+                await repositories.put((repository, (org_name, team_name)))
+        await repositories.put(None)
+
+    async def sink_stage() -> None:
+        while True:
+            owned_repository = await repositories.get()
+            if owned_repository is None:
+                break
+            repository_sorter.add(*owned_repository)
+
+    await asyncio.gather(fetch_stage(), filter_stage(), sink_stage())
+    return num_fetched_edges, num_discarded_edges
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Sub-module for instrumenting runs; timing spans of work (query building, HTTP round-trips, JSON decoding,
+filtering, rendering etc.) and counting pages, edges, bytes and retries.
+
+Everything is recorded on the module-level `profiler`, which does nothing (at next to no cost) until enabled.
+"""
+
+# Python standard library imports
+import collections
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+import typing
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'started_at')
+
+    def __init__(self, profiler: 'Profiler', name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> '_Span':
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler._record_span(self.name, self.started_at, time.perf_counter())
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NoSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Profiler:
+    """
+    Records spans (`with profiler.span('name'): ...`) and counters (`profiler.count('name', n)`) once enabled.
+    Spans are kept per thread and asyncio task, so that concurrent spans can be told apart in a Chrome trace.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        # (name, started at, finished at, process id, thread ident, task id)
+        self.spans: list[tuple[str, float, float, int, int, int]] = list()
+        self.counters: collections.Counter = collections.Counter()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.reset()
+
+    def reset(self) -> None:
+        # Forget everything recorded so far, e.g. between the refreshes of a watch run
+        self.started_at = time.perf_counter()
+        self.spans.clear()
+        with self._lock:
+            self.counters.clear()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str) -> typing.ContextManager:
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def count(self, name: str, value: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+    def export(self) -> tuple[list, dict, float]:
+        """
+        Returns the spans and counters recorded, for `merge()` into the profiler of another process
+        (e.g. of a worker process into the parent's), along with the offset of this process' clock.
+        """
+        # `time.perf_counter()` has no defined reference point, so spans are shifted by way of the wall clock
+        return self.spans, dict(self.counters), time.time() - time.perf_counter()
+
+    def merge(self, exported: tuple[list, dict, float]) -> None:
+        spans, counters, clock_offset = exported
+        shift = clock_offset - (time.time() - time.perf_counter())
+        with self._lock:
+            self.spans += [
+                (name, started_at + shift, finished_at + shift, *span_ids)
+                for name, started_at, finished_at, *span_ids in spans
+            ]
+            self.counters.update(counters)
+
+    def _record_span(self, name: str, started_at: float, finished_at: float) -> None:
+        # Not imported here, runs which never start an event loop (e.g. `--help`) shouldn't import asyncio
+        asyncio = sys.modules.get('asyncio')
+        try:
+            task_id = id(asyncio.current_task()) if asyncio is not None else 0
+        except RuntimeError:
+            # Not in an event loop
+            task_id = 0
+        # Appending to a list is atomic, no lock needed
+        self.spans.append((name, started_at, finished_at, os.getpid(), threading.get_ident(), task_id))
+
+    def summary(self) -> str:
+        """
+        Returns a table of the number of, total and mean/max duration of spans by name, followed by the counters.
+        """
+        durations = collections.defaultdict(list)
+        for name, started_at, finished_at, _, _, _ in self.spans:
+            durations[name].append(finished_at - started_at)
+
+        rows = [f"{'Span':<24} {'Count':>8} {'Total (s)':>10} {'Mean (ms)':>10} {'Max (ms)':>10}"]
+        for name, span_durations in sorted(durations.items(), key=lambda item: -sum(item[1])):
+            rows.append(
+                f"{name:<24} {len(span_durations):>8} {sum(span_durations):>10.3f}"
+                f" {1000 * sum(span_durations) / len(span_durations):>10.2f} {1000 * max(span_durations):>10.2f}"
+            )
+        rows.append('')
+        rows.append(f"{'Counter':<24} {'Value':>8}")
+        rows += [
+            f"{name:<24} {value:>8}"
+            for name, value in sorted(self.counters.items())
+        ]
+        return '\n'.join(rows)
+
+    def chrome_trace(self) -> dict:
+        """
+        Returns the spans as a Chrome trace (for chrome://tracing or https://ui.perfetto.dev),
+        with one track per process, thread and asyncio task, and the counters under `otherData`.
+        """
+        track_ids = dict()
+        trace_events = list()
+        for name, started_at, finished_at, pid, thread_ident, task_id in self.spans:
+            track_id = track_ids.setdefault((pid, thread_ident, task_id), len(track_ids))
+            trace_events.append(
+                dict(
+                    name=name,
+                    ph='X',
+                    ts=1e6 * (started_at - self.started_at),
+                    dur=1e6 * (finished_at - started_at),
+                    pid=pid,
+                    tid=track_id,
+                )
+            )
+        return dict(
+            traceEvents=trace_events,
+            displayTimeUnit='ms',
+            otherData=dict(self.counters),
+        )
+
+    def write_chrome_trace(self, path: pathlib.Path) -> None:
+        pathlib.Path(path).write_text(json.dumps(self.chrome_trace()))
+
+
+profiler = Profiler()
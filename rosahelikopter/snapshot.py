@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Sub-module for snapshots of a run; saving the repositories fetched (by org/team) to a compressed file,
+for later runs to render Markdown from without fetching anything.
+
+A snapshot is gzipped JSON Lines: a header, then each repository once, then the repositories of each
+org/team combination by `nameWithOwner`. It is read line by line, never decompressed whole into memory.
+"""
+
+# Python standard library imports
+import gzip
+import json
+import pathlib
+import typing
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.files import open_atomically
+from rosahelikopter.profiling import profiler
+
+
+SNAPSHOT_FORMAT = 'rosahelikopter-snapshot'
+SNAPSHOT_VERSION = 1
+# Compressing harder barely shrinks snapshots further, but takes a lot longer
+SNAPSHOT_COMPRESSION_LEVEL = 6
+
+
+def save_snapshot(path: pathlib.Path, repoes_dataset: RepositoryIndex) -> None:
+    with profiler.span('save snapshot'), open_atomically(
+        path, 'wt', opener=gzip.open, encoding='utf-8', compresslevel=SNAPSHOT_COMPRESSION_LEVEL,
+    ) as snapshot:
+        snapshot.write(json.dumps(dict(format=SNAPSHOT_FORMAT, version=SNAPSHOT_VERSION)) + '\n')
+        snapshot.writelines(
+            json.dumps(['repository', *repoes_dataset.repositories[name_with_owner]], ensure_ascii=False) + '\n'
+            for name_with_owner in sorted(repoes_dataset.repositories)
+        )
+        snapshot.writelines(
+            json.dumps(['team', org_name, team_name, sorted(name_with_owners)], ensure_ascii=False) + '\n'
+            for (org_name, team_name), name_with_owners in sorted(repoes_dataset.organization_teams.items())
+            if name_with_owners
+        )
+
+
+def load_snapshot(
+    path: pathlib.Path,
+    organizations: typing.Optional[typing.Iterable[str]] = None,
+    teams: typing.Optional[typing.Iterable[str]] = None,
+) -> RepositoryIndex:
+    """
+    Read the repositories of `teams` in `organizations` (all of either if `None`) from a snapshot
+    written by `save_snapshot`. Raises `ValueError` if the file is not such a snapshot (or is truncated),
+    `OSError` if it can not be read.
+    """
+    organizations = set(organizations) if organizations is not None else None
+    teams = set(teams) if teams is not None else None
+    repositories: dict[str, Repository] = dict()
+    repoes_dataset = RepositoryIndex()
+    try:
+        with profiler.span('load snapshot'), gzip.open(path, 'rt', encoding='utf-8') as snapshot:
+            header = json.loads(snapshot.readline() or 'null')
+            if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+                raise ValueError(f"{path} is not a rosahelikopter snapshot")
+            if header.get('version') != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is a version {header.get('version')} snapshot, expected {SNAPSHOT_VERSION}")
+
+            try:
+                for line in snapshot:
+                    kind, *fields = json.loads(line)
+                    if kind == 'repository':
+                        repositories[fields[0]] = Repository(*fields)
+                    elif kind == 'team':
+                        org_name, team_name, name_with_owners = fields
+                        if (
+                            organizations is not None and org_name not in organizations
+                            or teams is not None and team_name not in teams
+                        ):
+                            continue
+                        for name_with_owner in name_with_owners:
+                            repoes_dataset.add(org_name, team_name, repositories[name_with_owner])
+            except (KeyError, IndexError, TypeError) as error:
+                raise ValueError(f"{path} is not a valid snapshot: {error!r}")
+    except EOFError as error:
+        # Cut short, e.g. by a full disk or an interrupted copy
+        raise ValueError(f"{path} is a truncated snapshot: {error}")
+    return repoes_dataset
@@ -4,31 +4,93 @@
 import textwrap
 
 
-GRAPHQL_GITHUB_REPOS_QUERY_STRING = textwrap.dedent("""\
-    query {{
-      organization(login: "{org_name}") {{
-        teams(first: 1, query: "{team_name}") {{
-          edges {{
-            node {{
-              ... on Team {{
-                repositories({repo_query_string}) {{
-                  pageInfo {{
-                    endCursor
-                    hasNextPage
-                }}
-                  totalCount
-                  edges {{
-                    permission
-                    node {{
-                      description
-                      nameWithOwner
-                      url
-                      isArchived
-                    }}
-                  }}
-                }}
-              }}
-            }}
+# The `repositories` connection of a team, shared by the templates below (indented when put together).
+GRAPHQL_GITHUB_TEAM_REPOSITORIES_CONNECTION_STRING = textwrap.dedent("""\
+    repositories({repo_query_string}) {{
+      pageInfo {{
+        endCursor
+        hasNextPage
+      }}
+      totalCount
+      edges {{
+        permission
+        node {{
+          description
+          nameWithOwner
+          url
+          isArchived
+          updatedAt
+        }}
+      }}
+    }}""")
+
+# Templates for packing several org/team combinations into one query document using GraphQL aliases.
+#   `GRAPHQL_GITHUB_BATCHED_REPOS_QUERY_STRING` holds one or more `..._ORGANIZATION_QUERY_STRING`s,
+#   which in turn hold one or more `..._TEAM_BY_SLUG_QUERY_STRING`s each.
+#   Org names, team names and continuation tokens are passed as variables, so that the query document
+#   only depends on the number of org/team combinations packed into it.
+GRAPHQL_GITHUB_BATCHED_REPOS_QUERY_STRING = textwrap.dedent("""\
+    query({variable_definitions}) {{
+      rateLimit {{
+        cost
+        limit
+        remaining
+        resetAt
+      }}
+    {organization_queries}
+    }}""")
+GRAPHQL_GITHUB_BATCHED_ORGANIZATION_QUERY_STRING = textwrap.dedent("""\
+    {organization_alias}: organization(login: ${organization_variable}) {{
+    {team_queries}
+    }}""")
+GRAPHQL_GITHUB_BATCHED_TEAM_BY_SLUG_QUERY_STRING = textwrap.dedent("""\
+    {team_alias}: team(slug: ${team_variable}) {{
+    {repositories_connection}
+    }}""")
+
+# Template for crawling all teams of an org, along with the first page of each team's repositories
+GRAPHQL_GITHUB_ORGANIZATION_TEAMS_QUERY_STRING = textwrap.dedent("""\
+    query($org_name: String!, $after: String) {{
+      rateLimit {{
+        cost
+        limit
+        remaining
+        resetAt
+      }}
+      organization(login: $org_name) {{
+        teams({teams_query_string}) {{
+          pageInfo {{
+            endCursor
+            hasNextPage
+          }}
+          nodes {{
+            slug
+            name
+    {repositories_connection}
+          }}
+        }}
+      }}
+    }}""")
+
+# Template for paging through all teams of an org (without their repositories), to resolve team names to slugs
+GRAPHQL_GITHUB_ORGANIZATION_TEAM_SLUGS_QUERY_STRING = textwrap.dedent("""\
+    query($org_name: String!, $after: String) {{
+      rateLimit {{
+        cost
+        limit
+        remaining
+        resetAt
+      }}
+      organization(login: $org_name) {{
+        teams({teams_query_string}) {{
+          pageInfo {{
+            endCursor
+            hasNextPage
+          }}
+          nodes {{
+            id
+            slug
+            name
           }}
         }}
       }}
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Sub-module for resolving team names to teams; indexing the teams of each org by slug and by name,
+and keeping the indexes on disk between runs.
+"""
+
+# Python standard library imports
+import pathlib
+import typing
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter.cache import ResponseCache
+
+
+# A team as resolved: {'id': <node ID>, 'slug': <slug>, 'name': <name>}
+_TEAM = dict[str, str]
+
+
+def make_team_index(teams: typing.Iterable[_TEAM]) -> dict[str, _TEAM]:
+    """
+    Index teams by (lower-cased) name and slug, slugs taking precedence when a team is named as another's slug.
+    """
+    teams = list(teams)
+    team_index = {team['name'].lower(): team for team in teams}
+    team_index.update((team['slug'].lower(), team) for team in teams)
+    return team_index
+
+
+class TeamIndexCache(ResponseCache):
+    """
+    On-disk cache of the teams of each org, an entry per org in a `ResponseCache` (without eviction).
+    Entries older than `ttl` seconds count as misses. With `refresh` set, every lookup is a miss
+    but fetched teams are still stored.
+    """
+
+    def __init__(
+        self,
+        cache_dir: pathlib.Path,
+        ttl: float,
+        refresh: bool = False,
+    ) -> None:
+        super().__init__(cache_dir, ttl=ttl, max_size=0, refresh=refresh)
+
+    def load(self, org_name: str) -> typing.Optional[list[_TEAM]]:
+        entry = self.get(org_name, '', '')
+        return entry['page'] if entry is not None else None
+
+    def save(self, org_name: str, teams: list[_TEAM]) -> None:
+        self.put(org_name, '', '', teams)
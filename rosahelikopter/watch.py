@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Sub-module for watch runs; refreshing the repositories on a schedule from one long-running process,
+keeping the latest of them in memory and (optionally) serving overviews of them over HTTP.
+"""
+
+# Python standard library imports
+import http.server
+import itertools
+import json
+import threading
+import time
+import traceback
+import typing
+import urllib.parse
+
+# Non-standard library python package imports
+import click
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import RepositoryIndex
+from rosahelikopter.markdown import generate_markdown_template
+from rosahelikopter.profiling import profiler
+
+
+class _OverviewRequestHandler(http.server.BaseHTTPRequestHandler):
+    server: 'OverviewServer'
+
+    def do_GET(self) -> None:
+        path_parts = [
+            urllib.parse.unquote(path_part)
+            for path_part in urllib.parse.urlsplit(self.path).path.split('/')
+            if path_part
+        ]
+        if path_parts == ['status']:
+            self._respond(200, 'application/json', json.dumps(self.server.status()))
+            return
+        if self.server.repoes_dataset is None:
+            self._respond(503, 'text/plain', 'Not refreshed yet, try again shortly.\n')
+            return
+
+        overview = self.server.render_overview(path_parts)
+        if overview is None:
+            self._respond(404, 'text/plain', f"No overview at {self.path}\n")
+            return
+        self._respond(200, 'text/markdown', overview)
+
+    def _respond(self, status: int, content_type: str, body: str) -> None:
+        body_bytes = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(body_bytes)))
+        self.end_headers()
+        self.wfile.write(body_bytes)
+
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        if self.server.verbosity_level >= 2:
+            click.echo(f"{self.address_string()} - {format % args}", err=True)
+
+
+class OverviewServer(http.server.ThreadingHTTPServer):
+    """
+    Serves overviews of the latest repositories (see `update()`) as Markdown:
+    `/` for all orgs, `/orgs/<org>` for one org and `/orgs/<org>/teams/<team>` for one team in an org,
+    along with the time of and number of refreshes as JSON at `/status`.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        organizations: typing.Iterable[str],
+        teams: typing.Iterable[str],
+        verbosity_level: int = 0,
+    ) -> None:
+        super().__init__(server_address, _OverviewRequestHandler)
+        self.organizations = list(organizations)
+        self.teams = list(teams)
+        self.verbosity_level = verbosity_level
+
+        self.repoes_dataset: typing.Optional[RepositoryIndex] = None
+        self.refreshed_at: typing.Optional[float] = None
+        self.num_refreshes = 0
+        self.last_error: typing.Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def update(self, repoes_dataset: RepositoryIndex) -> None:
+        # Swapped in whole, requests being served keep rendering the repositories they started with
+        self.repoes_dataset = repoes_dataset
+        self.refreshed_at = time.time()
+        self.num_refreshes += 1
+        self.last_error = None
+
+    def status(self) -> dict:
+        return dict(
+            refreshed_at=self.refreshed_at,
+            num_refreshes=self.num_refreshes,
+            num_repositories=len(self.repoes_dataset.repositories) if self.repoes_dataset is not None else 0,
+            last_error=self.last_error,
+        )
+
+    def render_overview(self, path_parts: list[str]) -> typing.Optional[str]:
+        repoes_dataset = self.repoes_dataset
+        if not path_parts:
+            return generate_markdown_template(
+                orgs=self.organizations,
+                teams=self.teams,
+                repositories=repoes_dataset.organization_repositories(*self.organizations),
+                repository_teams=repoes_dataset.repository_teams,
+            )
+        if path_parts[0] != 'orgs' or len(path_parts) not in (2, 4) or path_parts[1] not in self.organizations:
+            return None
+        org_name = path_parts[1]
+        if len(path_parts) == 2:
+            return generate_markdown_template(
+                orgs=(org_name, ),
+                teams=self.teams,
+                repositories=repoes_dataset.organization_repositories(org_name),
+                repository_teams=repoes_dataset.repository_teams,
+            )
+        if path_parts[2] != 'teams' or path_parts[3] not in self.teams:
+            return None
+        team_name = path_parts[3]
+        return generate_markdown_template(
+            orgs=(org_name, ),
+            teams=(team_name, ),
+            repositories=repoes_dataset.team_repositories(team_name, org_name=org_name),
+            repository_teams=repoes_dataset.repository_teams,
+        )
+
+
+def watch_repositories(
+    refresh: typing.Callable[[], RepositoryIndex],
+    organizations: typing.Iterable[str],
+    teams: typing.Iterable[str],
+    interval: float,
+    serve_address: typing.Optional[tuple[str, int]] = None,
+    verbosity_level: int = 0,
+    max_refreshes: typing.Optional[int] = None,
+) -> None:
+    """
+    Call `refresh()` every `interval` seconds (counted from the start of the last refresh) until interrupted,
+    or `max_refreshes` times if given. With `serve_address`, an `OverviewServer` serves the repositories
+    of the latest successful refresh. Failed refreshes (raising any `Exception`) are reported and retried
+    at the next interval, while the last repositories are still served.
+    With the `profiler` enabled, it is reset before each refresh, keeping the timings of the last refresh only.
+    """
+    server = None
+    if serve_address is not None:
+        server = OverviewServer(serve_address, organizations, teams, verbosity_level=verbosity_level)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        if verbosity_level >= 0:
+            click.echo(f"Serving overviews at {server.url}", err=True)
+
+    try:
+        for num_refreshes in itertools.count(1):
+            started_at = time.monotonic()
+            if profiler.enabled:
+                # Spans would pile up for as long as the watch runs
+                profiler.reset()
+            try:
+                with profiler.span('refresh'):
+                    repoes_dataset = refresh()
+            except Exception as error:
+                # Unexpected errors too, the next refresh may well succeed
+                error_message = (
+                    error.format_message()
+                    if isinstance(error, click.ClickException) else
+                    f"{type(error).__name__}: {error}"
+                )
+                click.echo(f"Refresh failed: {error_message}", err=True)
+                if verbosity_level >= 1 and not isinstance(error, click.ClickException):
+                    click.echo(traceback.format_exc(), err=True, nl=False)
+                if server is not None:
+                    server.last_error = error_message
+            else:
+                if server is not None:
+                    server.update(repoes_dataset)
+                if verbosity_level >= 1:
+                    click.echo(
+                        (
+                            f"Refreshed {len(repoes_dataset.repositories)} repositories"
+                            f" in {time.monotonic() - started_at:.1f}s"
+                        ),
+                        err=True,
+                    )
+
+            if max_refreshes is not None and num_refreshes >= max_refreshes:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - started_at)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import pathlib
+import tempfile
+from typing import (
+    List,
+    Tuple,
+)
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter.cache import ResponseCache
+
+
+@given(
+    st.lists(
+        st.tuples(st.text(min_size=1), st.text(min_size=1), st.text()),
+        min_size=1,
+        unique=True,
+    ),
+)
+def ensure_cached_pages_are_returned_until_evicted(
+    cache_keys: List[Tuple[str, str, str]],
+) -> None:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        response_cache = ResponseCache(cache_dir=pathlib.Path(cache_dir), ttl=60, max_size=0)
+        for org_name, team_name, page_parameters in cache_keys:
+            assert response_cache.get(org_name, team_name, page_parameters) is None
+            response_cache.put(org_name, team_name, page_parameters, dict(edges=[org_name, team_name]))
+
+        for org_name, team_name, page_parameters in cache_keys:
+            cached_entry = response_cache.get(org_name, team_name, page_parameters)
+            assert cached_entry['page'] == dict(edges=[org_name, team_name])
+        assert (response_cache.hits, response_cache.misses) == (len(cache_keys), len(cache_keys))
+
+        # Everything is evicted when the cache may not take up any space
+        assert response_cache.evict() == len(cache_keys)
+        assert all(
+            response_cache.get(*cache_key) is None
+            for cache_key in cache_keys
+        )
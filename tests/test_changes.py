@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.changes import (
+    diff_repository_indexes,
+    generate_changes_report,
+)
+
+
+# (repository number, team, description)
+index_entries = st.lists(
+    st.tuples(
+        st.integers(min_value=0, max_value=10),
+        st.sampled_from(('aura', 'nais', 'naisdevice')),
+        st.sampled_from((None, '', 'An app', 'Another app')),
+    ),
+    max_size=30,
+)
+
+
+def _make_index(entries: List[Tuple[int, str, Optional[str]]]) -> RepositoryIndex:
+    repoes_dataset = RepositoryIndex()
+    for number, team_name, description in entries:
+        name_with_owner = f"navikt/repo-{number}"
+        # The first record of a repository is kept, descriptions of later ones are ignored
+        repoes_dataset.add(
+            'navikt',
+            team_name,
+            Repository(name_with_owner, f"https://github.com/{name_with_owner}", description, False),
+        )
+    return repoes_dataset
+
+
+@given(index_entries, index_entries)
+def ensure_changes_are_found_by_name_with_owner(
+    previous_entries: List[Tuple[int, str, Optional[str]]],
+    current_entries: List[Tuple[int, str, Optional[str]]],
+) -> None:
+    previous, current = _make_index(previous_entries), _make_index(current_entries)
+    changes = diff_repository_indexes(previous, current)
+
+    previous_names, current_names = previous.repositories.keys(), current.repositories.keys()
+    assert [repository.nameWithOwner for repository in changes.added] == sorted(current_names - previous_names)
+    assert [repository.nameWithOwner for repository in changes.removed] == sorted(previous_names - current_names)
+    for name_with_owner, teams in changes.teams_gained:
+        assert set(teams) == {
+            team_name for team_name in current.teams if name_with_owner in current.teams[team_name]
+        } - {team_name for team_name in previous.teams if name_with_owner in previous.teams[team_name]}
+    for before, now in changes.became_undocumented:
+        assert before.description and not now.description
+    for before, now in changes.description_changed:
+        assert now.description and before.description != now.description
+
+    # Nothing changes between a run and itself
+    assert not diff_repository_indexes(current, current)
+    assert generate_changes_report(diff_repository_indexes(current, current), 'last.snapshot').endswith('No changes.\n')
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import pathlib
+import tempfile
+
+# Non-standard library python package imports
+from click.testing import CliRunner
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.cli import cli
+from rosahelikopter.exports import write_sqlite
+from rosahelikopter.snapshot import save_snapshot
+
+
+def _repoes_dataset() -> RepositoryIndex:
+    repoes_dataset = RepositoryIndex()
+    for org_name, team_name, repository_name in (
+        ('navikt', 'aura', 'naiserator'),
+        ('navikt', 'nais', 'naiserator'),
+        ('navikt', 'nais', 'deploy'),
+        ('navikt', 'lookup', 'deploy'),
+    ):
+        repoes_dataset.add(
+            org_name,
+            team_name,
+            Repository(
+                nameWithOwner=f"{org_name}/{repository_name}",
+                url=f"https://github.com/{org_name}/{repository_name}",
+                description=f"The {repository_name}",
+                isArchived=False,
+            ),
+        )
+    return repoes_dataset
+
+
+def ensure_lookup_lists_the_owning_teams_from_sqlite_and_snapshot() -> None:
+    with tempfile.TemporaryDirectory() as output_dir:
+        sqlite_path = pathlib.Path(output_dir, 'repositories.sqlite')
+        write_sqlite(sqlite_path, _repoes_dataset())
+        snapshot_path = pathlib.Path(output_dir, 'repositories.snapshot')
+        save_snapshot(snapshot_path, _repoes_dataset())
+
+        for source_option, source_path in (('--from-sqlite', sqlite_path), ('--from-snapshot', snapshot_path)):
+            result = CliRunner(mix_stderr=False).invoke(
+                cli,
+                ['lookup', source_option, str(source_path), 'navikt/naiserator', 'navikt/deploy'],
+            )
+            assert result.exit_code == 0, result.stderr
+            assert result.stdout.splitlines() == [
+                'navikt/naiserator: @navikt/aura (ADMIN), @navikt/nais (ADMIN)',
+                'navikt/deploy: @navikt/lookup (ADMIN), @navikt/nais (ADMIN)',
+            ]
+
+            result = CliRunner(mix_stderr=False).invoke(
+                cli,
+                ['lookup', source_option, str(source_path), 'navikt/naiserator', 'navikt/unknown'],
+            )
+            assert result.exit_code == 1
+            assert result.stdout.splitlines() == ['navikt/naiserator: @navikt/aura (ADMIN), @navikt/nais (ADMIN)']
+            assert 'navikt/unknown: not found' in result.stderr
+
+
+def ensure_bare_arguments_run_overview() -> None:
+    with tempfile.TemporaryDirectory() as output_dir:
+        snapshot_path = pathlib.Path(output_dir, 'repositories.snapshot')
+        save_snapshot(snapshot_path, _repoes_dataset())
+
+        overview_result = CliRunner(mix_stderr=False).invoke(
+            cli,
+            ['overview', '-o', 'navikt', '--from-snapshot', str(snapshot_path), 'aura'],
+        )
+        assert overview_result.exit_code == 0, overview_result.stderr
+        assert 'navikt/naiserator' in overview_result.stdout
+        assert 'navikt/deploy' not in overview_result.stdout
+
+        result = CliRunner(mix_stderr=False).invoke(
+            cli,
+            ['-o', 'navikt', '--from-snapshot', str(snapshot_path), 'aura'],
+        )
+        assert result.exit_code == 0, result.stderr
+        assert result.stdout == overview_result.stdout
+
+        # Teams named as a command follow `--`
+        result = CliRunner(mix_stderr=False).invoke(
+            cli,
+            ['-o', 'navikt', '--from-snapshot', str(snapshot_path), '--', 'lookup'],
+        )
+        assert result.exit_code == 0, result.stderr
+        assert 'navikt/deploy' in result.stdout
+        assert 'navikt/naiserator' not in result.stdout
+
+
+def ensure_truncated_snapshots_fail_with_a_message() -> None:
+    with tempfile.TemporaryDirectory() as output_dir:
+        snapshot_path = pathlib.Path(output_dir, 'repositories.snapshot')
+        save_snapshot(snapshot_path, _repoes_dataset())
+        snapshot_path.write_bytes(snapshot_path.read_bytes()[:-10])
+
+        for args in (
+            ['lookup', '--from-snapshot', str(snapshot_path), 'navikt/deploy'],
+            ['-o', 'navikt', '--from-snapshot', str(snapshot_path), 'aura'],
+        ):
+            result = CliRunner(mix_stderr=False).invoke(cli, args)
+            assert result.exit_code == 1
+            assert f"Error: Failed reading snapshot {snapshot_path}" in result.stderr
+            assert 'truncated' in result.stderr
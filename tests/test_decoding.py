@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import json
+from typing import (
+    List,
+    Optional,
+)
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    filter_repositories,
+    repository_is_relevant_for_overview,
+)
+from rosahelikopter.decoding import json_loads
+
+
+repository_edges = st.lists(
+    st.one_of(
+        st.none(),
+        st.fixed_dictionaries(
+            dict(
+                permission=st.sampled_from(('ADMIN', 'MAINTAIN', 'WRITE', 'TRIAGE', 'READ')),
+                node=st.fixed_dictionaries(
+                    dict(
+                        description=st.one_of(st.none(), st.text()),
+                        nameWithOwner=st.text(alphabet='abc/', min_size=1, max_size=5),
+                        url=st.text(),
+                        isArchived=st.booleans(),
+                        updatedAt=st.text(),
+                    )
+                ),
+            )
+        ),
+    ),
+)
+
+
+@given(repository_edges)
+def ensure_responses_are_decoded_and_filtered_as_with_the_standard_library(edges: List[Optional[dict]]) -> None:
+    response_body = json.dumps(dict(data=dict(edges=edges))).encode()
+    decoded_edges = json_loads(response_body)['data']['edges']
+    assert decoded_edges == json.loads(response_body)['data']['edges']
+
+    relevant_repositories, num_discarded_edges = filter_repositories(decoded_edges)
+    expected_repositories = [
+        Repository.from_graphql(edge['node'])
+        for edge in edges
+        if repository_is_relevant_for_overview(edge)
+    ]
+    assert relevant_repositories == set(expected_repositories)
+    assert num_discarded_edges == len(edges) - len(expected_repositories)
+
+
+def ensure_invalid_responses_raise_value_errors() -> None:
+    for response_body in (b'', b'{"data": ', b'<html>Bad gateway</html>'):
+        try:
+            json_loads(response_body)
+        except ValueError:
+            continue
+        raise AssertionError(f"{response_body!r} decoded")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import csv
+import json
+import pathlib
+import tempfile
+from typing import (
+    List,
+    Tuple,
+)
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.exports import (
+    EXPORT_FIELDS,
+    SQLITE_MAX_VARIABLES,
+    read_sqlite,
+    read_sqlite_repository_owners,
+    write_csv,
+    write_jsonl,
+    write_sqlite,
+)
+
+
+org_team_repositories = st.lists(
+    st.tuples(
+        st.sampled_from(('navikt', 'nais')),
+        st.sampled_from(('aura', 'nais', 'naisdevice')),
+        st.text(alphabet='abcdefghijklmnopqrstuvwxyz-', min_size=1),
+        st.one_of(st.none(), st.text()),
+    ),
+)
+
+
+def _make_dataset(org_team_repositories: List[Tuple[str, str, str, str]]) -> RepositoryIndex:
+    repoes_dataset = RepositoryIndex()
+    for org_name, team_name, repository_name, description in org_team_repositories:
+        repoes_dataset.add(
+            org_name,
+            team_name,
+            Repository(
+                nameWithOwner=f"{org_name}/{repository_name}",
+                url=f"https://github.com/{org_name}/{repository_name}",
+                description=description,
+                isArchived=False,
+            ),
+        )
+    return repoes_dataset
+
+
+@given(org_team_repositories)
+def ensure_sqlite_export_reads_back_the_same_repositories(
+    org_team_repositories: List[Tuple[str, str, str, str]],
+) -> None:
+    repoes_dataset = _make_dataset(org_team_repositories)
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        export_path = pathlib.Path(export_dir, 'repositories.db')
+        write_sqlite(export_path, repoes_dataset)
+        # Written twice, the second export replacing the first
+        write_sqlite(export_path, repoes_dataset)
+        read_dataset = read_sqlite(export_path, organizations=['navikt', 'nais'], teams=['aura', 'nais', 'naisdevice'])
+        assert list(pathlib.Path(export_dir).iterdir()) == [export_path]
+
+        # Compared field by field, repositories alone are compared by `nameWithOwner`
+        assert {
+            name_with_owner: tuple(repository)
+            for name_with_owner, repository in read_dataset.repositories.items()
+        } == {
+            name_with_owner: tuple(repository)
+            for name_with_owner, repository in repoes_dataset.repositories.items()
+        }
+        assert {
+            key: name_with_owners
+            for key, name_with_owners in read_dataset.organization_teams.items()
+            if name_with_owners
+        } == {
+            key: name_with_owners
+            for key, name_with_owners in repoes_dataset.organization_teams.items()
+            if name_with_owners
+        }
+        # Only the teams asked for
+        assert set(read_sqlite(export_path, organizations=['nais'], teams=['aura']).organization_teams) <= {
+            ('nais', 'aura'),
+        }
+
+
+@given(org_team_repositories)
+def ensure_jsonl_and_csv_exports_hold_a_row_per_org_team_repository(
+    org_team_repositories: List[Tuple[str, str, str, str]],
+) -> None:
+    repoes_dataset = _make_dataset(org_team_repositories)
+    expected_rows = sorted(
+        (org_name, team_name, name_with_owner, repoes_dataset.repositories[name_with_owner].description)
+        for (org_name, team_name), name_with_owners in repoes_dataset.organization_teams.items()
+        for name_with_owner in name_with_owners
+    )
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        jsonl_path = pathlib.Path(export_dir, 'repositories.jsonl')
+        csv_path = pathlib.Path(export_dir, 'repositories.csv')
+        write_jsonl(jsonl_path, repoes_dataset)
+        write_csv(csv_path, repoes_dataset)
+        assert sorted(pathlib.Path(export_dir).iterdir()) == [csv_path, jsonl_path]
+
+        # Line by line as written, `str.splitlines` would also split descriptions at e.g. `\x85`
+        with jsonl_path.open() as jsonl_file:
+            jsonl_rows = [json.loads(line) for line in jsonl_file]
+        with csv_path.open(newline='') as csv_file:
+            csv_reader = csv.DictReader(csv_file)
+            assert tuple(csv_reader.fieldnames) == EXPORT_FIELDS
+            csv_rows = list(csv_reader)
+
+    assert all(tuple(row) == EXPORT_FIELDS and row['permission'] == 'ADMIN' for row in jsonl_rows)
+    assert sorted(
+        (row['organization'], row['team'], row['nameWithOwner'], row['description'])
+        for row in jsonl_rows
+    ) == expected_rows
+    # CSV has no `None`, missing descriptions are empty
+    assert sorted(
+        (row['organization'], row['team'], row['nameWithOwner'], row['description'])
+        for row in csv_rows
+    ) == [
+        (org_name, team_name, name_with_owner, description or '')
+        for org_name, team_name, name_with_owner, description in expected_rows
+    ]
+
+
+def ensure_more_repositories_and_teams_than_sqlite_binds_per_statement_are_looked_up() -> None:
+    num_values = 2 * SQLITE_MAX_VARIABLES + 1
+    repoes_dataset = _make_dataset(
+        [('navikt', f"team-{index}", f"repo-{index}", None) for index in range(num_values)],
+    )
+    with tempfile.TemporaryDirectory() as export_dir:
+        export_path = pathlib.Path(export_dir, 'repositories.db')
+        write_sqlite(export_path, repoes_dataset)
+
+        read_dataset = read_sqlite(
+            export_path,
+            organizations=['navikt'],
+            teams=[f"team-{index}" for index in range(num_values)],
+        )
+        repository_owners = read_sqlite_repository_owners(
+            export_path,
+            [f"navikt/repo-{index}" for index in range(num_values)],
+        )
+
+    assert read_dataset.repositories.keys() == repoes_dataset.repositories.keys()
+    assert repository_owners == {
+        f"navikt/repo-{index}": [('navikt', f"team-{index}", 'ADMIN')]
+        for index in range(num_values)
+    }
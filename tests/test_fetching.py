@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import functools
+import pathlib
+import tempfile
+import time
+import typing
+
+# Non-standard library python package imports
+from aiohttp import web
+import click
+
+# Imports of module(s) internal to this project/package
+from benchmarks.fake_github import (
+    FakeGithubServer,
+    make_dataset,
+)
+from rosahelikopter import RepositoryIndex
+from rosahelikopter.cache import cache_scope
+from rosahelikopter.main import (
+    fetch_repository_index,
+    main,
+)
+from rosahelikopter.team_index import TeamIndexCache
+
+
+TEAMS = ['team-0000', 'team-0001', 'team-0002', 'team-0003']
+ORGANIZATIONS = ['org-0000', 'org-0001']
+
+
+def _fetch(server: FakeGithubServer, **fetch_kwargs: typing.Any) -> RepositoryIndex:
+    return fetch_repository_index(
+        teams=fetch_kwargs.pop('teams', TEAMS),
+        organizations=fetch_kwargs.pop('organizations', ORGANIZATIONS),
+        github_auth_tokens=['token'],
+        verbosity_level=0,
+        api_url=server.url,
+        **fetch_kwargs,
+    )
+
+
+def _index_contents(repoes_dataset: RepositoryIndex) -> tuple:
+    return (
+        repoes_dataset.repositories,
+        dict(repoes_dataset.organization_teams),
+        dict(repoes_dataset.repository_teams),
+    )
+
+
+def ensure_concurrent_fetching_finds_what_sequential_fetching_does() -> None:
+    # Small pages, so that every team's repositories take several pages
+    with FakeGithubServer(make_dataset(num_orgs=2, num_teams=4, num_repos=200), page_size=10) as server:
+        sequential = _fetch(server, concurrency=1, batch_size=1)
+        concurrent = _fetch(server, concurrency=8, batch_size=3)
+
+    assert sequential.repositories
+    assert _index_contents(concurrent) == _index_contents(sequential)
+
+
+def ensure_stopping_after_the_first_page_without_admin_drops_no_admin_repositories() -> None:
+    with FakeGithubServer(make_dataset(num_orgs=2, num_teams=4, num_repos=300), page_size=10) as server:
+        all_pages = _fetch(server, fetch_all_pages=True)
+        num_requests_all_pages = server.num_requests
+        stopped_early = _fetch(server)
+        num_requests_stopped_early = server.num_requests - num_requests_all_pages
+
+    assert all_pages.repositories
+    assert _index_contents(stopped_early) == _index_contents(all_pages)
+    assert num_requests_stopped_early < num_requests_all_pages
+
+
+class UnorderedGithubServer(FakeGithubServer):
+    """
+    Ignores the order repositories are asked for in, as Github may not order them by permission.
+    """
+
+    def _team(self, login: str, team_slug: str) -> dict:
+        team = super()._team(login, team_slug)
+        repositories = team['repositories']
+        team['repositories'] = lambda info, orderBy=None, **kwargs: repositories(info, **kwargs)
+        return team
+
+
+def ensure_pages_without_admin_before_any_admin_ones_are_not_stopped_at() -> None:
+    dataset = make_dataset(num_orgs=1, num_teams=1, num_repos=100, team_repo_ratio=1.0)
+    # A first page without ADMIN repositories, the ADMIN ones on the pages after it
+    dataset['org-0000']['team-0000'] = [
+        ('ADMIN' if index >= 10 else 'READ', repository)
+        for index, (_, repository) in enumerate(dataset['org-0000']['team-0000'][:15])
+    ]
+    with UnorderedGithubServer(dataset, page_size=10) as server:
+        for strategy in ('per-team', 'org-crawl'):
+            repoes_dataset = _fetch(server, organizations=['org-0000'], teams=['team-0000'], strategy=strategy)
+            assert len(repoes_dataset.team_repositories('team-0000', org_name='org-0000')) == sum(
+                not repository['isArchived']
+                for permission, repository in dataset['org-0000']['team-0000']
+                if permission == 'ADMIN'
+            ) > 0
+
+
+def ensure_org_crawl_finds_what_fetching_per_team_does() -> None:
+    teams = [
+        # By name, by slug (in another case) and both for the same team
+        'Team Zero',
+        'TEAM-0001',
+        'team-0002',
+        'Team Two',
+        # Missing in every org
+        'no-such-team',
+    ]
+    with FakeGithubServer(
+        make_dataset(num_orgs=2, num_teams=4, num_repos=300),
+        page_size=10,
+        team_names={
+            org_name: {'team-0000': 'Team Zero', 'team-0002': 'Team Two'}
+            for org_name in ORGANIZATIONS
+        },
+    ) as server:
+        for fetch_all_pages in (False, True):
+            fetch = functools.partial(
+                _fetch,
+                server,
+                teams=teams,
+                # Missing too, as an org the token can't see
+                organizations=[*ORGANIZATIONS, 'no-such-org'],
+                fetch_all_pages=fetch_all_pages,
+            )
+            per_team, org_crawl = fetch(strategy='per-team'), fetch(strategy='org-crawl')
+
+            assert per_team.organization_teams[('org-0000', 'Team Zero')]
+            assert per_team.organization_teams[('org-0000', 'TEAM-0001')]
+            assert per_team.organization_teams[('org-0000', 'team-0002')] == (
+                per_team.organization_teams[('org-0000', 'Team Two')]
+            )
+            assert not per_team.teams['no-such-team']
+            assert _index_contents(org_crawl) == _index_contents(per_team)
+
+
+def ensure_orgs_and_teams_not_found_are_warned_about_and_have_no_repositories(capsys) -> None:
+    with FakeGithubServer(make_dataset(num_orgs=1, num_teams=2, num_repos=20)) as server:
+        expected = _fetch(server, organizations=['org-0000'])
+        for strategy in ('per-team', 'org-crawl'):
+            # Answered by Github with `NOT_FOUND` errors, alongside the orgs found
+            repoes_dataset = _fetch(server, organizations=['org-0000', 'no-such-org'], strategy=strategy)
+            assert _index_contents(repoes_dataset) == _index_contents(expected)
+            assert not repoes_dataset.organizations['no-such-org']
+            assert "Could not resolve to an Organization with the login of 'no-such-org'." in capsys.readouterr().err
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # A team cached by an earlier run, since removed
+            TeamIndexCache(pathlib.Path(cache_dir, 'team-index', cache_scope(server.url, ['token'])), ttl=3600).save(
+                'org-0000',
+                [dict(id='T_removed', slug='removed-team', name='Removed Team')],
+            )
+            repoes_dataset = _fetch(
+                server,
+                organizations=['org-0000'],
+                teams=['Removed Team'],
+                use_cache=True,
+                cache_dir=cache_dir,
+                cache_ttl=3600,
+            )
+            assert not repoes_dataset.repositories
+            assert "Could not resolve to a Team with the slug of 'removed-team'." in capsys.readouterr().err
+
+
+def ensure_nothing_cached_for_one_server_or_token_is_used_for_another() -> None:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fetch = functools.partial(
+            fetch_repository_index,
+            teams=TEAMS,
+            organizations=ORGANIZATIONS,
+            verbosity_level=0,
+            use_cache=True,
+            cache_dir=cache_dir,
+            cache_ttl=3600,
+            cache_max_size=100,
+        )
+        with FakeGithubServer(make_dataset(num_orgs=2, num_teams=4, num_repos=50)) as server:
+            first = fetch(github_auth_tokens=['token'], api_url=server.url)
+            # Served from the cache
+            num_requests = server.num_requests
+            assert _index_contents(fetch(github_auth_tokens=['token'], api_url=server.url)) == _index_contents(first)
+            assert server.num_requests == num_requests
+
+            # Fetched anew with another token, as it may see other repositories
+            fetch(github_auth_tokens=['other-token'], api_url=server.url)
+            assert server.num_requests > num_requests
+
+        # Another server, with other repositories
+        with FakeGithubServer(make_dataset(num_orgs=2, num_teams=4, num_repos=20)) as other_server:
+            other = fetch(github_auth_tokens=['token'], api_url=other_server.url, incremental=True)
+            assert other_server.num_requests > 0
+            assert _index_contents(other) != _index_contents(first)
+
+
+def ensure_streamed_overview_is_the_same_as_the_overview_rendered_in_memory(capsys) -> None:
+    # By name and by slug, for both to be listed as owners
+    teams = ['Team Zero', 'team-0000', 'team-0001']
+    with FakeGithubServer(
+        make_dataset(num_orgs=2, num_teams=2, num_repos=100),
+        page_size=10,
+        team_names={org_name: {'team-0000': 'Team Zero'} for org_name in ORGANIZATIONS},
+    ) as server:
+        overviews = list()
+        for stream in (False, True):
+            main(
+                teams=teams,
+                organizations=ORGANIZATIONS,
+                github_auth_tokens=['token'],
+                make_org_folders=False,
+                make_team_files=False,
+                tee_output=False,
+                verbosity_level=0,
+                api_url=server.url,
+                stream=stream,
+                stream_buffer_size=7,
+            )
+            overviews.append(capsys.readouterr().out)
+
+    assert '@org-0000/Team Zero, @org-0000/team-0000' in overviews[0]
+    assert overviews[1] == overviews[0]
+
+
+class FailingGithubServer(FakeGithubServer):
+    """
+    Answers the first `num_failures` requests with `status`, `headers` and a JSON `message` as Github does.
+    """
+
+    def __init__(self, *args: typing.Any, num_failures: int, status: int, message: str, headers: dict, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_failures = num_failures
+        self.status = status
+        self.message = message
+        self.headers = headers
+
+    async def _handle_graphql(self, request: web.Request) -> web.Response:
+        if self.num_requests < self.num_failures:
+            self.num_requests += 1
+            return web.json_response(dict(message=self.message), status=self.status, headers=self.headers)
+        return await super()._handle_graphql(request)
+
+
+def ensure_secondary_rate_limits_are_retried_after_the_wait_asked_for() -> None:
+    dataset = make_dataset(num_orgs=1, num_teams=2, num_repos=20)
+    with FakeGithubServer(dataset) as server:
+        expected = _fetch(server, organizations=['org-0000'], teams=['team-0000'])
+
+    with FailingGithubServer(
+        dataset,
+        num_failures=1,
+        status=403,
+        message='You have exceeded a secondary rate limit. Please wait a few minutes before you try again.',
+        headers={'Retry-After': '1'},
+    ) as server:
+        started_at = time.monotonic()
+        rate_limited = _fetch(server, organizations=['org-0000'], teams=['team-0000'], max_retries=1)
+        assert time.monotonic() - started_at >= 1
+    assert _index_contents(rate_limited) == _index_contents(expected)
+
+
+def ensure_bad_credentials_are_not_retried() -> None:
+    for status, message in ((401, 'Bad credentials'), (403, 'Resource not accessible by integration')):
+        with FailingGithubServer(
+            make_dataset(num_orgs=1, num_teams=1, num_repos=1),
+            num_failures=10,
+            status=status,
+            message=message,
+            headers=dict(),
+        ) as server:
+            try:
+                _fetch(server, organizations=['org-0000'], teams=['team-0000'], max_retries=5)
+            except click.ClickException as error:
+                assert message in error.message
+            else:
+                raise AssertionError(f"{status} {message} did not fail")
+            assert server.num_requests == 1
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import gzip
+import os
+import pathlib
+import tempfile
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter.files import (
+    open_atomically,
+    write_atomically,
+)
+
+
+@given(st.text(), st.text())
+def ensure_files_are_replaced_whole_or_not_at_all(first_content: str, second_content: str) -> None:
+    def read_back(path: pathlib.Path) -> str:
+        # Without translating newlines, as written
+        with path.open(newline='') as written_file:
+            return written_file.read()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        path = pathlib.Path(output_dir, 'output.txt')
+        write_atomically(path, first_content)
+        assert read_back(path) == first_content
+
+        # Failing half way, the file is left as it was
+        try:
+            with open_atomically(path) as output:
+                output.write(second_content)
+                raise RuntimeError('Interrupted')
+        except RuntimeError:
+            pass
+        assert read_back(path) == first_content
+
+        with open_atomically(path, 'wt', opener=gzip.open, encoding='utf-8') as output:
+            output.write(second_content)
+        assert gzip.decompress(path.read_bytes()).decode('utf-8') == second_content
+        # No temporary files left behind
+        assert os.listdir(output_dir) == ['output.txt']
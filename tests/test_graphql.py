@@ -1,38 +1,199 @@
 #!/usr/bin/env python3
 
 # Python standard library imports
+import asyncio
 from typing import (
-    Dict,
-    Union,
+    List,
+    Tuple,
 )
 
 # Non-standard library python package imports
+import gql
+from gql.transport.exceptions import TransportServerError
 from hypothesis import given
 from hypothesis import strategies as st
 
 # Imports of module(s) internal to this project/package
-from rosahelikopter.string_templates import GRAPHQL_GITHUB_REPOS_QUERY_STRING
+from rosahelikopter.github import (
+    RequestScheduler,
+    _graphql_get_repository_access_permissions_for_teams_in_orgs,
+    _graphql_spread_batched_response,
+    graphql_resolve_team_slugs,
+    reached_repositories_without_permission,
+)
+
+
+@given(
+    st.lists(
+        st.tuples(st.text(min_size=1), st.text(min_size=1), st.one_of(st.just(''), st.text())),
+        min_size=1,
+        unique_by=lambda unit: unit[:2],
+    ),
+)
+def ensure_org_and_team_names_are_passed_as_variables(pagination_units: List[Tuple[str, str, str]]) -> None:
+    query_string, variable_values, aliases = _graphql_get_repository_access_permissions_for_teams_in_orgs(
+        pagination_units,
+    )
+    gql.gql(query_string)
+    assert sorted(aliases.values()) == sorted(unit[:2] for unit in pagination_units)
+
+    # Names with e.g. quotes or braces in them are never part of the query document itself,
+    #   which is the same as for any other names of the same number of orgs and teams
+    org_placeholders = {
+        org_name: f"org-{org_index}"
+        for org_index, org_name in enumerate(dict.fromkeys(org_name for org_name, _, _ in pagination_units))
+    }
+    placeholder_query_string, _, _ = _graphql_get_repository_access_permissions_for_teams_in_orgs(
+        [
+            (org_placeholders[org_name], f"team-{unit_index}", continuation_token)
+            for unit_index, (org_name, _, continuation_token) in enumerate(pagination_units)
+        ],
+    )
+    assert query_string == placeholder_query_string
+    assert {name for unit in pagination_units for name in unit[:2]} <= set(variable_values.values())
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st.text(alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd')), min_size=1),
+            st.text(alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd')), min_size=1),
+            st.one_of(st.just(''), st.text(alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd')))),
+        ),
+        min_size=1,
+        unique_by=lambda unit: unit[:2],
+    ),
+)
+def ensure_batched_graphql_query_aliases_every_org_team_combination(
+    pagination_units: List[Tuple[str, str, str]],
+) -> None:
+    query_string, variable_values, aliases = _graphql_get_repository_access_permissions_for_teams_in_orgs(
+        pagination_units,
+    )
+
+    # Valid GraphQL, with one aliased team query per org/team combination
+    gql.gql(query_string)
+    assert sorted(aliases.values()) == sorted(unit[:2] for unit in pagination_units)
+    # Names and continuation tokens are passed as variables, not formatted into the query
+    assert sorted(
+        token
+        for name, token in variable_values.items()
+        if name.startswith('after') and token is not None
+    ) == sorted(token for _, _, token in pagination_units if token)
+
+    # Every alias is spread back out to its org/team combination
+    graphql_response = {
+        organization_alias: dict()
+        for organization_alias, _ in aliases
+    }
+    for (organization_alias, team_alias), (org_name, team_name) in aliases.items():
+        graphql_response[organization_alias][team_alias] = dict(repositories=f"{org_name}/{team_name}")
+    assert all(
+        repositories == f"{org_name}/{team_name}"
+        for (org_name, team_name), repositories
+        in _graphql_spread_batched_response(graphql_response, aliases)
+    )
+
+
+@given(st.integers(min_value=0, max_value=5), st.integers(min_value=0, max_value=5))
+def ensure_failed_requests_are_retried_until_max_retries(num_failures: int, max_retries: int) -> None:
+    class FailingSession:
+        num_requests = 0
+
+        async def execute(self, query, variable_values=None):
+            self.num_requests += 1
+            if self.num_requests <= num_failures:
+                raise TransportServerError('502, message=\'Bad Gateway\'')
+            return dict(rateLimit=dict(cost=1, limit=5000, remaining=4999, resetAt='2030-01-01T00:00:00Z'))
+
+    request_scheduler = RequestScheduler(max_retries=max_retries, backoff_base=0)
+    try:
+        asyncio.run(request_scheduler.execute(FailingSession(), '{ rateLimit { cost } }'))
+    except TransportServerError:
+        assert num_failures > max_retries
+        assert request_scheduler.num_retries == max_retries
+    else:
+        assert num_failures <= max_retries
+        assert request_scheduler.num_retries == num_failures
+        assert request_scheduler.points_spent == 1
+
+
+@given(
+    st.lists(st.integers(min_value=0, max_value=5000), min_size=1).filter(
+        lambda remaining_points: max(remaining_points) >= 500,
+    ),
+)
+def ensure_requests_are_sent_with_the_token_with_the_most_points_remaining(remaining_points: List[int]) -> None:
+    class TokenRecordingSession:
+        authorization = None
+
+        async def execute(self, query, variable_values=None, extra_args=None):
+            self.authorization = extra_args['headers']['Authorization']
+            return dict()
+
+    request_scheduler = RequestScheduler(github_auth_tokens=[f"token{i}" for i in range(len(remaining_points))])
+    for token_budget, remaining in zip(request_scheduler.token_budgets, remaining_points):
+        token_budget.update(dict(cost=1, limit=5000, remaining=remaining, resetAt='2099-01-01T00:00:00Z'))
+
+    session = TokenRecordingSession()
+    asyncio.run(request_scheduler.execute(session, '{ rateLimit { cost } }'))
+    # Tokens below the pacing threshold (10% of the limit) are only used when all tokens are
+    assert session.authorization == f"bearer token{remaining_points.index(max(remaining_points))}"
+    assert request_scheduler.seconds_waited == 0
 
 
 @given(
-    st.fixed_dictionaries(
-        {
-            'org_name': st.text(min_size=1),
-            'team_name': st.text(min_size=1),
-        }
+    st.lists(
+        st.text(alphabet='abcdefghijklmnopqrstuvwxyz-', min_size=1),
+        min_size=1,
+        unique=True,
     ),
-    st.one_of(st.none(), st.text()),
+    st.lists(st.text(alphabet='abcdefghijklmnopqrstuvwxyz-', min_size=1), min_size=1),
 )
-def ensure_required_graphql_query_variables_are_templated(
-    input_dict: Dict[str, str],
-    continuation_token: Union[str, None]
-) -> bool:
-    input_dict['repo_query_string'] = 'first: 100'
-    if continuation_token:
-        input_dict['repo_query_string'] += f", after: \"{continuation_token}\""
-    generated_template = GRAPHQL_GITHUB_REPOS_QUERY_STRING.format(**input_dict)
-    all(
-        string_value in generated_template
-        for _, string_value
-        in input_dict.items()
+def ensure_team_names_resolve_to_exact_team_slugs(team_slugs: List[str], team_names: List[str]) -> None:
+    class TeamsSession:
+        async def execute(self, query, variable_values=None):
+            # Ordered as a search for e.g. `nais` could order `naisdevice` first
+            return dict(
+                organization=dict(
+                    teams=dict(
+                        pageInfo=dict(endCursor=None, hasNextPage=False),
+                        nodes=[
+                            dict(id=f"T_{team_slug}", slug=team_slug, name=team_slug.upper())
+                            for team_slug in sorted(team_slugs, reverse=True)
+                        ],
+                    ),
+                ),
+            )
+
+    resolved_team_slugs = asyncio.run(
+        graphql_resolve_team_slugs(
+            [('navikt', team_name) for team_name in team_names + [team_slugs[0].upper()]],
+            gql_session=TeamsSession(),
+            request_scheduler=RequestScheduler(),
+        )
+    )
+    assert all(
+        resolved_team_slugs[('navikt', team_name)] == (team_name if team_name in team_slugs else None)
+        for team_name in team_names
+    )
+    # Teams are also found by their name
+    assert resolved_team_slugs[('navikt', team_slugs[0].upper())] == team_slugs[0]
+
+
+@given(st.lists(st.sampled_from(('ADMIN', 'MAINTAIN', 'WRITE', 'READ')), min_size=1), st.booleans())
+def ensure_pagination_only_stops_at_pages_ordered_by_permission(
+    permissions: List[str],
+    reached_admin_before: bool,
+) -> None:
+    repository_edges = [dict(permission=permission, node=dict()) for permission in permissions]
+    reached = reached_repositories_without_permission(repository_edges, 'ADMIN', reached_admin_before)
+
+    ordered_by_permission = permissions == sorted(permissions, key=lambda permission: permission != 'ADMIN')
+    # Stopped at when holding non-ADMIN repositories, unless an ADMIN one follows them,
+    #  and only once ADMIN repositories have been reached at all
+    assert reached == (
+        ordered_by_permission
+        and permissions[-1] != 'ADMIN'
+        and (reached_admin_before or 'ADMIN' in permissions)
     )
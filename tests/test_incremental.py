@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+from typing import List
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter.incremental import (
+    merge_repository_edges,
+    newest_updated_at,
+    reached_repositories_updated_before,
+)
+
+
+REPOSITORY_EDGES = st.lists(
+    st.fixed_dictionaries(
+        dict(
+            permission=st.sampled_from(('ADMIN', 'READ', 'WRITE')),
+            node=st.fixed_dictionaries(
+                dict(
+                    nameWithOwner=st.sampled_from([f"navikt/repo-{index}" for index in range(10)]),
+                    updatedAt=st.datetimes().map(lambda timestamp: timestamp.isoformat(timespec='seconds') + 'Z'),
+                )
+            ),
+        )
+    ),
+    unique_by=lambda edge: edge['node']['nameWithOwner'],
+)
+
+
+@given(REPOSITORY_EDGES, REPOSITORY_EDGES)
+def ensure_updated_repository_edges_replace_last_synced_ones(
+    last_synced_edges: List[dict],
+    updated_edges: List[dict],
+) -> None:
+    merged_edges = {
+        edge['node']['nameWithOwner']: edge
+        for edge in merge_repository_edges(last_synced_edges, updated_edges)
+    }
+    assert set(merged_edges) == {
+        edge['node']['nameWithOwner']
+        for edge in last_synced_edges + updated_edges
+    }
+    assert all(
+        merged_edges[edge['node']['nameWithOwner']] is edge
+        for edge in updated_edges
+    )
+
+
+@given(REPOSITORY_EDGES)
+def ensure_pagination_stops_only_after_reaching_older_repositories(repository_edges: List[dict]) -> None:
+    last_updated_at = newest_updated_at(repository_edges)
+    if last_updated_at is None:
+        assert not repository_edges
+        return
+    assert not reached_repositories_updated_before(repository_edges, min(
+        edge['node']['updatedAt']
+        for edge in repository_edges
+    ))
+    assert reached_repositories_updated_before(repository_edges, last_updated_at) == any(
+        edge['node']['updatedAt'] != last_updated_at
+        for edge in repository_edges
+    )
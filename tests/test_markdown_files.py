@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from typing import List
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.markdown import (
+    generate_markdown_template,
+    write_markdown_file,
+    write_markdown_files,
+)
+
+
+@given(
+    st.lists(
+        st.sampled_from(('aura', 'nais', 'naisdevice')),
+        min_size=1,
+        unique=True,
+    ),
+    st.lists(
+        st.text(alphabet='abcdefghijklmnopqrstuvwxyz-', min_size=1),
+        min_size=1,
+        unique=True,
+    ),
+)
+def ensure_unchanged_files_are_skipped_and_stale_files_removed(
+    teams: List[str],
+    repository_names: List[str],
+) -> None:
+    repoes_dataset = RepositoryIndex()
+    for i, repository_name in enumerate(repository_names):
+        repoes_dataset.add(
+            'navikt',
+            teams[i % len(teams)],
+            Repository(
+                nameWithOwner=f"navikt/{repository_name}",
+                url=f"https://github.com/navikt/{repository_name}",
+                description=None,
+                isArchived=False,
+            ),
+        )
+    file_flags = dict(organizations=['navikt'], teams=teams, make_org_folders=True, make_team_files=True)
+    team_files = {f"{team}.md" for team in teams if repoes_dataset.teams[team]}
+
+    working_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as output_dir:
+        os.chdir(output_dir)
+        try:
+            assert write_markdown_files(repoes_dataset, **file_flags) == (len(team_files), 0, 0)
+            written_content = {
+                path.name: path.read_text()
+                for path in pathlib.Path(output_dir, 'navikt').iterdir()
+            }
+            assert written_content.keys() == team_files
+
+            # Nothing changed, nothing written
+            assert write_markdown_files(repoes_dataset, **file_flags) == (0, len(team_files), 0)
+
+            # Teams without repositories no longer have a file
+            assert write_markdown_files(RepositoryIndex(), **file_flags) == (0, 0, len(team_files))
+            assert not pathlib.Path(output_dir, 'navikt').exists()
+        finally:
+            os.chdir(working_dir)
+
+
+def ensure_runs_for_other_teams_keep_each_others_files() -> None:
+    def make_dataset(*teams: str) -> RepositoryIndex:
+        repoes_dataset = RepositoryIndex()
+        for team in teams:
+            repoes_dataset.add(
+                'navikt',
+                team,
+                Repository(f"navikt/{team}-app", f"https://github.com/navikt/{team}-app", None, False),
+            )
+        return repoes_dataset
+
+    working_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as parent_dir:
+        output_dir = pathlib.Path(parent_dir, 'output')
+        output_dir.mkdir()
+        outside_file = pathlib.Path(parent_dir, 'outside.md')
+        outside_file.write_text('Not written by rosahelikopter')
+        os.chdir(output_dir)
+        try:
+            file_flags = dict(organizations=['navikt'], make_org_folders=False, make_team_files=True)
+            assert write_markdown_files(make_dataset('nais', 'aura'), teams=['nais'], **file_flags) == (1, 0, 0)
+            assert write_markdown_files(make_dataset('nais', 'aura'), teams=['aura'], **file_flags) == (1, 0, 0)
+            assert sorted(path.name for path in output_dir.glob('*.md')) == ['aura.md', 'nais.md']
+
+            # A manifest pointing outside of the output directory, e.g. edited by hand
+            manifest_path = output_dir / '.rosahelikopter-manifest.json'
+            manifest = json.loads(manifest_path.read_text())
+            manifest_path.write_text(json.dumps({**manifest, '../outside.md': 'digest'}))
+
+            # `nais` no longer has repositories, only its own file is removed
+            assert write_markdown_files(make_dataset('aura'), teams=['nais', '../outside'], **file_flags) == (0, 0, 1)
+            assert sorted(path.name for path in output_dir.glob('*.md')) == ['aura.md']
+            assert outside_file.exists()
+        finally:
+            os.chdir(working_dir)
+
+
+@given(
+    st.lists(
+        st.builds(
+            Repository,
+            nameWithOwner=st.text(alphabet='abcdefghijklmnopqrstuvwxyz-', min_size=1).map(
+                lambda repository_name: f"navikt/{repository_name}",
+            ),
+            url=st.just('https://github.com/navikt'),
+            description=st.one_of(st.none(), st.text()),
+            isArchived=st.just(False),
+        ),
+        unique_by=lambda repository: repository.nameWithOwner,
+    ),
+    st.booleans(),
+)
+def ensure_files_streamed_to_disk_are_byte_identical_to_documents_rendered_in_memory(
+    repositories: List[Repository],
+    with_owners: bool,
+) -> None:
+    repository_teams = {repository.nameWithOwner: [('navikt', 'nais')] for repository in repositories}
+    template_kwargs = dict(
+        orgs=['navikt'],
+        teams=['nais'],
+        repositories=repositories,
+        repository_teams=repository_teams if with_owners else None,
+    )
+    content = generate_markdown_template(**template_kwargs).encode()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_file = pathlib.Path(output_dir, 'nais.md')
+        digest, written = write_markdown_file(output_file, None, **template_kwargs)
+        assert written and output_file.read_bytes() == content
+        assert digest == hashlib.sha256(content).hexdigest()
+
+        # Unchanged, so not written again, nor any temporary file left behind
+        assert write_markdown_file(output_file, digest, **template_kwargs) == (digest, False)
+        assert os.listdir(output_dir) == ['nais.md']
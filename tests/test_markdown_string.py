@@ -9,7 +9,11 @@ from hypothesis import given
 from hypothesis import strategies as st
 
 # Imports of module(s) internal to this project/package
-from rosahelikopter import repository_is_relevant_for_overview
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+    repository_is_relevant_for_overview,
+)
 from rosahelikopter.markdown import make_markdown_table
 
 
@@ -47,11 +51,57 @@ class hashabledict(dict):
     )
 )
 def ensure_markdown_output_table_matches_expected_size(input_repoes: list[dict[str, Union[str, bool]]]) -> bool:
-    num_valid_table_rows, num_valid_repoes = 0, len([
-        repo
+    valid_repoes = [
+        Repository.from_graphql(repo)
         for repo in input_repoes
-        if repository_is_relevant_for_overview(repo, repo['permissions'])
-    ])
-    for _ in re.finditer(MARKDOWN_VALID_TABLE_ROWS_REGEX_PATTERN, make_markdown_table(input_repoes)):
+        if repository_is_relevant_for_overview(dict(permission=repo['permissions'], node=repo))
+    ]
+    num_valid_table_rows, num_valid_repoes = 0, len(valid_repoes)
+    for _ in re.finditer(MARKDOWN_VALID_TABLE_ROWS_REGEX_PATTERN, make_markdown_table(valid_repoes)):
         num_valid_table_rows += 1
     assert(num_valid_repoes == num_valid_table_rows)
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st.sampled_from(('navikt', 'nais')),
+            st.sampled_from(('aura', 'nais', 'naisdevice')),
+            st.integers(min_value=0, max_value=10),
+        ),
+        min_size=1,
+    )
+)
+def ensure_owners_column_lists_the_teams_owning_each_repository(additions: list[tuple[str, str, int]]) -> None:
+    repoes_dataset = RepositoryIndex()
+    for org_name, team_name, number in additions:
+        name_with_owner = f"{org_name}/repo-{number}"
+        repoes_dataset.add(
+            org_name,
+            team_name,
+            Repository(name_with_owner, f"https://github.com/{name_with_owner}", None, False),
+        )
+
+    # The reverse index holds the same org/team combinations as the forward one
+    assert {
+        (org_team, name_with_owner)
+        for name_with_owner, org_teams in repoes_dataset.repository_teams.items()
+        for org_team in org_teams
+    } == {
+        (org_team, name_with_owner)
+        for org_team, name_with_owners in repoes_dataset.organization_teams.items()
+        for name_with_owner in name_with_owners
+    }
+
+    table_rows = make_markdown_table(
+        repoes_dataset.repositories.values(),
+        repository_teams=repoes_dataset.repository_teams,
+    ).splitlines()[2:]
+    assert len(table_rows) == len(repoes_dataset.repositories)
+    for table_row in table_rows:
+        name_with_owner = re.match(r'\| \[(.+?)\]', table_row).group(1)
+        owners = table_row.rsplit('|', 2)[1].strip()
+        assert owners == ', '.join(
+            f"@{org_name}/{team_name}"
+            for org_name, team_name in sorted(repoes_dataset.repository_teams[name_with_owner])
+        )
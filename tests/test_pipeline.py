@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+from typing import (
+    List,
+    Tuple,
+)
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import Repository
+from rosahelikopter.pipeline import ExternalSorter
+
+
+repositories = st.builds(
+    Repository,
+    nameWithOwner=st.sampled_from([f"navikt/repo-{i}" for i in range(20)]),
+    url=st.just('https://github.com/navikt'),
+    description=st.one_of(st.none(), st.text(max_size=10)),
+    isArchived=st.just(False),
+)
+
+
+@given(st.lists(repositories), st.integers(min_value=1, max_value=5))
+def ensure_external_sort_matches_sorting_in_memory(
+    repository_list: List[Repository],
+    max_records_in_memory: int,
+) -> None:
+    with ExternalSorter(max_records_in_memory=max_records_in_memory) as repository_sorter:
+        for repository in repository_list:
+            repository_sorter.add(repository)
+        assert [repository.nameWithOwner for repository in repository_sorter.sorted_unique()] == sorted(
+            {repository.nameWithOwner for repository in repository_list}
+        )
+
+
+@given(
+    st.lists(st.tuples(repositories, st.sampled_from(('navikt', 'nais')), st.sampled_from(('aura', 'nais')))),
+    st.integers(min_value=1, max_value=5),
+)
+def ensure_external_sort_keeps_the_owners_of_every_duplicate(
+    owned_repositories: List[Tuple[Repository, str, str]],
+    max_records_in_memory: int,
+) -> None:
+    expected_owners = dict()
+    for repository, org_name, team_name in owned_repositories:
+        expected_owners.setdefault(repository.nameWithOwner, set()).add((org_name, team_name))
+
+    with ExternalSorter(max_records_in_memory=max_records_in_memory) as repository_sorter:
+        for repository, org_name, team_name in owned_repositories:
+            repository_sorter.add(repository, (org_name, team_name))
+        assert {
+            repository.nameWithOwner: owners
+            for repository, owners in repository_sorter.sorted_unique_with_owners()
+        } == {
+            name_with_owner: sorted(owners)
+            for name_with_owner, owners in expected_owners.items()
+        }
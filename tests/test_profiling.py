@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+from typing import List
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter.profiling import Profiler
+
+
+@given(st.lists(st.sampled_from(('query build', 'http round-trip', 'json decode')), min_size=1))
+def ensure_spans_and_counters_are_only_recorded_once_enabled(span_names: List[str]) -> None:
+    profiler = Profiler()
+    for span_name in span_names:
+        with profiler.span(span_name):
+            profiler.count('pages')
+    assert profiler.spans == list() and not profiler.counters
+
+    profiler.enable()
+    for span_name in span_names:
+        with profiler.span(span_name):
+            profiler.count('pages')
+    assert [span[0] for span in profiler.spans] == span_names
+    assert profiler.counters['pages'] == len(span_names)
+
+    # Every span ends up in the Chrome trace, on tracks of its own thread/task
+    trace_events = profiler.chrome_trace()['traceEvents']
+    assert [trace_event['name'] for trace_event in trace_events] == span_names
+    assert all(trace_event['dur'] >= 0 for trace_event in trace_events)
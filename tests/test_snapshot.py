@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import pathlib
+import tempfile
+from typing import (
+    List,
+    Tuple,
+)
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.snapshot import (
+    load_snapshot,
+    save_snapshot,
+)
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st.sampled_from(('navikt', 'nais')),
+            st.sampled_from(('aura', 'nais', 'naisdevice')),
+            st.text(min_size=1),
+            st.one_of(st.none(), st.text()),
+        ),
+    ),
+)
+def ensure_snapshot_loads_the_repositories_of_the_teams_asked_for(
+    org_team_repositories: List[Tuple[str, str, str, str]],
+) -> None:
+    repoes_dataset = RepositoryIndex()
+    for org_name, team_name, repository_name, description in org_team_repositories:
+        repoes_dataset.add(
+            org_name,
+            team_name,
+            Repository(
+                nameWithOwner=f"{org_name}/{repository_name}",
+                url=f"https://github.com/{org_name}/{repository_name}",
+                description=description,
+                isArchived=False,
+            ),
+        )
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_path = pathlib.Path(snapshot_dir, 'repositories.snapshot')
+        save_snapshot(snapshot_path, repoes_dataset)
+
+        loaded_dataset = load_snapshot(snapshot_path, organizations=['navikt'], teams=['aura', 'nais'])
+        assert {
+            (org_name, team_name): {
+                tuple(repository)
+                for repository in loaded_dataset.team_repositories(team_name, org_name=org_name)
+            }
+            for org_name, team_name in loaded_dataset.organization_teams
+        } == {
+            (org_name, team_name): {
+                tuple(repository)
+                for repository in repoes_dataset.team_repositories(team_name, org_name=org_name)
+            }
+            for org_name, team_name in repoes_dataset.organization_teams
+            if org_name == 'navikt' and team_name in ('aura', 'nais')
+        }
+
+
+def ensure_truncated_snapshots_are_not_loaded() -> None:
+    repoes_dataset = RepositoryIndex()
+    for repository_index in range(10):
+        repoes_dataset.add(
+            'navikt',
+            'nais',
+            Repository(
+                nameWithOwner=f"navikt/repository-{repository_index}",
+                url=f"https://github.com/navikt/repository-{repository_index}",
+                description=None,
+                isArchived=False,
+            ),
+        )
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_path = pathlib.Path(snapshot_dir, 'repositories.snapshot')
+        save_snapshot(snapshot_path, repoes_dataset)
+        snapshot_content = snapshot_path.read_bytes()
+
+        truncated_path = pathlib.Path(snapshot_dir, 'truncated.snapshot')
+        for truncated_size in range(len(snapshot_content)):
+            truncated_path.write_bytes(snapshot_content[:truncated_size])
+            try:
+                load_snapshot(truncated_path)
+            except (OSError, ValueError):
+                pass
+            else:
+                raise AssertionError(f"Snapshot truncated to {truncated_size} bytes was loaded")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import json
+import subprocess
+import sys
+
+
+# Imported by fetching alone, never needed for `--help` or runs not fetching anything
+FETCH_ONLY_MODULES = (
+    'aiohttp',
+    'asyncio',
+    'gql',
+    'graphql',
+    'orjson',
+    'rosahelikopter.github',
+    'rosahelikopter.pipeline',
+)
+
+
+def _modules_imported_by(statement: str) -> set[str]:
+    # A fresh interpreter, as the test session itself has imported everything already.
+    # The modules are printed last, after anything printed by `statement`
+    return set(
+        json.loads(
+            subprocess.run(
+                [sys.executable, '-c', f"{statement}; import json, sys; print(json.dumps(list(sys.modules)))"],
+                capture_output=True, check=True, text=True,
+            ).stdout.splitlines()[-1]
+        )
+    )
+
+
+def ensure_startup_does_not_import_what_only_fetching_needs() -> None:
+    for statement in ('import rosahelikopter.cli', 'import rosahelikopter.main'):
+        assert not _modules_imported_by(statement) & set(FETCH_ONLY_MODULES), statement
+
+    # `--help` is answered by click before the command (and so `rosahelikopter.main`) is ever run
+    help_modules = _modules_imported_by(
+        "from rosahelikopter.cli import cli; cli(['--help'], standalone_mode=False)"
+    )
+    assert 'rosahelikopter.main' not in help_modules
+    assert not help_modules & set(FETCH_ONLY_MODULES)
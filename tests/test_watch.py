@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import json
+import threading
+import typing
+import urllib.error
+import urllib.request
+
+# Non-standard library python package imports
+import click
+
+# Imports of module(s) internal to this project/package
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+import rosahelikopter.main
+from rosahelikopter.markdown import generate_markdown_template
+from rosahelikopter.profiling import profiler
+from rosahelikopter.watch import (
+    OverviewServer,
+    watch_repositories,
+)
+
+
+def _get(url: str) -> tuple[int, str]:
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as error:
+        return error.code, error.read().decode()
+
+
+def ensure_latest_overviews_are_served() -> None:
+    repoes_dataset = RepositoryIndex()
+    repository = Repository('navikt/rosahelikopter', 'https://github.com/navikt/rosahelikopter', None, False)
+    repoes_dataset.add('navikt', 'nais', repository)
+
+    server = OverviewServer(('127.0.0.1', 0), organizations=['navikt', 'nais'], teams=['nais', 'aura'])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        assert _get(server.url)[0] == 503
+        server.update(repoes_dataset)
+
+        assert _get(server.url) == (
+            200,
+            generate_markdown_template(
+                orgs=['navikt', 'nais'],
+                teams=['nais', 'aura'],
+                repositories=[repository],
+                repository_teams=repoes_dataset.repository_teams,
+            ),
+        )
+        assert _get(f"{server.url}orgs/navikt/teams/nais") == (
+            200,
+            generate_markdown_template(
+                orgs=['navikt'],
+                teams=['nais'],
+                repositories=[repository],
+                repository_teams=repoes_dataset.repository_teams,
+            ),
+        )
+        assert _get(f"{server.url}orgs/github")[0] == 404
+        assert json.loads(_get(f"{server.url}status")[1])['num_repositories'] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def ensure_refreshes_continue_after_failures() -> None:
+    num_refreshes = 0
+
+    def refresh() -> RepositoryIndex:
+        nonlocal num_refreshes
+        num_refreshes += 1
+        if num_refreshes == 1:
+            raise click.ClickException('Failed fetching')
+        return RepositoryIndex()
+
+    watch_repositories(refresh, organizations=['navikt'], teams=['nais'], interval=0, max_refreshes=3)
+    assert num_refreshes == 3
+
+
+def ensure_the_last_repositories_are_served_after_unexpected_failures(capsys) -> None:
+    repoes_dataset = RepositoryIndex()
+    repoes_dataset.add(
+        'navikt',
+        'nais',
+        Repository('navikt/rosahelikopter', 'https://github.com/navikt/rosahelikopter', None, False),
+    )
+    served_statuses = list()
+    server_urls = list()
+    num_refreshes = 0
+
+    def refresh() -> RepositoryIndex:
+        nonlocal num_refreshes
+        num_refreshes += 1
+        if num_refreshes == 1:
+            return repoes_dataset
+        if not server_urls:
+            server_urls.append(capsys.readouterr().err.split('Serving overviews at ')[1].split()[0])
+        served_statuses.append(json.loads(_get(f"{server_urls[0]}status")[1]))
+        raise KeyError('Unexpected')
+
+    profiler.enable()
+    try:
+        watch_repositories(
+            refresh,
+            organizations=['navikt'],
+            teams=['nais'],
+            interval=0,
+            serve_address=('127.0.0.1', 0),
+            max_refreshes=3,
+        )
+        # Only the spans of the last refresh are kept
+        assert [span[0] for span in profiler.spans] == ['refresh']
+    finally:
+        profiler.disable()
+    assert num_refreshes == 3
+    assert [
+        (status['num_refreshes'], status['num_repositories'], status['last_error'])
+        for status in served_statuses
+    ] == [(1, 1, None), (1, 1, "KeyError: 'Unexpected'")]
+
+
+def ensure_watch_refreshes_ignore_the_cache_on_the_first_refresh_only(monkeypatch) -> None:
+    refresh_caches = list()
+
+    def fetch_repository_index(refresh_cache: bool, **kwargs) -> RepositoryIndex:
+        refresh_caches.append(refresh_cache)
+        return RepositoryIndex()
+
+    def watch_repositories(refresh: typing.Callable[[], RepositoryIndex], **kwargs) -> None:
+        for _ in range(3):
+            refresh()
+
+    monkeypatch.setattr(rosahelikopter.main, 'fetch_repository_index', fetch_repository_index)
+    monkeypatch.setattr(rosahelikopter.main, 'watch_repositories', watch_repositories)
+    rosahelikopter.main.main(
+        teams=['nais'],
+        organizations=['navikt'],
+        github_auth_tokens=['token'],
+        make_org_folders=False,
+        make_team_files=False,
+        tee_output=False,
+        verbosity_level=0,
+        refresh_cache=True,
+        watch_interval=0,
+    )
+    assert refresh_caches == [True, False, False]
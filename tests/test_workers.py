@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# Python standard library imports
+import itertools
+import os
+import pickle
+from typing import (
+    List,
+    Tuple,
+)
+
+# Non-standard library python package imports
+from hypothesis import given
+from hypothesis import strategies as st
+
+# Imports of module(s) internal to this project/package
+from benchmarks.fake_github import (
+    FakeGithubServer,
+    make_dataset,
+)
+from rosahelikopter import (
+    Repository,
+    RepositoryIndex,
+)
+from rosahelikopter.main import (
+    _shard_org_teams,
+    fetch_repository_index_in_workers,
+)
+from rosahelikopter.profiling import profiler
+
+
+names = st.lists(st.text(alphabet='abcdefgh', min_size=1, max_size=4), min_size=1, max_size=8, unique=True)
+
+
+@given(names, names, st.integers(min_value=1, max_value=16), st.booleans())
+def ensure_shards_cover_every_org_team_combination_once(
+    organizations: List[str],
+    teams: List[str],
+    num_shards: int,
+    split_teams: bool,
+) -> None:
+    shards = _shard_org_teams(organizations, teams, num_shards=num_shards, split_teams=split_teams)
+    assert 1 <= len(shards) <= num_shards
+    org_team_pairs = [
+        org_team_pair
+        for shard_organizations, shard_teams in shards
+        for org_team_pair in itertools.product(shard_organizations, shard_teams)
+    ]
+    assert sorted(org_team_pairs) == sorted(itertools.product(organizations, teams))
+    if not split_teams:
+        # Every shard has all the teams of its orgs
+        assert all(sorted(shard_teams) == sorted(teams) for _, shard_teams in shards)
+
+
+@given(
+    st.lists(
+        st.tuples(st.sampled_from(('navikt', 'nais')), st.sampled_from(('aura', 'nais')), st.integers(0, 20)),
+        max_size=40,
+    ),
+    st.integers(min_value=1, max_value=4),
+)
+def ensure_shard_results_merge_into_the_same_repository_index(
+    additions: List[Tuple[str, str, int]],
+    num_shards: int,
+) -> None:
+    def make_repository(org_name: str, number: int) -> Repository:
+        name_with_owner = f"{org_name}/repo-{number}"
+        return Repository(name_with_owner, f"https://github.com/{name_with_owner}", None, False)
+
+    expected = RepositoryIndex()
+    shard_results = [RepositoryIndex() for _ in range(num_shards)]
+    for addition_index, (org_name, team_name, number) in enumerate(additions):
+        expected.add(org_name, team_name, make_repository(org_name, number))
+        shard_results[addition_index % num_shards].add(org_name, team_name, make_repository(org_name, number))
+
+    merged = RepositoryIndex()
+    for shard_result in shard_results:
+        # As when sent back from a worker process
+        merged.update(pickle.loads(pickle.dumps(shard_result)))
+    assert merged.repositories == expected.repositories
+    assert merged.organizations == expected.organizations
+    assert merged.teams == expected.teams
+    assert merged.organization_teams == expected.organization_teams
+    assert merged.repository_teams == expected.repository_teams
+
+
+def ensure_profiling_covers_the_work_of_worker_processes() -> None:
+    with FakeGithubServer(make_dataset(num_orgs=2, num_teams=2, num_repos=50), page_size=10) as server:
+        profiler.enable()
+        try:
+            fetch_repository_index_in_workers(
+                teams=['team-0000', 'team-0001'],
+                organizations=['org-0000', 'org-0001'],
+                verbosity_level=0,
+                workers=2,
+                github_auth_tokens=['token'],
+                api_url=server.url,
+            )
+        finally:
+            profiler.disable()
+        num_requests = server.num_requests
+
+    # Every request was made (and counted) by a worker, whose spans are on tracks of their own
+    assert profiler.counters['requests'] == num_requests
+    span_pids = {pid for _, _, _, pid, _, _ in profiler.spans}
+    assert len(span_pids - {os.getpid()}) == 2
+    assert {trace_event['pid'] for trace_event in profiler.chrome_trace()['traceEvents']} == span_pids